@@ -0,0 +1,114 @@
+"""
+===========================================================
+BENCHMARK — BLOCAGE MINHASH / LSH POUR LA JOINTURE DES NOMS
+===========================================================
+Compare l'appariement exhaustif du script 2 (Jaccard sur les mots, puis
+URL / difflib pour les musées sans correspondance) avec le même appariement
+restreint aux paires candidates proposées par BlocageLSH.
+
+Mesures rapportées pour chaque échelle :
+- blocage : nombre de paires candidates, réduction par rapport à N × M,
+  rappel (part des appariements exhaustifs conservés parmi les candidats)
+  et précision (part des paires candidates qui sont des appariements exhaustifs)
+- appariement final : précision / rappel par rapport à la vérité des noms
+  synthétiques, pour la version exhaustive et la version LSH
+- débit : musées traités par seconde
+
+Utilisation (hors QGIS) :
+    python bench/bench_blocage_lsh.py
+    python bench/bench_blocage_lsh.py --echelle 3000x4000 --bandes 32 --lignes 2
+"""
+
+import argparse
+import os
+import sys
+import time
+
+DOSSIER_BENCH = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(DOSSIER_BENCH, "..", "script"))
+
+from appariement_noms import (
+    BlocageLSH, meilleur_match_exhaustif, meilleur_match_url_exhaustif, tokens_nom
+)
+from bench_jointure_index import preparer_scrap_data
+from donnees_synthetiques import generer
+
+SEUIL = 0.4
+
+
+def apparier(officiels, scrap_data, candidats_par_musee=None):
+    """
+    Les deux passes de la jointure du script 2. Renvoie {musée: position scrapée}.
+    candidats_par_musee restreint chaque musée à une sous-liste de scrap_data
+    (dans l'ordre d'origine, pour garder la même règle d'égalité).
+    """
+    position = {id(s): i for i, s in enumerate(scrap_data)}
+    resultat = {}
+    for k, o in enumerate(officiels):
+        liste = scrap_data if candidats_par_musee is None else [scrap_data[i] for i in candidats_par_musee[k]]
+
+        match, score = meilleur_match_exhaustif(tokens_nom(o["nom"]), liste)
+        if not (match and score >= SEUIL):
+            match, score = meilleur_match_url_exhaustif(o["url"].lower().strip(), liste)
+        if match and score >= SEUIL:
+            resultat[k] = position[id(match)]
+    return resultat
+
+
+def precision_rappel(trouves, attendus):
+    """trouves / attendus : ensembles de paires (musée, position scrapée)."""
+    justes = len(trouves & attendus)
+    precision = justes / len(trouves) if trouves else 1.0
+    rappel = justes / len(attendus) if attendus else 1.0
+    return precision, rappel
+
+
+def mesurer(nb_officiels, nb_scrapes, bandes, lignes):
+    officiels, scrapes, verite = generer(nb_officiels, nb_scrapes)
+    scrap_data = preparer_scrap_data(scrapes)
+    paires_verite = set(verite.items())
+
+    debut = time.perf_counter()
+    exhaustif = apparier(officiels, scrap_data)
+    t_exhaustif = time.perf_counter() - debut
+
+    debut = time.perf_counter()
+    lsh = BlocageLSH(nb_bandes=bandes, lignes_par_bande=lignes).indexer(scrap_data)
+    candidats = [lsh.candidats_musee(o["nom"], o["url"]) for o in officiels]
+    t_blocage = time.perf_counter() - debut
+    avec_lsh = apparier(officiels, scrap_data, candidats)
+    t_lsh = time.perf_counter() - debut
+
+    paires_candidates = {(k, i) for k, liste in enumerate(candidats) for i in liste}
+    paires_exhaustives = set(exhaustif.items())
+    conserves = len(paires_exhaustives & paires_candidates)
+
+    print(f"\n {nb_officiels} musées × {nb_scrapes} noms scrapés (LSH : {bandes} bandes × {lignes} lignes)")
+    print(f"   blocage     : {len(paires_candidates)} paires candidates sur {nb_officiels * nb_scrapes}"
+          f" (réduction {1 - len(paires_candidates) / (nb_officiels * nb_scrapes):.2%}),"
+          f" rappel {conserves / len(paires_exhaustives) if paires_exhaustives else 1:.2%},"
+          f" précision {conserves / len(paires_candidates) if paires_candidates else 1:.2%}")
+    p, r = precision_rappel(paires_exhaustives, paires_verite)
+    print(f"   exhaustif   : {t_exhaustif:8.2f}s  {nb_officiels / t_exhaustif:9.1f} musées/s"
+          f"  précision {p:.2%}  rappel {r:.2%}")
+    p, r = precision_rappel(set(avec_lsh.items()), paires_verite)
+    print(f"   LSH         : {t_lsh:8.2f}s  {nb_officiels / t_lsh:9.1f} musées/s"
+          f"  précision {p:.2%}  rappel {r:.2%}  (dont blocage {t_blocage:.2f}s)")
+    identiques = sum(1 for k in range(nb_officiels) if exhaustif.get(k) == avec_lsh.get(k))
+    print(f"   accord LSH / exhaustif : {identiques}/{nb_officiels} musées")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--echelle", action="append", help="taille NxM, répétable")
+    parser.add_argument("--bandes", type=int, default=32)
+    parser.add_argument("--lignes", type=int, default=2)
+    args = parser.parse_args()
+
+    for echelle in args.echelle or ["130x140", "1000x1200", "3000x3500"]:
+        n, m = (int(x) for x in echelle.lower().split("x"))
+        mesurer(n, m, args.bandes, args.lignes)
+
+
+if __name__ == "__main__":
+    main()
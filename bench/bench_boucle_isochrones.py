@@ -0,0 +1,162 @@
+"""
+===========================================================
+BENCHMARK — BOUCLE DES MUSÉES CONTRE UN SERVEUR ORS FACTICE
+===========================================================
+Fait tourner, sans réseau ni clé, la partie hors QGIS de la boucle de
+Traitement_boucle_3_4_5_tous_musee contre serveur_ors_factice.py :
+- étape 0 : isochrones de tous les musées (client_ors, par lots ou non)
+- étape 1 : isochrone du musée (déjà reçu, sinon une requête), écriture
+  du GeoJSON Isochrones_<identifiant>.geojson
+- étape 2 : relecture du GeoJSON, polygone 10 min, gares à l'intérieur
+  (Gares_4326.gpkg, même test que run_symbology_gares)
+La mise en page et l'export PDF (étape 3) demandent QGIS et ne sont pas
+mesurés.
+
+Scénarios comparés :
+- historique    : une requête par musée, dans la boucle
+- lots          : 5 musées par requête, envoyées l'une après l'autre
+- lots en vol   : 5 musées par requête, 4 requêtes en cours à la fois
+- cache chaud   : lots en vol, deuxième passage (tout vient du cache)
+
+Utilisation (hors QGIS) :
+    python bench/bench_boucle_isochrones.py
+    python bench/bench_boucle_isochrones.py --musees 130 --latence 0.3 --taux-erreur 0.05
+    python bench/bench_boucle_isochrones.py --quota 20                # quota ORS : 20 requêtes / minute
+    python bench/bench_boucle_isochrones.py --quota 20 --fenetre 6    # même quota, temps divisé par 10
+"""
+
+import argparse
+import json
+import os
+import random
+import sqlite3
+import sys
+import tempfile
+import time
+
+DOSSIER_BENCH = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(DOSSIER_BENCH, "..", "script"))
+
+from client_ors import CacheIsochrones, LimiteurDebit, isochrones_par_lots
+from serveur_ors_factice import demarrer
+
+FICHIER_GARES = os.path.join(DOSSIER_BENCH, "..", "Gares_4326.gpkg")
+# Emprise de Paris en WGS84 (Paris.geojson est en Lambert 93)
+EMPRISE_PARIS = (2.2242, 48.8156, 2.4699, 48.9022)
+ISO_10_MIN = 600
+
+
+def charger_gares():
+    """[(lon, lat)] des gares de Gares_4326.gpkg (champ geo_point_2d, sans lecteur GeoPackage)."""
+    connexion = sqlite3.connect(FICHIER_GARES)
+    gares = []
+    for (point,) in connexion.execute("SELECT geo_point_2d FROM Gares_4326"):
+        p = json.loads(point)
+        gares.append((p["lon"], p["lat"]))
+    connexion.close()
+    return gares
+
+
+def musees_synthetiques(nb, graine=0):
+    """{identifiant: (lon, lat)} tirés dans l'emprise de Paris."""
+    lon_min, lat_min, lon_max, lat_max = EMPRISE_PARIS
+    rng = random.Random(graine)
+    return {f"M{k:04d}": (rng.uniform(lon_min, lon_max), rng.uniform(lat_min, lat_max)) for k in range(nb)}
+
+
+def point_dans_anneau(x, y, anneau):
+    """Test du rayon (lancer de rayon horizontal) sur un anneau fermé."""
+    dedans = False
+    for (x1, y1), (x2, y2) in zip(anneau, anneau[1:]):
+        if (y1 > y) != (y2 > y) and x < x1 + (y - y1) * (x2 - x1) / (y2 - y1):
+            dedans = not dedans
+    return dedans
+
+
+def boucle(musees, gares, url, dossier, taille_lot, limiteur, requetes_simultanees, cache):
+    """Étapes 0 à 2 pour tous les musées ; renvoie (statistiques client, gares à 10 min par musée)."""
+    precalcules = {}
+    stats = {"appels": 0, "depuis_cache": 0}
+    if taille_lot > 1:
+        precalcules, stats = isochrones_par_lots(musees, url, "factice", taille_lot=taille_lot, cache=cache,
+                                                 limiteur=limiteur, requetes_simultanees=requetes_simultanees)
+
+    gares_10_min = {}
+    for identifiant, (lon, lat) in musees.items():
+        iso_data = precalcules.pop(identifiant, None)
+        if iso_data is None:
+            resultats, stats_musee = isochrones_par_lots({identifiant: (lon, lat)}, url, "factice", taille_lot=1,
+                                                         cache=cache, limiteur=limiteur)
+            iso_data = resultats[identifiant]
+            stats["appels"] += stats_musee["appels"]
+            stats["depuis_cache"] += stats_musee["depuis_cache"]
+
+        chemin = os.path.join(dossier, f"Isochrones_{identifiant}.geojson")
+        with open(chemin, "w", encoding="utf-8") as f:
+            json.dump(iso_data, f)
+
+        with open(chemin, encoding="utf-8") as f:
+            relu = json.load(f)
+        anneau = next(feat["geometry"]["coordinates"][0] for feat in relu["features"]
+                      if feat["properties"]["value"] == ISO_10_MIN)
+        gares_10_min[identifiant] = sum(1 for x, y in gares if point_dans_anneau(x, y, anneau))
+    return stats, gares_10_min
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--musees", type=int, default=130)
+    parser.add_argument("--latence", type=float, default=0.1, help="latence du serveur factice (secondes)")
+    parser.add_argument("--gigue", type=float, default=0.05)
+    parser.add_argument("--taux-erreur", type=float, default=0.03, help="part des réponses 503")
+    parser.add_argument("--quota", type=int, default=None, help="requêtes ORS par fenêtre (429 au-delà)")
+    parser.add_argument("--fenetre", type=float, default=60.0,
+                        help="durée de la fenêtre du quota (60 s sur ORS ; moins pour accélérer le bench)")
+    args = parser.parse_args()
+
+    gares = charger_gares()
+    musees = musees_synthetiques(args.musees)
+    serveur, url_base = demarrer(latence=args.latence, gigue=args.gigue, taux_erreur=args.taux_erreur,
+                                 quota=args.quota, fenetre=args.fenetre)
+    url = url_base + "/v2/isochrones/foot-walking"
+    quota = args.quota or 100000
+
+    print(f" {len(musees)} musées, {len(gares)} gares, latence {args.latence}+{args.gigue} s,"
+          f" {args.taux_erreur:.0%} d'erreurs 503, quota {args.quota or 'aucun'} / {args.fenetre:g} s")
+    print(f" {'scénario':<14s} {'durée':>8s} {'musées/s':>9s} {'requêtes':>9s} {'cache':>6s}"
+          f" {'réessais':>9s} {'attente':>8s} {'429':>5s} {'503':>5s}")
+
+    reference = None
+    with tempfile.TemporaryDirectory() as dossier:
+        cache = CacheIsochrones(os.path.join(dossier, "cache"))
+        scenarios = [
+            ("historique", 1, 1, None),
+            ("lots", 5, 1, None),
+            ("lots en vol", 5, 4, cache),
+            ("cache chaud", 5, 4, cache),
+        ]
+        for nom, taille_lot, simultanees, cache_scenario in scenarios:
+            if args.quota:
+                time.sleep(args.fenetre)   # fenêtre du serveur vidée des requêtes du scénario précédent
+            limiteur = LimiteurDebit(par_minute=quota, par_jour=None, fenetre=args.fenetre)
+            avant = dict(serveur.compteurs)
+            debut = time.perf_counter()
+            stats, gares_10_min = boucle(musees, gares, url, dossier, taille_lot, limiteur, simultanees,
+                                         cache_scenario)
+            duree = time.perf_counter() - debut
+            refus = serveur.compteurs[429] - avant.get(429, 0)
+            erreurs = serveur.compteurs[503] - avant.get(503, 0)
+            print(f" {nom:<14s} {duree:7.2f}s {len(musees) / duree:9.1f} {stats['appels']:>9d}"
+                  f" {stats['depuis_cache']:>6d} {limiteur.reessais:>9d} {limiteur.attente:7.1f}s"
+                  f" {refus:>5d} {erreurs:>5d}")
+            if reference is None:
+                reference = gares_10_min
+            elif gares_10_min != reference:
+                print(f"   ⚠ gares à 10 min différentes du scénario historique pour {nom}")
+
+    serveur.shutdown()
+    print(f" Gares à moins de 10 min : {sum(reference.values()) / len(reference):.1f} par musée en moyenne.")
+
+
+if __name__ == "__main__":
+    main()
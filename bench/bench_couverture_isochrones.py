@@ -0,0 +1,142 @@
+"""
+===========================================================
+BENCHMARK — COUVERTURE DE PARIS PAR LES ISOCHRONES
+===========================================================
+Compare, sur les bandes 10 min de musées synthétiques rangées dans un
+stock GeoPackage temporaire (polygones du serveur ORS factice, ou du
+moteur local sur une grille de rues avec --local) :
+- union une à une (chaque bande ajoutée à l'union déjà construite)
+  contre union en cascade (unary_union)
+- découpage par zone contre l'union entière, ou seulement contre les
+  parties trouvées par l'index spatial (arbre STR)
+- analyse complète (analyser_couverture), lecture du stock comprise
+
+Les zones sont un quadrillage de l'emprise de Paris (pas de fichier
+d'arrondissements dans le dépôt). Nécessite shapely.
+
+Utilisation (hors QGIS) :
+    python bench/bench_couverture_isochrones.py
+    python bench/bench_couverture_isochrones.py --musees 400 --zones 20
+    python bench/bench_couverture_isochrones.py --local
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+DOSSIER_BENCH = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(DOSSIER_BENCH, "..", "script"))
+
+from bench_boucle_isochrones import EMPRISE_PARIS, musees_synthetiques
+from couverture_isochrones import ProjectionLocale, analyser_couverture
+from serveur_ors_factice import reponse_isochrones
+from stock_isochrones import StockIsochrones
+
+try:
+    from shapely.geometry import shape
+    from shapely.ops import unary_union
+    from shapely.strtree import STRtree
+except ImportError:
+    shape = None
+
+BANDE = ("foot-walking", 600)
+
+
+def quadrillage(nb):
+    """nb zones rectangulaires (lignes × colonnes) couvrant EMPRISE_PARIS : [(code, nom, géométrie)]."""
+    colonnes = max(1, round(nb ** 0.5))
+    lignes = -(-nb // colonnes)
+    lon_min, lat_min, lon_max, lat_max = EMPRISE_PARIS
+    pas_lon, pas_lat = (lon_max - lon_min) / colonnes, (lat_max - lat_min) / lignes
+    zones = []
+    for i in range(lignes):
+        for j in range(colonnes):
+            x0, y0 = lon_min + j * pas_lon, lat_min + i * pas_lat
+            anneau = [[x0, y0], [x0 + pas_lon, y0], [x0 + pas_lon, y0 + pas_lat], [x0, y0 + pas_lat], [x0, y0]]
+            zones.append((len(zones) + 1, f"Zone {len(zones) + 1}", {"type": "Polygon", "coordinates": [anneau]}))
+    return zones
+
+
+def isochrones_musees(musees, local):
+    if local:
+        from bench_simplification_isochrones import grille_rues
+        from isochrones_locaux import MoteurIsochrones
+        with tempfile.TemporaryDirectory() as dossier:
+            chemin = os.path.join(dossier, "grille.geojson")
+            grille_rues(chemin, lon0=EMPRISE_PARIS[0], lat0=EMPRISE_PARIS[1], nb=100, pas_m=180.0)
+            moteur = MoteurIsochrones.depuis_fichier(chemin)
+        return {identifiant: moteur.isochrones(lon, lat) for identifiant, (lon, lat) in musees.items()}
+    return {identifiant: reponse_isochrones({"locations": [[lon, lat]], "range": [300, 600]})
+            for identifiant, (lon, lat) in musees.items()}
+
+
+def chronometrer(fonction):
+    debut = time.perf_counter()
+    resultat = fonction()
+    return resultat, time.perf_counter() - debut
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--musees", type=int, default=130)
+    parser.add_argument("--zones", type=int, default=20, help="nombre de zones (20 arrondissements à Paris)")
+    parser.add_argument("--local", action="store_true", help="isochrones du moteur local (contours détaillés)")
+    args = parser.parse_args()
+    if shape is None:
+        print(" shapely absent : benchmark non exécuté.")
+        return
+
+    musees = musees_synthetiques(args.musees)
+    zones = quadrillage(args.zones)
+    with tempfile.TemporaryDirectory() as dossier:
+        stock = StockIsochrones(os.path.join(dossier, "isochrones.gpkg"))
+        stock.enregistrer_tous(isochrones_musees(musees, args.local))
+
+        projection = ProjectionLocale(sum(EMPRISE_PARIS[1::2]) / 2)
+        polygones = [shape(projection.geometrie_xy(g)) for _, g in stock.bandes(*BANDE).values()]
+        polygones_zones = [shape(projection.geometrie_xy(g)) for _, _, g in zones]
+        sommets = sum(len(a.exterior.coords) for p in polygones for a in p.geoms)
+        print(f" {len(polygones)} bandes {BANDE[1] // 60} min ({sommets} sommets), {len(zones)} zones")
+
+        def une_a_une():
+            union = polygones[0]
+            for polygone in polygones[1:]:
+                union = union.union(polygone)
+            return union
+
+        union_lente, t_une_a_une = chronometrer(une_a_une)
+        union, t_cascade = chronometrer(lambda: unary_union(polygones))
+        print(f" union une à une      : {t_une_a_une * 1000:8.1f} ms")
+        print(f" union en cascade     : {t_cascade * 1000:8.1f} ms  (écart de surface"
+              f" {abs(union.area - union_lente.area) / union.area:.1e})")
+
+        couvertes, t_entiere = chronometrer(lambda: [z.intersection(union).area for z in polygones_zones])
+        parties = list(getattr(union, "geoms", [union]))
+
+        def par_index():
+            arbre = STRtree(parties)
+            surfaces = []
+            for z in polygones_zones:
+                proches = [p if hasattr(p, "geom_type") else parties[p] for p in arbre.query(z)]
+                surfaces.append(unary_union([z.intersection(p) for p in proches]).area if proches else 0.0)
+            return surfaces
+
+        couvertes_index, t_index = chronometrer(par_index)
+        ecart = max(abs(a - b) for a, b in zip(couvertes, couvertes_index))
+        print(f" découpage, union     : {t_entiere * 1000:8.1f} ms")
+        print(f" découpage, index STR : {t_index * 1000:8.1f} ms  ({len(parties)} parties,"
+              f" écart max {ecart:.1e} m²)")
+
+        (_, statistiques), t_analyse = chronometrer(lambda: analyser_couverture(stock, zones, *BANDE))
+        stock.fermer()
+
+    total = statistiques[-1]
+    print(f" analyser_couverture  : {t_analyse * 1000:8.1f} ms")
+    print(f" Couverture : {total['couverte_ha']:.0f} ha sur {total['surface_ha']:.0f} ha"
+          f" ({total['part_couverte']:.1f} %), {total['musees_a_portee']} musées à portée d'au moins une zone.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+"""
+===========================================================
+BENCHMARK — EXPORT DES CARTES PDF EN PARALLÈLE
+===========================================================
+QGIS n'étant pas disponible hors de son installation, les processus
+d'export sont remplacés par ce même script lancé avec --travailleur : il
+parle le protocole de export_parallele (« pret », puis un résultat JSON
+par travail) et simule un export par un calcul tiré au hasard autour de
+--duree secondes sur un cœur (occupe le processeur comme le rendu d'une
+carte : le gain dépend des cœurs disponibles).
+Pour N cartes, compare l'export en série et exporter_en_parallele avec
+1, 2, 4… processus, et vérifie le compte des échecs : un travail en
+erreur, un processus qui s'arrête au milieu de la file.
+
+Utilisation (hors QGIS) :
+    python bench/bench_export_parallele.py
+    python bench/bench_export_parallele.py --cartes 130 --duree 0.5 --processus 1 2 4 8
+"""
+
+import argparse
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+
+DOSSIER_BENCH = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(DOSSIER_BENCH, "..", "script"))
+
+from export_parallele import exporter_en_parallele
+
+
+def exporter_factice(calcul):
+    """Rendu simulé : quantité de calcul fixe (le temps dépend des cœurs libres, comme un vrai rendu)."""
+    for _ in range(calcul):
+        sum(i * i for i in range(1000))
+
+
+def calibrer(duree):
+    """Nombre de tours de exporter_factice pour environ duree secondes sur un cœur libre."""
+    debut = time.perf_counter()
+    exporter_factice(200)
+    return max(1, round(200 * duree / (time.perf_counter() - debut)))
+
+
+def travailleur_factice(arret_apres):
+    """Processus d'export simulé : même protocole que export_parallele.travailleur."""
+    time.sleep(0.2)   # ouverture du projet
+    print(json.dumps({"etat": "pret"}), flush=True)
+    for nb, ligne in enumerate(sys.stdin, start=1):
+        travail = json.loads(ligne)
+        if arret_apres and nb == arret_apres:
+            os._exit(3)
+        debut = time.perf_counter()
+        exporter_factice(travail["calcul"])
+        erreur = "exportToPdf a échoué (code 3)" if travail["id"] == "M_ECHEC" else None
+        print(json.dumps({"id": travail["id"], "ok": erreur is None, "erreur": erreur,
+                          "duree": time.perf_counter() - debut}), flush=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--cartes", type=int, default=40)
+    parser.add_argument("--duree", type=float, default=0.1, help="durée moyenne d'un export (secondes)")
+    parser.add_argument("--processus", type=int, nargs="+", default=[1, 2, 4])
+    parser.add_argument("--travailleur", action="store_true", help=argparse.SUPPRESS)
+    parser.add_argument("--arret-apres", type=int, default=0, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.travailleur:
+        travailleur_factice(args.arret_apres)
+        return
+
+    aleatoire = random.Random(1)
+    calcul = calibrer(args.duree)
+    with tempfile.TemporaryDirectory() as dossier:
+        travaux = [{"id": f"M{k:04d}", "fid": k, "pdf": os.path.join(dossier, f"Carte_musee_M{k:04d}.pdf"),
+                    "calcul": round(calcul * aleatoire.uniform(0.5, 1.5))} for k in range(args.cartes)]
+        print(f" {args.cartes} cartes, export simulé de {args.duree:g} s en moyenne ;"
+              f" {os.cpu_count()} cœurs disponibles")
+
+        debut = time.perf_counter()
+        for travail in travaux:
+            exporter_factice(travail["calcul"])
+        t_serie = time.perf_counter() - debut
+        print(f" en série            : {t_serie:6.2f} s")
+
+        commande = [sys.executable, os.path.abspath(__file__), "--travailleur"]
+        for nb in args.processus:
+            bilan = exporter_en_parallele(travaux, commande, nb, afficher=lambda texte: None)
+            print(f" {bilan['processus']:2d} processus        : {bilan['duree']:6.2f} s"
+                  f" (× {t_serie / bilan['duree']:.2f}, {len(bilan['reussis'])} réussis, {len(bilan['echecs'])} échecs)")
+
+        # un travail en erreur et un processus arrêté en cours de route
+        travaux[len(travaux) // 2]["id"] = "M_ECHEC"
+        commande_arret = commande + ["--arret-apres", "3"]
+        bilan = exporter_en_parallele(travaux[:12], commande_arret, 2, afficher=lambda texte: None)
+        print(f" Échecs signalés (2 processus qui s'arrêtent au 3e travail, 12 travaux) :"
+              f" {len(bilan['reussis'])} réussis, {len(bilan['echecs'])} échecs")
+        for identifiant, erreur in bilan["echecs"][:4]:
+            print(f"   {identifiant} : {erreur}")
+        bilan = exporter_en_parallele(travaux, commande, 2, afficher=lambda texte: None)
+        print(f" Travail en erreur : {bilan['echecs']}")
+
+
+if __name__ == "__main__":
+    main()
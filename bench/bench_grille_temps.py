@@ -0,0 +1,106 @@
+"""
+===========================================================
+BENCHMARK — GRILLE PRÉCALCULÉE DES TEMPS DE MARCHE
+===========================================================
+Sur une grille de rues synthétique couvrant l'emprise de Paris (pas
+d'extrait OSM dans le dépôt), pour des musées tirés au hasard :
+- calcul de la grille (rattachement des cases, puis un Dijkstra par
+  musée), taille du fichier
+- ouverture (projection en mémoire) et requêtes par musée : seuillage
+  des cases, gares à 10 min (995 gares de Gares_4326.gpkg), polygones
+  5 et 10 min
+- comparaison avec le moteur local (isochrones_locaux) : temps d'un
+  isochrone, gares à 10 min trouvées par l'un et par l'autre
+
+Utilisation (hors QGIS, shapely nécessaire pour les polygones) :
+    python bench/bench_grille_temps.py
+    python bench/bench_grille_temps.py --musees 130 --pas 25
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+DOSSIER_BENCH = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(DOSSIER_BENCH, "..", "script"))
+
+from bench_boucle_isochrones import EMPRISE_PARIS, charger_gares, musees_synthetiques
+from bench_simplification_isochrones import grille_rues
+from grille_temps import GrilleTemps, construire_grille
+from isochrones_locaux import MoteurIsochrones
+
+try:
+    from shapely.geometry import Point, shape
+except ImportError:
+    shape = None
+
+DUREE_GARES = 600
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--musees", type=int, default=30)
+    parser.add_argument("--pas", type=float, default=50.0, help="côté des cases (mètres)")
+    args = parser.parse_args()
+
+    gares = {k: p for k, p in enumerate(charger_gares())}
+    musees = musees_synthetiques(args.musees)
+    with tempfile.TemporaryDirectory() as dossier:
+        chemin_rues = os.path.join(dossier, "rues.geojson")
+        grille_rues(chemin_rues, lon0=EMPRISE_PARIS[0], lat0=EMPRISE_PARIS[1], nb=100, pas_m=180.0)
+        moteur = MoteurIsochrones.depuis_fichier(chemin_rues)
+        print(f" Graphe : {len(moteur.graphe.lonlat)} nœuds, {len(moteur.graphe.aretes)} tronçons ;"
+              f" {len(musees)} musées, {len(gares)} gares")
+
+        chemin = os.path.join(dossier, "grille_temps.bin")
+        debut = time.perf_counter()
+        nb_cases = construire_grille(chemin, moteur, musees, EMPRISE_PARIS, pas_m=args.pas)
+        t_calcul = time.perf_counter() - debut
+        print(f" Calcul de la grille : {t_calcul:.1f} s ({nb_cases} cases de {args.pas:g} m par musée,"
+              f" {os.path.getsize(chemin) / 1e6:.1f} Mo)")
+
+        debut = time.perf_counter()
+        grille = GrilleTemps(chemin)
+        t_ouverture = time.perf_counter() - debut
+
+        mesures = {"seuillage": 0.0, "gares": 0.0, "polygones": 0.0, "moteur local": 0.0}
+        differences = total_gares = 0
+        for identifiant, (lon, lat) in musees.items():
+            debut = time.perf_counter()
+            grille.cases_atteintes(identifiant, DUREE_GARES)
+            mesures["seuillage"] += time.perf_counter() - debut
+
+            debut = time.perf_counter()
+            par_grille = set(grille.atteints(identifiant, gares, DUREE_GARES))
+            mesures["gares"] += time.perf_counter() - debut
+            total_gares += len(par_grille)
+
+            if shape is None:
+                continue
+            debut = time.perf_counter()
+            grille.isochrones(identifiant, [300, DUREE_GARES])
+            mesures["polygones"] += time.perf_counter() - debut
+
+            debut = time.perf_counter()
+            iso_data = moteur.isochrones(lon, lat, (300, DUREE_GARES))
+            mesures["moteur local"] += time.perf_counter() - debut
+            polygone = shape(iso_data["features"][-1]["geometry"])
+            par_moteur = {k for k, (x, y) in gares.items() if polygone.intersects(Point(x, y))}
+            differences += len(par_grille ^ par_moteur)
+        grille.fermer()
+
+    print(f" Ouverture de la grille : {t_ouverture * 1000:.2f} ms")
+    for nom, duree in mesures.items():
+        if duree:
+            print(f" {nom:<14s} : {duree / len(musees) * 1000:8.2f} ms par musée")
+    print(f" Gares à {DUREE_GARES // 60} min : {total_gares / len(musees):.1f} par musée en moyenne", end="")
+    if shape is not None:
+        print(f", {differences / len(musees):.1f} de différence par musée avec le polygone du moteur local")
+    else:
+        print(" (shapely absent : polygones et moteur local non mesurés)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+"""
+===========================================================
+BENCHMARK — INDEX INVERSÉ POUR LA JOINTURE DES NOMS
+===========================================================
+Compare, pour la première passe de la jointure du script 2 (Jaccard sur
+les mots, SEUIL = 0.4) :
+- la boucle exhaustive historique (chaque musée contre toute la liste)
+- IndexTokens (seules les entrées partageant un mot avec le musée sont évaluées)
+- jaccard_par_lots (tous les musées d'un coup par matrices creuses, si
+  NumPy / SciPy sont installés)
+
+sur des noms synthétiques à l'échelle de Paris et à l'échelle nationale,
+et vérifie que les appariements retenus sont identiques.
+
+Utilisation (hors QGIS) :
+    python bench/bench_jointure_index.py
+    python bench/bench_jointure_index.py --echelle 5000x6000
+"""
+
+import argparse
+import os
+import sys
+import time
+
+DOSSIER_BENCH = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(DOSSIER_BENCH, "..", "script"))
+
+import appariement_noms
+from appariement_noms import IndexTokens, jaccard_par_lots, meilleur_match_exhaustif, tokens_nom
+from donnees_synthetiques import generer
+
+SEUIL = 0.4
+
+
+def preparer_scrap_data(scrapes):
+    """Même structure que scrap_data dans le script 2."""
+    return [
+        {
+            "nom": s["nom"].lower().strip(),
+            "tokens": tokens_nom(s["nom"]),
+            "url_original": s["url"],
+            "url_clean": s["url"].lower(),
+        }
+        for s in scrapes
+    ]
+
+
+def mesurer(nb_officiels, nb_scrapes):
+    officiels, scrapes, _ = generer(nb_officiels, nb_scrapes)
+    scrap_data = preparer_scrap_data(scrapes)
+    tokens_officiels = [tokens_nom(o["nom"]) for o in officiels]
+
+    debut = time.perf_counter()
+    resultats_exhaustifs = []
+    for tokens_sig in tokens_officiels:
+        match, score = meilleur_match_exhaustif(tokens_sig, scrap_data)
+        resultats_exhaustifs.append(match if match and score >= SEUIL else None)
+    t_exhaustif = time.perf_counter() - debut
+
+    debut = time.perf_counter()
+    index = IndexTokens(scrap_data)
+    t_construction = time.perf_counter() - debut
+    resultats_index = []
+    for tokens_sig in tokens_officiels:
+        match, _ = index.meilleur_match(tokens_sig, SEUIL)
+        resultats_index.append(match)
+    t_index = time.perf_counter() - debut
+
+    differences = sum(1 for a, b in zip(resultats_exhaustifs, resultats_index) if a is not b)
+    apparies = sum(1 for r in resultats_index if r is not None)
+    print(f" {nb_officiels:>6d} × {nb_scrapes:<6d}"
+          f" exhaustif {t_exhaustif * 1000:9.1f}ms ({len(officiels) * len(scrap_data):>10d} scores)"
+          f" | index {t_index * 1000:8.1f}ms dont construction {t_construction * 1000:6.1f}ms ({index.nb_scores:>8d} scores)"
+          f" | gain {t_exhaustif / t_index:6.1f}x | appariés {apparies} | différences {differences}")
+    if differences:
+        raise Exception(" L'index ne donne pas les mêmes appariements que la boucle exhaustive !")
+
+    if appariement_noms.sparse is not None:
+        debut = time.perf_counter()
+        resultats_lots = [
+            scrap_data[position] if position is not None else None
+            for position, _ in jaccard_par_lots(tokens_officiels, [s["tokens"] for s in scrap_data], SEUIL)
+        ]
+        t_lots = time.perf_counter() - debut
+        differences = sum(1 for a, b in zip(resultats_exhaustifs, resultats_lots) if a is not b)
+        print(f" {'':15s} matrices creuses {t_lots * 1000:8.1f}ms | gain {t_exhaustif / t_lots:6.1f}x"
+              f" | différences {differences}")
+        if differences:
+            raise Exception(" jaccard_par_lots ne donne pas les mêmes appariements que la boucle exhaustive !")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--echelle", action="append",
+                        help="taille NxM (musées officiels x noms scrapés), répétable")
+    args = parser.parse_args()
+
+    echelles = args.echelle or ["130x140", "1200x1500", "4000x5000"]
+    print(" Jointure Jaccard (SEUIL = 0.4) : boucle exhaustive / index inversé / matrices creuses\n")
+    if appariement_noms.sparse is None:
+        print(" (NumPy / SciPy absents : mesure des matrices creuses ignorée)\n")
+    for echelle in echelles:
+        n, m = (int(x) for x in echelle.lower().split("x"))
+        mesurer(n, m)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,153 @@
+"""
+===========================================================
+BENCHMARK — NORMALISATION DU TEXTE DES RÉSUMÉS
+===========================================================
+Compare les fonctions historiques du script 2 (regex recompilées à chaque
+appel, un résumé à la fois) avec le module script/normalisation_texte.py
+(regex précompilées, nettoyage des résumés par lots).
+
+Corpus :
+- par défaut bench/donnees/paragraphes_musees.txt
+- ou les résumés réels du champ information_musee d'un GeoJSON des musées
+  (--geojson Musees_Paris_4326.geojson)
+
+Le script vérifie aussi que les deux versions donnent exactement le même texte.
+
+Utilisation (hors QGIS) :
+    python bench/bench_normalisation_texte.py --repetitions 200
+"""
+
+import argparse
+import json
+import os
+import re
+import sys
+import time
+
+DOSSIER_BENCH = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(DOSSIER_BENCH, "..", "script"))
+
+import normalisation_texte as nt
+
+
+# ---------------------------------------------------------
+#            VERSIONS HISTORIQUES (copie du script 2)
+
+def ancien_clean_text(txt):
+    if not txt:
+        return ""
+    txt = re.sub(r'\[\s*[\d\w\s\.-]+\s*\]', '', txt)
+    txt = re.sub(r'\s+', ' ', txt)
+    return txt.strip()
+
+
+def ancien_clean_summary_global(txt):
+    if not txt:
+        return txt
+    patterns = [
+        r"modifier\s*-\s*modifier le code\s*-\s*modifier wikidata",
+        r"\d+\s*m2\s*d'expositions permanentes",
+        r"\d+\s*m²\s*d'expositions permanentes"
+    ]
+    for pat in patterns:
+        txt = re.sub(pat, '', txt, flags=re.IGNORECASE)
+    txt = re.sub(r'\s+', ' ', txt).strip()
+    return txt
+
+
+def ancien_summarize_text(text, max_words=150):
+    if not text:
+        return None
+    sentences = re.split(r'(?<=[.!?]) +', text)
+    summary_words = []
+    word_count = 0
+    for s in sentences:
+        s_words = s.split()
+        if word_count + len(s_words) > max_words and word_count > 0:
+            break
+        summary_words.append(s)
+        word_count += len(s_words)
+    summary = " ".join(summary_words).strip()
+    if not summary.endswith("."):
+        summary += "."
+    return summary
+
+
+def ancien_keep_from_first_uppercase(text):
+    if not text:
+        return text
+    match = re.search(r'[A-ZÀ-ÖÙ-Ý]', text)
+    if match:
+        return text[match.start():].strip()
+    return text
+
+
+# ---------------------------------------------------------
+#            CORPUS
+
+def charger_corpus(chemin_txt, chemin_geojson=None):
+    if chemin_geojson:
+        with open(chemin_geojson, encoding="utf-8") as f:
+            data = json.load(f)
+        return [
+            feat["properties"]["information_musee"]
+            for feat in data["features"]
+            if feat["properties"].get("information_musee")
+        ]
+    with open(chemin_txt, encoding="utf-8") as f:
+        return [l.strip() for l in f if l.strip() and not l.startswith("#")]
+
+
+def chronometrer(fonction, repetitions):
+    debut = time.perf_counter()
+    for _ in range(repetitions):
+        resultat = fonction()
+    return time.perf_counter() - debut, resultat
+
+
+# ---------------------------------------------------------
+#            EXÉCUTION
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--corpus", default=os.path.join(DOSSIER_BENCH, "donnees", "paragraphes_musees.txt"))
+    parser.add_argument("--geojson", default=None, help="GeoJSON des musées avec le champ information_musee")
+    parser.add_argument("--repetitions", type=int, default=200)
+    args = parser.parse_args()
+
+    paragraphes = charger_corpus(args.corpus, args.geojson)
+    # Un "article" = 3 paragraphes consécutifs, comme après le parser principal
+    articles = [" ".join(paragraphes[i:i + 3]) for i in range(0, len(paragraphes), 3)]
+    print(f" Corpus : {len(paragraphes)} paragraphes, {len(articles)} articles, {args.repetitions} répétitions\n")
+
+    mesures = [
+        (
+            "clean_text (par paragraphe)",
+            lambda: [ancien_clean_text(p) for p in paragraphes],
+            lambda: [nt.clean_text(p) for p in paragraphes],
+        ),
+        (
+            "summarize_text (par article)",
+            lambda: [ancien_summarize_text(a) for a in articles],
+            lambda: [nt.summarize_text(a) for a in articles],
+        ),
+        (
+            "clean_summary_global + première majuscule",
+            lambda: [ancien_keep_from_first_uppercase(ancien_clean_summary_global(a)) for a in articles],
+            lambda: nt.nettoyer_resumes(articles),
+        ),
+    ]
+
+    print(f" {'étape':45s} {'historique':>12s} {'module':>12s} {'gain':>7s}")
+    for nom, ancien, nouveau in mesures:
+        t_ancien, r_ancien = chronometrer(ancien, args.repetitions)
+        t_nouveau, r_nouveau = chronometrer(nouveau, args.repetitions)
+        if r_ancien != r_nouveau:
+            raise Exception(f" Résultats différents pour l'étape : {nom}")
+        print(f" {nom:45s} {t_ancien * 1000:10.1f}ms {t_nouveau * 1000:10.1f}ms {t_ancien / t_nouveau:6.2f}x")
+
+    print("\n Résultats identiques entre les versions historique et module.")
+
+
+if __name__ == "__main__":
+    main()
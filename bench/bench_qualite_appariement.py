@@ -0,0 +1,209 @@
+"""
+===========================================================
+BENCHMARK — QUALITÉ ET DÉBIT DES STRATÉGIES D'APPARIEMENT
+===========================================================
+Mesure, pour chaque stratégie de la jointure du script 2, la qualité
+(précision / rappel par rapport à des paires étiquetées) et le coût
+(paires comparées par seconde, pic mémoire) :
+
+- jaccard mots (boucle)  : Jaccard sur les mots, boucle exhaustive historique
+- jaccard mots (lots)    : même score, jaccard_par_lots (matrices creuses / index)
+- url sous-chaîne        : URL du site du musée contenue dans le nom scrapé
+- difflib url (boucle)   : sous-chaîne, sinon ratio difflib URL / nom,
+                           boucle exhaustive historique
+- difflib url (floue)    : mêmes règles et même score, RechercheFloue
+- jointure complète      : enchaînement du script 2 (mots, puis URL pour les restants)
+
+Jeux de données :
+- bench/donnees/paires_musees_paris.csv : musées parisiens (nom officiel,
+  site web) étiquetés à la main avec le titre de leur entrée dans la liste
+  Wikipédia des musées de Paris (vide si le musée n'y figure pas) ; les
+  lignes sans nom officiel sont des entrées Wikipédia sans musée officiel
+- noms synthétiques (bench/donnees_synthetiques.py) à plus grande échelle
+
+Une prédiction est juste si elle désigne l'entrée Wikipédia attendue ;
+précision = justes / prédictions, rappel = justes / musées ayant une entrée.
+
+Utilisation (hors QGIS) :
+    python bench/bench_qualite_appariement.py
+    python bench/bench_qualite_appariement.py --echelle 1000x1200 --sans-boucles
+"""
+
+import argparse
+import csv
+import os
+import sys
+import time
+import tracemalloc
+from urllib.parse import quote
+
+DOSSIER_BENCH = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(DOSSIER_BENCH, "..", "script"))
+
+from appariement_noms import (
+    RechercheFloue, jaccard_par_lots, meilleur_match_exhaustif, meilleur_match_url_exhaustif, tokens_nom
+)
+from bench_jointure_index import preparer_scrap_data
+from donnees_synthetiques import generer
+
+SEUIL = 0.4
+
+
+# ---------------------------------------------------------
+#            JEUX DE DONNÉES
+
+def charger_paires_paris(chemin):
+    """Renvoie (officiels, scrapes, verite) comme donnees_synthetiques.generer."""
+    officiels, scrapes = [], []
+    attendus = []
+    with open(chemin, encoding="utf-8", newline="") as f:
+        for ligne in csv.DictReader(f):
+            titre = ligne["titre_wikipedia"]
+            if titre:
+                scrapes.append({
+                    "nom": titre,
+                    "url": "https://fr.wikipedia.org/wiki/" + quote(titre.replace(" ", "_")),
+                })
+            if ligne["nom_officiel"]:
+                officiels.append({"nom": ligne["nom_officiel"], "url": ligne["url_musee"]})
+                attendus.append(len(scrapes) - 1 if titre else None)
+    verite = {k: j for k, j in enumerate(attendus) if j is not None}
+    return officiels, scrapes, verite
+
+
+# ---------------------------------------------------------
+#            STRATÉGIES
+# Chacune renvoie {position officielle: position scrapée}
+
+def _positions(scrap_data):
+    return {id(s): j for j, s in enumerate(scrap_data)}
+
+
+def jaccard_boucle(officiels, scrap_data):
+    position = _positions(scrap_data)
+    resultat = {}
+    for k, o in enumerate(officiels):
+        match, score = meilleur_match_exhaustif(tokens_nom(o["nom"]), scrap_data)
+        if match and score >= SEUIL:
+            resultat[k] = position[id(match)]
+    return resultat
+
+
+def jaccard_lots(officiels, scrap_data):
+    resultats = jaccard_par_lots([tokens_nom(o["nom"]) for o in officiels], [s["tokens"] for s in scrap_data], SEUIL)
+    return {k: j for k, (j, _) in enumerate(resultats) if j is not None}
+
+
+def url_sous_chaine(officiels, scrap_data):
+    resultat = {}
+    for k, o in enumerate(officiels):
+        url = o["url"].lower().strip()
+        if not url:
+            continue
+        for j, s in enumerate(scrap_data):
+            if url in s["nom"]:
+                resultat[k] = j
+                break
+    return resultat
+
+
+def difflib_boucle(officiels, scrap_data):
+    # boucle historique de la deuxième passe : mêmes règles que RechercheFloue
+    # (sous-chaîne exacte = 1.0, sinon ratio difflib)
+    position = _positions(scrap_data)
+    resultat = {}
+    for k, o in enumerate(officiels):
+        match, score = meilleur_match_url_exhaustif(o["url"].lower().strip(), scrap_data)
+        if match is not None and score >= SEUIL:
+            resultat[k] = position[id(match)]
+    return resultat
+
+
+def difflib_floue(officiels, scrap_data):
+    # RechercheFloue applique aussi la règle de la sous-chaîne (score 1.0),
+    # comme la deuxième passe du script 2
+    position = _positions(scrap_data)
+    recherche = RechercheFloue(scrap_data)
+    resultat = {}
+    for k, o in enumerate(officiels):
+        match, _ = recherche.meilleur_match(o["url"].lower().strip(), SEUIL)
+        if match:
+            resultat[k] = position[id(match)]
+    return resultat
+
+
+def jointure_complete(officiels, scrap_data):
+    resultat = jaccard_lots(officiels, scrap_data)
+    position = _positions(scrap_data)
+    recherche = RechercheFloue(scrap_data)
+    for k, o in enumerate(officiels):
+        if k not in resultat:
+            match, _ = recherche.meilleur_match(o["url"].lower().strip(), SEUIL)
+            if match:
+                resultat[k] = position[id(match)]
+    return resultat
+
+
+STRATEGIES = [
+    ("jaccard mots (boucle)", jaccard_boucle, True),
+    ("jaccard mots (lots)", jaccard_lots, False),
+    ("url sous-chaîne", url_sous_chaine, False),
+    ("difflib url (boucle)", difflib_boucle, True),
+    ("difflib url (floue)", difflib_floue, False),
+    ("jointure complète", jointure_complete, False),
+]
+
+
+# ---------------------------------------------------------
+#            MESURES
+
+def precision_rappel(predictions, verite):
+    justes = sum(1 for k, j in predictions.items() if verite.get(k) == j)
+    precision = justes / len(predictions) if predictions else None
+    rappel = justes / len(verite) if verite else 1.0
+    return precision, rappel
+
+
+def mesurer(nom_jeu, officiels, scrapes, verite, avec_boucles):
+    scrap_data = preparer_scrap_data(scrapes)
+    nb_paires = len(officiels) * len(scrap_data)
+    print(f"\n {nom_jeu} : {len(officiels)} musées × {len(scrap_data)} noms scrapés,"
+          f" {len(verite)} appariements attendus")
+    print(f"   {'stratégie':24s} {'temps':>9s} {'paires/s':>12s} {'pic mémoire':>12s}"
+          f" {'précision':>10s} {'rappel':>8s}")
+
+    for nom, strategie, boucle in STRATEGIES:
+        if boucle and not avec_boucles:
+            continue
+        debut = time.perf_counter()
+        predictions = strategie(officiels, scrap_data)
+        duree = time.perf_counter() - debut
+
+        # deuxième exécution sous tracemalloc (qui ralentit le code) pour le pic mémoire
+        tracemalloc.start()
+        strategie(officiels, scrap_data)
+        _, pic = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+        precision, rappel = precision_rappel(predictions, verite)
+        texte_precision = f"{precision:.2%}" if precision is not None else "aucune"
+        print(f"   {nom:24s} {duree:8.3f}s {nb_paires / duree:12.0f} {pic / 2 ** 20:10.2f}Mo"
+              f" {texte_precision:>10s} {rappel:8.2%}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--paires", default=os.path.join(DOSSIER_BENCH, "donnees", "paires_musees_paris.csv"))
+    parser.add_argument("--echelle", action="append", help="taille NxM des noms synthétiques, répétable")
+    parser.add_argument("--sans-boucles", action="store_true",
+                        help="ne pas mesurer les boucles exhaustives (lentes à grande échelle)")
+    args = parser.parse_args()
+
+    mesurer("Paris (paires étiquetées)", *charger_paires_paris(args.paires), True)
+    for echelle in args.echelle or ["130x140", "400x500"]:
+        n, m = (int(x) for x in echelle.lower().split("x"))
+        mesurer(f"Synthétique {n}x{m}", *generer(n, m), not args.sans_boucles)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+"""
+===========================================================
+BENCHMARK — DEUXIÈME PASSE DE LA JOINTURE (URL → NOM SCRAPÉ)
+===========================================================
+Compare, pour la deuxième passe de la jointure du script 2 (URL du site du
+musée comparée aux noms scrapés, sous-chaîne exacte sinon difflib) :
+- la boucle exhaustive historique (SequenceMatcher contre toute la liste)
+- RechercheFloue (index des caractères donnant quick_ratio pour toutes les
+  entrées, LCS bit-parallèle bornée, puis ratio exact pour les entrées restantes)
+
+Toutes les URL des musées synthétiques sont cherchées (dans le script 2,
+seuls les musées sans correspondance par les noms passent par cette étape),
+et le script vérifie que les appariements retenus sont identiques.
+
+Utilisation (hors QGIS) :
+    python bench/bench_recherche_floue.py
+    python bench/bench_recherche_floue.py --echelle 2000x2500
+"""
+
+import argparse
+import os
+import sys
+import time
+
+DOSSIER_BENCH = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(DOSSIER_BENCH, "..", "script"))
+
+from appariement_noms import RechercheFloue, meilleur_match_url_exhaustif
+from bench_jointure_index import preparer_scrap_data
+from donnees_synthetiques import generer
+
+SEUIL = 0.4
+
+
+def mesurer(nb_officiels, nb_scrapes):
+    officiels, scrapes, _ = generer(nb_officiels, nb_scrapes)
+    scrap_data = preparer_scrap_data(scrapes)
+    urls = [o["url"].lower().strip() for o in officiels]
+
+    debut = time.perf_counter()
+    resultats_exhaustifs = []
+    for url in urls:
+        match, score = meilleur_match_url_exhaustif(url, scrap_data)
+        resultats_exhaustifs.append(match if match and score >= SEUIL else None)
+    t_exhaustif = time.perf_counter() - debut
+
+    debut = time.perf_counter()
+    recherche = RechercheFloue(scrap_data)
+    t_construction = time.perf_counter() - debut
+    resultats_flous = [recherche.meilleur_match(url, SEUIL)[0] for url in urls]
+    t_floue = time.perf_counter() - debut
+
+    differences = sum(1 for a, b in zip(resultats_exhaustifs, resultats_flous) if a is not b)
+    etapes = recherche.nb_etapes
+    print(f" {nb_officiels:>6d} × {nb_scrapes:<6d}"
+          f" exhaustif {t_exhaustif * 1000:9.1f}ms ({len(urls) * len(scrap_data):>9d} ratios difflib)"
+          f" | floue {t_floue * 1000:8.1f}ms dont construction {t_construction * 1000:6.1f}ms"
+          f" ({etapes['difflib']:>7d} ratios difflib)"
+          f" | gain {t_exhaustif / t_floue:6.1f}x | différences {differences}")
+    print(f"        entrées par étape : caractère commun {etapes['caracteres']},"
+          f" LCS {etapes['lcs']}, difflib {etapes['difflib']}")
+    if differences:
+        raise Exception(" RechercheFloue ne donne pas les mêmes appariements que la boucle exhaustive !")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--echelle", action="append",
+                        help="taille NxM (musées officiels x noms scrapés), répétable")
+    args = parser.parse_args()
+
+    echelles = args.echelle or ["130x140", "400x500", "1000x1200"]
+    print(f" Deuxième passe (SEUIL = {SEUIL}) : difflib exhaustif / recherche floue\n")
+    for echelle in echelles:
+        n, m = (int(x) for x in echelle.lower().split("x"))
+        mesurer(n, m)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,151 @@
+"""
+===========================================================
+BENCHMARK — CACHE LOCAL DES LOGOS DE LA MISE EN PAGE
+===========================================================
+Un serveur HTTP local (latence réglable) sert un logo SVG et un logo
+PNG synthétique de 2000 × 660 pixels, à la place de Wikimedia. Pour N
+mises en page, compare :
+- sans cache : les deux logos téléchargés à chaque mise en page (ce que
+  fait QGIS quand le chemin d'un QgsLayoutItemPicture est une URL)
+- CacheRessources : premier passage (téléchargement + vérification),
+  puis passages suivants servis depuis le dossier local
+Vérifie aussi qu'une page d'erreur HTML n'est pas gardée comme image,
+qu'une copie locale altérée (même taille) est retéléchargée et qu'un
+index.json illisible ne bloque pas le cache.
+La déclinaison en PNG au dpi de l'export demande PyQt5 (QGIS) : mesurée
+seulement s'il est installé.
+
+Utilisation (hors QGIS) :
+    python bench/bench_ressources_mise_en_page.py
+    python bench/bench_ressources_mise_en_page.py --mises-en-page 130 --latence 0.3
+"""
+
+import argparse
+import contextlib
+import io
+import os
+import struct
+import sys
+import tempfile
+import threading
+import time
+import zlib
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import requests
+
+DOSSIER_BENCH = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(DOSSIER_BENCH, "..", "script"))
+
+from ressources_mise_en_page import CacheRessources
+
+SVG = (b'<?xml version="1.0" encoding="UTF-8"?>\n<svg xmlns="http://www.w3.org/2000/svg" width="400" height="150">'
+       b'<rect width="400" height="150" fill="#003d7c"/><circle cx="75" cy="75" r="50" fill="#fff"/></svg>')
+HTML = b"<!DOCTYPE html><html><body><h1>Error</h1></body></html>"
+
+
+def png_synthetique(largeur, hauteur):
+    """PNG RVB en dégradé (sans bibliothèque d'image)."""
+    def bloc(nature, donnees):
+        return struct.pack(">I", len(donnees)) + nature + donnees + struct.pack(">I", zlib.crc32(nature + donnees))
+    lignes = b"".join(
+        b"\x00" + bytes(v for x in range(largeur) for v in (x * 255 // largeur, y * 255 // hauteur, 128))
+        for y in range(hauteur))
+    return (b"\x89PNG\r\n\x1a\n" + bloc(b"IHDR", struct.pack(">IIBBBBB", largeur, hauteur, 8, 2, 0, 0, 0))
+            + bloc(b"IDAT", zlib.compress(lignes, 6)) + bloc(b"IEND", b""))
+
+
+class ServeurImages(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, fichiers, latence):
+        super().__init__(("127.0.0.1", 0), GestionnaireImages)
+        self.fichiers = fichiers
+        self.latence = latence
+        self.requetes = 0
+
+
+class GestionnaireImages(BaseHTTPRequestHandler):
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        self.server.requetes += 1
+        time.sleep(self.server.latence)
+        contenu, type_contenu = self.server.fichiers.get(self.path, (HTML, "text/html"))
+        self.send_response(200)   # comme certains portails : page d'erreur servie en 200
+        self.send_header("Content-Type", type_contenu)
+        self.send_header("Content-Length", str(len(contenu)))
+        self.end_headers()
+        self.wfile.write(contenu)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--mises-en-page", type=int, default=30)
+    parser.add_argument("--latence", type=float, default=0.15, help="latence du serveur d'images (secondes)")
+    args = parser.parse_args()
+
+    png = png_synthetique(2000, 660)
+    serveur = ServeurImages({"/logo.svg": (SVG, "image/svg+xml"), "/logo.png": (png, "image/png")}, args.latence)
+    threading.Thread(target=serveur.serve_forever, daemon=True).start()
+    base = f"http://127.0.0.1:{serveur.server_address[1]}"
+    logos = [(base + "/logo.svg", 40, 15), (base + "/logo.png", 36.561, 12.023)]
+    print(f" {args.mises_en_page} mises en page, 2 logos (SVG {len(SVG)} o, PNG {len(png) / 1024:.0f} Ko),"
+          f" latence {args.latence} s")
+
+    session = requests.Session()
+    debut = time.perf_counter()
+    for _ in range(args.mises_en_page):
+        for url, _, _ in logos:
+            session.get(url, timeout=30).content
+    t_sans_cache = time.perf_counter() - debut
+    print(f" sans cache      : {t_sans_cache:7.2f} s ({serveur.requetes} requêtes)")
+
+    with tempfile.TemporaryDirectory() as dossier:
+        serveur.requetes = 0
+        ressources = CacheRessources(dossier)
+        debut = time.perf_counter()
+        for url, largeur, hauteur in logos:
+            ressources.image(url, largeur, hauteur, 300)
+        t_premier = time.perf_counter() - debut
+        debut = time.perf_counter()
+        for _ in range(args.mises_en_page - 1):
+            chemins = [ressources.image(url, largeur, hauteur, 300) for url, largeur, hauteur in logos]
+        t_suivants = time.perf_counter() - debut
+        par_mise_en_page = t_suivants / max(1, args.mises_en_page - 1)
+        print(f" CacheRessources : {t_premier + t_suivants:7.2f} s ({serveur.requetes} requêtes ;"
+              f" premier passage {t_premier * 1000:.0f} ms, puis {par_mise_en_page * 1000:.2f} ms par mise en page)")
+        print(f" Fichiers servis : {', '.join(os.path.basename(c) for c in chemins)}")
+
+        # nouvelle instance : l'index sur disque suffit, sans réseau
+        serveur.requetes = 0
+        CacheRessources(dossier).image(logos[0][0], 40, 15, 300)
+        print(f" Exécution suivante : {serveur.requetes} requête")
+
+        # copie locale altérée sans changer de taille : l'empreinte SHA-256 la rejette
+        chemin = ressources.local(logos[0][0])
+        with open(chemin, "r+b") as f:
+            f.seek(os.path.getsize(chemin) // 2)
+            f.write(b"\x00")
+        serveur.requetes = 0
+        with contextlib.redirect_stdout(io.StringIO()):
+            CacheRessources(dossier).local(logos[0][0])
+        print(f" Copie altérée (même taille) : {serveur.requetes} requête de retéléchargement")
+
+        # index.json illisible : cache repris à vide
+        with open(os.path.join(dossier, "index.json"), "w", encoding="utf-8") as f:
+            f.write("{tronqué")
+        serveur.requetes = 0
+        with contextlib.redirect_stdout(io.StringIO()):
+            CacheRessources(dossier).local(logos[0][0])
+        print(f" Index illisible : cache repris à vide ({serveur.requetes} requête)")
+
+        erreur = CacheRessources(dossier).image(base + "/absent.png", 40, 15, 300)
+        print(f" Page HTML refusée : {'oui' if erreur.startswith('http') else 'non'}")
+    serveur.shutdown()
+
+
+if __name__ == "__main__":
+    main()
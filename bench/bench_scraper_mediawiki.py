@@ -0,0 +1,100 @@
+"""
+===========================================================
+BENCHMARK — REJEU DES RÉPONSES ENREGISTRÉES DE L'API MEDIAWIKI
+===========================================================
+Fait tourner ScraperMediaWiki (backend "api" du script 2) sans réseau,
+sur le jeu de réponses enregistrées de bench/donnees/mediawiki/ :
+- un lot de 6 articles en deux réponses (suite "continue" des extraits),
+  avec un titre normalisé, une redirection, une page d'homonymie et une
+  page absente : résumés comparés aux résultats attendus
+- une boucle de redirections (A → B → A, réponse écrite à la main) :
+  le suivi des renvois doit s'arrêter
+- une URL jamais enregistrée : ReponseNonEnregistree doit donner la clé
+Durée du rejeu mesurée sur --repetitions passages.
+
+Utilisation (hors QGIS) :
+    python bench/bench_scraper_mediawiki.py
+    python bench/bench_scraper_mediawiki.py --enregistrer   # réenregistre le lot depuis fr.wikipedia.org
+"""
+
+import argparse
+import contextlib
+import io
+import os
+import sys
+import threading
+import time
+
+DOSSIER_BENCH = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(DOSSIER_BENCH, "..", "script"))
+
+from scraper_mediawiki import ReponseNonEnregistree, ScraperMediaWiki
+
+DOSSIER_REPONSES = os.path.join(DOSSIER_BENCH, "donnees", "mediawiki")
+
+WIKI = "https://fr.wikipedia.org/wiki/"
+# URL → début attendu du résumé (None : pas de résumé)
+ATTENDUS = {
+    WIKI + "Mus%C3%A9e_Carnavalet": "Le musée Carnavalet",
+    WIKI + "Mus%C3%A9e_du_Louvre": "Le musée du Louvre",
+    WIKI + "Mus%C3%A9e_Picasso": "Le musée national Picasso-Paris",          # redirection
+    WIKI + "mus%C3%A9e_Cognacq-Jay": "Le musée Cognacq-Jay",                  # titre normalisé
+    WIKI + "Mus%C3%A9e_de_la_Chasse": None,                                   # homonymie
+    WIKI + "Mus%C3%A9e_imaginaire_de_Paris": None,                            # page absente
+}
+URLS_BOUCLE = [WIKI + "Renvoi_A"]
+URL_ABSENTE = WIKI + "Mus%C3%A9e_jamais_enregistr%C3%A9"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repetitions", type=int, default=200)
+    parser.add_argument("--enregistrer", action="store_true",
+                        help="interroge fr.wikipedia.org et réécrit les réponses du lot de 6 articles")
+    args = parser.parse_args()
+
+    if args.enregistrer:
+        scraper = ScraperMediaWiki(dossier_enregistrement=DOSSIER_REPONSES)
+        scraper.resumes(list(ATTENDUS))
+        print(f" {scraper.nb_requetes} réponses enregistrées dans {DOSSIER_REPONSES}")
+        return
+
+    scraper = ScraperMediaWiki(dossier_rejeu=DOSSIER_REPONSES)
+    resumes = scraper.resumes(list(ATTENDUS))
+    erreurs = 0
+    for url, attendu in ATTENDUS.items():
+        resume = resumes.get(url)
+        ok = resume is None if attendu is None else bool(resume) and resume.startswith(attendu)
+        erreurs += not ok
+        apercu = "aucun résumé" if resume is None else resume[:60] + "…"
+        print(f" {'ok ' if ok else 'ERR'} {ScraperMediaWiki.titre_depuis_url(url):<28s} {apercu}")
+
+    # boucle de redirections : le rejeu doit se terminer (délai de garde de 5 s)
+    resultat = {}
+    fil = threading.Thread(target=lambda: resultat.update(ScraperMediaWiki(dossier_rejeu=DOSSIER_REPONSES)
+                                                          .resumes(URLS_BOUCLE)), daemon=True)
+    fil.start()
+    fil.join(5)
+    boucle_ok = not fil.is_alive() and resultat.get(URLS_BOUCLE[0]) is None
+    erreurs += not boucle_ok
+    print(f" {'ok ' if boucle_ok else 'ERR'} Boucle de redirections A → B → A arrêtée")
+
+    try:
+        ScraperMediaWiki(dossier_rejeu=DOSSIER_REPONSES).resumes([URL_ABSENTE])
+        erreurs += 1
+        print(" ERR Requête absente du rejeu : aucune erreur levée")
+    except ReponseNonEnregistree as erreur:
+        print(f" ok  Requête absente du rejeu : {erreur}")
+
+    debut = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        for _ in range(args.repetitions):
+            ScraperMediaWiki(dossier_rejeu=DOSSIER_REPONSES).resumes(list(ATTENDUS))
+    duree = (time.perf_counter() - debut) / args.repetitions
+    print(f" Rejeu du lot : {duree * 1000:.2f} ms ({scraper.nb_requetes} requête réseau)")
+    print(f" {erreurs} écart(s) avec les résultats attendus")
+    sys.exit(1 if erreurs else 0)
+
+
+if __name__ == "__main__":
+    main()
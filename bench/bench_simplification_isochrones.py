@@ -0,0 +1,121 @@
+"""
+===========================================================
+BENCHMARK — SIMPLIFICATION ET QUANTIFICATION DES ISOCHRONES
+===========================================================
+Mesure, pour plusieurs tolérances de simplification :
+- le nombre de sommets, la taille du GeoJSON et du format binaire compact
+- le temps de simplification
+- le coût du test « gare dans le polygone 10 min » (lancer de rayon sur
+  les 995 gares de Gares_4326.gpkg, comme intersects() dans
+  run_symbology_gares) et les gares qui changent de côté
+- l'écart de surface avec le polygone d'origine (si shapely est installé)
+
+Jeux d'isochrones :
+- isochrones/Isochrones_M0363.geojson (réponse ORS réelle)
+- isochrones du moteur local (isochrones_locaux) sur une grille de rues
+  synthétique de 6 km de côté, aux positions de musées tirées au hasard
+  (contours beaucoup plus détaillés ; nécessite shapely)
+
+Utilisation (hors QGIS) :
+    python bench/bench_simplification_isochrones.py
+"""
+
+import json
+import os
+import sys
+import tempfile
+import time
+
+DOSSIER_BENCH = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(DOSSIER_BENCH, "..", "script"))
+
+from bench_boucle_isochrones import charger_gares, point_dans_anneau
+from simplification_isochrones import encoder_binaire, nombre_sommets, simplifier_isochrones
+
+try:
+    from shapely.geometry import shape
+except ImportError:
+    shape = None
+
+FICHIER_ORS = os.path.join(DOSSIER_BENCH, "..", "isochrones", "Isochrones_M0363.geojson")
+TOLERANCES_M = [0, 2, 5, 10, 20]
+DECIMALES = 5
+
+
+def grille_rues(chemin, lon0=2.30, lat0=48.83, nb=60, pas_m=100.0):
+    """Écrit un GeoJSON de rues en grille (nb × nb croisements espacés de pas_m)."""
+    pas_lat = pas_m / 111320.0
+    pas_lon = pas_m / (111320.0 * 0.6578)     # cos(48,85°)
+    features = []
+    for i in range(nb):
+        colonne = [[lon0 + i * pas_lon, lat0 + j * pas_lat] for j in range(nb)]
+        ligne = [[lon0 + j * pas_lon, lat0 + i * pas_lat] for j in range(nb)]
+        for coordonnees in (colonne, ligne):
+            features.append({"type": "Feature", "properties": {"highway": "residential"},
+                             "geometry": {"type": "LineString", "coordinates": coordonnees}})
+    with open(chemin, "w", encoding="utf-8") as f:
+        json.dump({"type": "FeatureCollection", "features": features}, f)
+
+
+def isochrones_locales(nb_musees=20):
+    from isochrones_locaux import MoteurIsochrones
+    import random
+    with tempfile.TemporaryDirectory() as dossier:
+        chemin = os.path.join(dossier, "grille.geojson")
+        grille_rues(chemin)
+        moteur = MoteurIsochrones.depuis_fichier(chemin)
+    rng = random.Random(0)
+    return [moteur.isochrones(rng.uniform(2.32, 2.36), rng.uniform(48.845, 48.865)) for _ in range(nb_musees)]
+
+
+def anneau_10_min(iso_data):
+    feature = next(f for f in iso_data["features"] if f["properties"]["value"] == 600)
+    geometrie = feature["geometry"]
+    return geometrie["coordinates"][0] if geometrie["type"] == "Polygon" else geometrie["coordinates"][0][0]
+
+
+def mesurer(nom, collections, gares):
+    print(f"\n {nom} ({len(collections)} collection(s))")
+    print(f" {'tolérance':>9s} {'sommets':>8s} {'GeoJSON':>9s} {'binaire':>8s} {'simplif.':>9s}"
+          f" {'gares':>8s} {'changées':>8s} {'surface':>8s}")
+    reference = None
+    for tolerance in TOLERANCES_M:
+        debut = time.perf_counter()
+        if tolerance:
+            resultats = [simplifier_isochrones(c, tolerance, DECIMALES) for c in collections]
+        else:
+            resultats = collections
+        t_simplification = time.perf_counter() - debut
+
+        debut = time.perf_counter()
+        dedans = [[point_dans_anneau(x, y, anneau_10_min(c)) for x, y in gares] for c in resultats]
+        t_gares = time.perf_counter() - debut
+        if reference is None:
+            reference = dedans
+        changees = sum(a != b for ref, res in zip(reference, dedans) for a, b in zip(ref, res))
+
+        ecart = "-"
+        if shape is not None:
+            ecarts = [shape(a["geometry"]).symmetric_difference(shape(b["geometry"])).area / shape(a["geometry"]).area
+                      for c, r in zip(collections, resultats) for a, b in zip(c["features"], r["features"])]
+            ecart = f"{100 * max(ecarts):.2f}%"
+
+        print(f" {tolerance:>7g} m {sum(nombre_sommets(c) for c in resultats):>8d}"
+              f" {sum(len(json.dumps(c)) for c in resultats) / 1024:7.1f}Ko"
+              f" {sum(len(encoder_binaire(c, DECIMALES)) for c in resultats) / 1024:6.1f}Ko"
+              f" {t_simplification * 1000:7.1f}ms {t_gares * 1000:6.1f}ms {changees:>8d} {ecart:>8s}")
+
+
+def main():
+    gares = charger_gares()
+    with open(FICHIER_ORS, encoding="utf-8") as f:
+        mesurer("Réponse ORS (M0363)", [json.load(f)], gares)
+    if shape is None:
+        print("\n shapely absent : isochrones du moteur local non mesurés.")
+        return
+    mesurer("Moteur local, grille 6 km", isochrones_locales(), gares)
+    print("\n surface : écart maximal (différence symétrique / surface d'origine) ; changées : gares dedans/dehors")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+"""
+===========================================================
+BENCH — GÉNÉRATION DE NOMS DE MUSÉES SYNTHÉTIQUES
+===========================================================
+Produit des jeux (noms officiels, noms scrapés) de taille quelconque pour
+mesurer la jointure à l'échelle de Paris (~130 × ~140) ou de la France
+(plusieurs milliers × plusieurs milliers).
+
+Les noms imitent ceux des deux sources :
+- nom officiel (open data) : forme longue, "Musée Carnavalet - Histoire de Paris"
+- nom scrapé (Wikipédia)   : forme courte, "Musée Carnavalet"
+Chaque musée officiel a un vrai correspondant scrapé (forme courte de son
+nom), les autres noms scrapés servent de leurres. Le tirage est reproductible.
+"""
+
+import random
+
+
+THEMES = [
+    "art", "arts décoratifs", "histoire", "beaux-arts", "art moderne", "archéologie",
+    "sciences naturelles", "marine", "poste", "musique", "cinéma", "photographie",
+    "préhistoire", "vie romantique", "armée", "minéralogie", "arts asiatiques",
+    "arts forains", "chasse et de la nature", "libération", "mode", "design",
+    "histoire naturelle", "arts et métiers", "résistance", "céramique", "vin",
+    "automobile", "aviation", "jouet", "verre", "tapisserie", "imprimerie",
+]
+
+SYLLABES = [
+    "car", "na", "va", "let", "mar", "mot", "tan", "ro", "din", "bour", "del", "le",
+    "zad", "kine", "cer", "nus", "chi", "co", "gnac", "jay", "gui", "met", "dap", "per",
+    "mail", "lol", "pi", "cas", "so", "mo", "reau", "gus", "ta", "ve", "lou", "vre",
+    "or", "say", "bran", "ly", "cha", "pe", "sa", "vil", "la", "ri", "ber", "mon",
+]
+
+VILLES = [
+    "Paris", "Lyon", "Marseille", "Lille", "Nantes", "Rennes", "Bordeaux", "Toulouse",
+    "Strasbourg", "Dijon", "Rouen", "Nice", "Grenoble", "Orléans", "Tours", "Amiens",
+    "Limoges", "Nancy", "Metz", "Reims", "Brest", "Caen", "Besançon", "Angers",
+]
+
+
+def _nom_propre(rng):
+    return "".join(rng.choice(SYLLABES) for _ in range(rng.randint(2, 3))).capitalize()
+
+
+def _paire(rng, propre):
+    """
+    Renvoie (nom officiel, nom scrapé) d'un même musée : le nom Wikipédia
+    est une forme courte ou légèrement réécrite du nom officiel.
+    """
+    theme = rng.choice(THEMES)
+    ville = rng.choice(VILLES)
+    forme = rng.randint(0, 4)
+    if forme == 0:
+        return f"Musée {propre} - {theme.capitalize()}", f"Musée {propre}"
+    if forme == 1:
+        return f"Musée national {propre}", rng.choice([f"Musée national {propre}", f"Musée {propre}"])
+    if forme == 2:
+        return f"Musée d'{theme} {propre}", rng.choice([f"Musée d'{theme} {propre}", f"Musée {propre}"])
+    if forme == 3:
+        return f"Maison de {propre} - musée", f"Maison de {propre}"
+    return f"Musée {propre} de {ville}", rng.choice([f"Musée {propre} ({ville})", f"Musée {propre}"])
+
+
+def generer(nb_officiels, nb_scrapes, graine=0):
+    """
+    Renvoie (officiels, scrapes, verite) :
+    - officiels : liste de {"nom", "url"} (url = site du musée)
+    - scrapes   : liste de {"nom", "url"} (url = article Wikipédia)
+    - verite    : {position officielle: position scrapée attendue}
+    """
+    rng = random.Random(graine)
+    propres = set()
+    while len(propres) < nb_officiels + nb_scrapes:
+        propres.add(_nom_propre(rng))
+    propres = sorted(propres)
+    rng.shuffle(propres)
+
+    officiels = []
+    scrapes = []
+    verite = {}
+    nb_vrais = min(nb_officiels, nb_scrapes)
+
+    for i in range(nb_officiels):
+        propre = propres[i]
+        nom, nom_scrape = _paire(rng, propre)
+        officiels.append({"nom": nom, "url": f"www.musee-{propre.lower()}.fr"})
+        if i < nb_vrais:
+            verite[i] = len(scrapes)
+            scrapes.append({
+                "nom": nom_scrape,
+                "url": f"https://fr.wikipedia.org/wiki/Mus%C3%A9e_{propre}",
+            })
+
+    # Leurres : musées présents dans la liste Wikipédia mais pas dans l'open data
+    for propre in propres[nb_officiels:nb_officiels + nb_scrapes - nb_vrais]:
+        scrapes.append({
+            "nom": _paire(rng, propre)[1],
+            "url": f"https://fr.wikipedia.org/wiki/Mus%C3%A9e_{propre}",
+        })
+
+    # La liste Wikipédia est dans un ordre sans rapport avec l'open data
+    ordre = list(range(len(scrapes)))
+    rng.shuffle(ordre)
+    nouvelle_position = {ancienne: nouvelle for nouvelle, ancienne in enumerate(ordre)}
+    scrapes = [scrapes[i] for i in ordre]
+    verite = {i: nouvelle_position[j] for i, j in verite.items()}
+    return officiels, scrapes, verite
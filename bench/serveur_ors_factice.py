@@ -0,0 +1,231 @@
+"""
+===========================================================
+BENCH — SERVEUR OPENROUTESERVICE FACTICE (ISOCHRONES)
+===========================================================
+Serveur HTTP local qui répond comme /v2/isochrones/{profil} d'ORS, pour
+faire tourner client_ors et la boucle des musées sans clé ni réseau :
+- mêmes entrée (locations, range, units…) et sortie (FeatureCollection,
+  propriétés group_index / value / center, bbox)
+- polygones synthétiques déterministes : un anneau de 24 sommets par
+  point et par valeur, de rayon vitesse du profil × temps (5 km/h à pied,
+  15 km/h à vélo, 30 km/h en voiture) ou la distance demandée,
+  déformé d'un musée à l'autre mais identique d'un appel à l'autre
+- latence réglable (fixe + gigue), erreurs 503 injectées au hasard,
+  quota par fenêtre glissante (réponse 429 + Retry-After) et quota total
+  annoncé dans x-ratelimit-remaining
+
+Utilisation (hors QGIS) :
+    python bench/serveur_ors_factice.py --port 8080 --latence 0.3 --taux-erreur 0.05 --quota 20
+puis, dans Traitement_boucle : ORS_URL = "http://127.0.0.1:8080/v2/isochrones/foot-walking"
+
+Depuis un autre script :
+    from serveur_ors_factice import demarrer
+    serveur, url_base = demarrer(latence=0.2)
+    ...
+    serveur.shutdown()
+"""
+
+import argparse
+import collections
+import hashlib
+import json
+import math
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Vitesses (m/s) selon le début du nom de profil ORS
+VITESSES_PROFILS = {"foot": 5.0 / 3.6, "wheelchair": 4.0 / 3.6, "cycling": 15.0 / 3.6, "driving": 30.0 / 3.6}
+NB_SOMMETS = 24
+MAX_LOCATIONS = 5
+MAX_RANGES = 10
+METRES_PAR_DEGRE = 111320.0
+
+
+def _deformation(lon, lat, k):
+    """Facteur de rayon du sommet k, propre au point (entre 0.7 et 1.0)."""
+    graine = f"{lon:.6f},{lat:.6f},{k}".encode("utf-8")
+    return 0.7 + 0.3 * int.from_bytes(hashlib.sha1(graine).digest()[:4], "big") / 0xFFFFFFFF
+
+
+def polygone_isochrone(lon, lat, rayon_m):
+    """Anneau fermé [[lon, lat], ...] autour du point (les anneaux d'un même point sont emboîtés)."""
+    anneau = []
+    for k in range(NB_SOMMETS):
+        angle = 2 * math.pi * k / NB_SOMMETS
+        r = rayon_m * _deformation(lon, lat, k)
+        anneau.append([
+            round(lon + r * math.cos(angle) / (METRES_PAR_DEGRE * math.cos(math.radians(lat))), 6),
+            round(lat + r * math.sin(angle) / METRES_PAR_DEGRE, 6),
+        ])
+    anneau.append(anneau[0])
+    return anneau
+
+
+def reponse_isochrones(requete, profil="foot-walking"):
+    """FeatureCollection ORS pour une requête déjà validée."""
+    vitesse = VITESSES_PROFILS.get(profil.split("-")[0], VITESSES_PROFILS["foot"])
+    distance = requete.get("range_type", "time") == "distance"
+    facteur = {"m": 1.0, "km": 1000.0, "mi": 1609.344}.get(requete.get("units", "m"), 1.0)
+    features = []
+    for groupe, (lon, lat) in enumerate(requete["locations"]):
+        for valeur in sorted(requete["range"]):
+            rayon = valeur * facteur if distance else valeur * vitesse
+            features.append({
+                "type": "Feature",
+                "properties": {"group_index": groupe, "value": float(valeur), "center": [lon, lat]},
+                "geometry": {"type": "Polygon", "coordinates": [polygone_isochrone(lon, lat, rayon)]},
+            })
+    tous = [p for f in features for p in f["geometry"]["coordinates"][0]]
+    bbox = [min(p[0] for p in tous), min(p[1] for p in tous), max(p[0] for p in tous), max(p[1] for p in tous)]
+    return {
+        "type": "FeatureCollection",
+        "bbox": bbox,
+        "features": features,
+        "metadata": {"service": "isochrones", "query": requete, "engine": {"version": "factice"}},
+    }
+
+
+def erreur_requete(requete):
+    """Message d'erreur ORS (code 400) si la requête est invalide, sinon None."""
+    locations = requete.get("locations")
+    if not isinstance(locations, list) or not locations:
+        return "Parameter 'locations' is missing."
+    if len(locations) > MAX_LOCATIONS:
+        return f"Request parameters exceed the server configuration limits. Only {MAX_LOCATIONS} locations allowed."
+    if any(not isinstance(p, list) or len(p) != 2 for p in locations):
+        return "Parameter 'locations' has incorrect value or format."
+    ranges = requete.get("range")
+    if not isinstance(ranges, list) or not ranges or len(ranges) > MAX_RANGES:
+        return "Parameter 'range' has incorrect value or format."
+    return None
+
+
+class ServeurORSFactice(ThreadingHTTPServer):
+    """Serveur et réglages partagés par les threads de requête ; compte ce qu'il a répondu."""
+
+    daemon_threads = True
+
+    def __init__(self, adresse, latence=0.0, gigue=0.0, taux_erreur=0.0, quota=None, fenetre=60.0,
+                 quota_total=None, graine=0):
+        super().__init__(adresse, GestionnaireORS)
+        self.latence = latence
+        self.gigue = gigue
+        self.taux_erreur = taux_erreur
+        self.quota = quota              # requêtes admises par fenêtre glissante
+        self.fenetre = fenetre          # durée de la fenêtre (60 s sur ORS)
+        self.quota_total = quota_total  # équivalent du quota journalier
+        self.rng = random.Random(graine)
+        self.verrou = threading.Lock()
+        self.envois = collections.deque()
+        self.compteurs = collections.Counter()
+
+    def admettre(self):
+        """None si la requête passe le quota, sinon le délai Retry-After (secondes)."""
+        with self.verrou:
+            maintenant = time.monotonic()
+            while self.envois and maintenant - self.envois[0] >= self.fenetre:
+                self.envois.popleft()
+            if self.quota is not None and len(self.envois) >= self.quota:
+                return max(1, math.ceil(self.envois[0] + self.fenetre - maintenant))
+            self.envois.append(maintenant)
+            return None
+
+    def tirage(self):
+        with self.verrou:
+            return self.rng.random()
+
+
+class GestionnaireORS(BaseHTTPRequestHandler):
+
+    def log_message(self, format, *args):
+        pass
+
+    def _repondre(self, code, corps, entetes=None):
+        donnees = json.dumps(corps).encode("utf-8")
+        self.send_response(code)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(donnees)))
+        for nom, valeur in (entetes or {}).items():
+            self.send_header(nom, str(valeur))
+        self.end_headers()
+        self.wfile.write(donnees)
+        with self.server.verrou:
+            self.server.compteurs[code] += 1
+
+    def do_POST(self):
+        serveur = self.server
+        taille = int(self.headers.get("Content-Length", 0))
+        corps = self.rfile.read(taille)
+
+        if not self.path.rstrip("/").startswith("/v2/isochrones/"):
+            return self._repondre(404, {"error": "Not found"})
+        if not self.headers.get("Authorization"):
+            return self._repondre(403, {"error": "Access to this API has been disallowed"})
+
+        retry_after = serveur.admettre()
+        if retry_after is not None:
+            return self._repondre(429, {"error": "Rate limit exceeded"}, {"Retry-After": retry_after})
+
+        with serveur.verrou:
+            epuise = serveur.quota_total is not None and serveur.compteurs["admises"] >= serveur.quota_total
+            if not epuise:
+                serveur.compteurs["admises"] += 1
+                restant = None if serveur.quota_total is None else serveur.quota_total - serveur.compteurs["admises"]
+        if epuise:
+            return self._repondre(403, {"error": "Quota exceeded"})
+
+        delai = serveur.latence + serveur.gigue * serveur.tirage()
+        if delai > 0:
+            time.sleep(delai)
+
+        if serveur.tirage() < serveur.taux_erreur:
+            return self._repondre(503, {"error": "Service temporarily unavailable"})
+
+        try:
+            requete = json.loads(corps)
+        except ValueError:
+            return self._repondre(400, {"error": {"code": 3000, "message": "Unable to parse JSON request."}})
+        message = erreur_requete(requete)
+        if message:
+            return self._repondre(400, {"error": {"code": 3004, "message": message}})
+
+        entetes = {}
+        if restant is not None:
+            entetes = {"x-ratelimit-limit": serveur.quota_total, "x-ratelimit-remaining": restant}
+        profil = self.path.rstrip("/").rsplit("/", 1)[-1]
+        self._repondre(200, reponse_isochrones(requete, profil), entetes)
+
+
+def demarrer(port=0, **reglages):
+    """Lance le serveur dans un thread ; renvoie (serveur, url de base "http://127.0.0.1:port")."""
+    serveur = ServeurORSFactice(("127.0.0.1", port), **reglages)
+    threading.Thread(target=serveur.serve_forever, daemon=True).start()
+    return serveur, f"http://127.0.0.1:{serveur.server_address[1]}"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--port", type=int, default=8080)
+    parser.add_argument("--latence", type=float, default=0.0, help="secondes par requête")
+    parser.add_argument("--gigue", type=float, default=0.0, help="latence aléatoire ajoutée (secondes)")
+    parser.add_argument("--taux-erreur", type=float, default=0.0, help="part des requêtes en erreur 503")
+    parser.add_argument("--quota", type=int, default=None, help="requêtes par fenêtre (429 au-delà)")
+    parser.add_argument("--fenetre", type=float, default=60.0, help="durée de la fenêtre du quota (secondes)")
+    parser.add_argument("--quota-total", type=int, default=None, help="quota journalier annoncé")
+    args = parser.parse_args()
+
+    serveur = ServeurORSFactice(("127.0.0.1", args.port), latence=args.latence, gigue=args.gigue,
+                                taux_erreur=args.taux_erreur, quota=args.quota, fenetre=args.fenetre,
+                                quota_total=args.quota_total)
+    print(f" Serveur ORS factice : http://127.0.0.1:{args.port}/v2/isochrones/foot-walking (Ctrl+C pour arrêter)")
+    try:
+        serveur.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    print(f" Réponses : {dict(serveur.compteurs)}")
+
+
+if __name__ == "__main__":
+    main()
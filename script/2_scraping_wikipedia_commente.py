@@ -141,7 +141,15 @@ else:
 from PyQt5.QtCore import QVariant
 from qgis.core import QgsField, QgsProject
 import re
-import difflib
+import sys
+
+# Fonctions d'appariement rangées dans le module script/appariement_noms.py
+dossier_scripts = os.path.join(monCheminDeBase, "script")
+if dossier_scripts not in sys.path:
+    sys.path.append(dossier_scripts)
+
+from appariement_noms import BlocageLSH, RechercheFloue, jaccard_par_lots, meilleur_match_exhaustif, tokens_nom
+from table_passage import TablePassage
 
 # Récupération des couches
 layer_musees = QgsProject.instance().mapLayersByName("Musees_Paris_4326")[0]
@@ -157,7 +165,7 @@ for f in layer_csv.getFeatures():
     if nom_scrap:
         scrap_data.append({
             "nom": nom_scrap.lower().strip(),
-            "tokens": set(re.findall(r'\w+', nom_scrap.lower())),
+            "tokens": tokens_nom(nom_scrap),          # mots sans accents ni mots vides
             "url_original": url_scrap_original,     # URL CONSERVÉE
             "url_clean": url_scrap_clean            # version pour comparaison
         })
@@ -178,65 +186,94 @@ idx_url = layer_musees.fields().indexOf("scrap_url")
 #de mots et du champ d'url contenu dans la couche des musées qui redirige vers le site web du musée et non vers wikipedia
 
 # Première passe : comparaison des noms
+# Tous les musées sont comparés d'un coup à la liste du CSV (jaccard_par_lots :
+# produit de matrices creuses mots × noms avec NumPy / SciPy, sinon index
+# inversé mot → entrées du CSV), au lieu d'une boucle musée par musée
+# Pour de très grandes listes (échelle nationale), MODE_BLOCAGE = "lsh" :
+# un blocage MinHash/LSH propose pour chaque musée quelques dizaines d'entrées
+# candidates (noms ou URL proches), et les deux passes ne comparent que celles-ci
 SEUIL = 0.4
-features_sans_match = []
+MODE_BLOCAGE = "index"   # "index" (exact) ou "lsh" (approché, grands volumes)
 
+# Table de passage : le résultat de la jointure est conservé par
+# identifiant_museofile dans un JSON, et seuls les musées nouveaux, renommés
+# ou concernés par un ajout dans la liste Wikipédia sont recalculés
+table_passage = TablePassage(os.path.join(monCheminDeBase, "table_passage_musees_wikipedia.json"))
+table_passage.preparer(scrap_data)
+changements = {}
+
+features_sans_match = []
+features_avec_nom = []
+identifiants_couche = set()
 for feat in layer_musees.getFeatures():
-    nom_sig = feat["nom_officiel_du_musee"]
-    if not nom_sig:
+    identifiants_couche.add(feat["identifiant_museofile"])
+    entree = table_passage.reutilisable(
+        feat["identifiant_museofile"], feat["nom_officiel_du_musee"], feat["url"], SEUIL)
+    if entree is not None:
+        if entree["scrap_url"]:
+            changements[feat.id()] = {idx_nom: entree["scrap_nom"], idx_url: entree["scrap_url"]}
+    elif feat["nom_officiel_du_musee"]:
+        features_avec_nom.append(feat)
+    else:
         features_sans_match.append(feat)
-        continue
 
-    tokens_sig = set(re.findall(r'\w+', nom_sig.lower()))
-    meilleur_match = None
-    meilleur_score = 0
+tokens_musees = [tokens_nom(feat["nom_officiel_du_musee"]) for feat in features_avec_nom]
+candidats_lsh = {}
 
-    for s in scrap_data:
-        inter = tokens_sig & s["tokens"]
-        union = tokens_sig | s["tokens"]
-        score_token = len(inter) / len(union) if union else 0
-
-        if score_token > meilleur_score:
-            meilleur_score = score_token
-            meilleur_match = s
+if MODE_BLOCAGE == "lsh":
+    blocage_lsh = BlocageLSH().indexer(scrap_data)
+    resultats_noms = []
+    for feat, tokens_sig in zip(features_avec_nom, tokens_musees):
+        candidats_lsh[feat.id()] = blocage_lsh.candidats_musee(feat["nom_officiel_du_musee"], feat["url"])
+        resultats_noms.append(meilleur_match_exhaustif(
+            tokens_sig, [scrap_data[i] for i in candidats_lsh[feat.id()]]))
+else:
+    resultats_noms = [
+        (scrap_data[position] if position is not None else None, score)
+        for position, score in jaccard_par_lots(tokens_musees, [s["tokens"] for s in scrap_data], SEUIL)
+    ]
 
+for feat, (meilleur_match, meilleur_score) in zip(features_avec_nom, resultats_noms):
     if meilleur_match and meilleur_score >= SEUIL:
         # ICI : on copie l’URL EXACTE
-        attrs = {
+        changements[feat.id()] = {
             idx_nom: meilleur_match["nom"],
             idx_url: meilleur_match["url_original"]
         }
-        prov.changeAttributeValues({feat.id(): attrs})
+        table_passage.enregistrer(feat["identifiant_museofile"], feat["nom_officiel_du_musee"], feat["url"],
+                                  meilleur_match, meilleur_score, "noms")
     else:
         features_sans_match.append(feat)
 
 # Deuxième passe : URL SIG → nom CSV
+# Même règle qu'avant (sous-chaîne exacte, sinon ratio difflib), mais
+# RechercheFloue écarte la plupart des noms par des bornes du ratio avant
+# de lancer difflib : le résultat est identique au-dessus du seuil
+recherche_floue = RechercheFloue(scrap_data)
+
 for feat in features_sans_match:
     url_sig = feat["url"]
     url_sig_clean = url_sig.lower().strip() if url_sig else ""
 
-    meilleur_match = None
-    meilleur_score = 0
-
-    for s in scrap_data:
-
-        # Match exact substring (version clean)
-        score_url = 1.0 if url_sig_clean and url_sig_clean in s["nom"] else 0
-
-        if score_url == 0:
-            score_url = difflib.SequenceMatcher(None, url_sig_clean, s["nom"]).ratio()
-
-        if score_url > meilleur_score:
-            meilleur_score = score_url
-            meilleur_match = s
+    # Blocage LSH : un musée sans candidats (sans nom utilisable) n'a pas de
+    # correspondance, au lieu d'être comparé à toute la liste
+    positions = candidats_lsh.get(feat.id(), []) if MODE_BLOCAGE == "lsh" else None
+    meilleur_match, meilleur_score = recherche_floue.meilleur_match(url_sig_clean, 0.4, positions)
 
     if meilleur_match and meilleur_score >= 0.4:
         # COPIE EXACTE DE L’URL DU CSV
-        attrs = {
+        changements[feat.id()] = {
             idx_nom: meilleur_match["nom"],
             idx_url: meilleur_match["url_original"]
         }
-        prov.changeAttributeValues({feat.id(): attrs})
+    else:
+        meilleur_match = None
+    table_passage.enregistrer(feat["identifiant_museofile"], feat["nom_officiel_du_musee"], feat["url"],
+                              meilleur_match, meilleur_score, "url")
+
+prov.changeAttributeValues(changements)
+table_passage.sauvegarder(identifiants_couche)   # musées retirés de la couche : retirés de la table
+print(f" Table de passage : {table_passage.nb_repris} musées repris, {table_passage.nb_calcules} recalculés")
 
 layer_musees.commitChanges()
 
@@ -249,21 +286,28 @@ print(" Jointure renforcée terminée — URLs copiées sans modification !")
 from html.parser import HTMLParser
 import requests
 import re
+import sys
 from qgis.PyQt.QtCore import QVariant
 
 # ----------------- Nettoyage texte -----------------
-def clean_text(txt):
-    if not txt:
-        return ""
-    txt = re.sub(r'\[\s*[\d\w\s\.-]+\s*\]', '', txt)  # supprime [1], [réf]
-    txt = re.sub(r'\s+', ' ', txt)
-    return txt.strip()
+# Les fonctions de nettoyage (regex précompilées, traitement par lots) sont
+# dans le module script/normalisation_texte.py
+dossier_scripts = os.path.join(monCheminDeBase, "script")
+if dossier_scripts not in sys.path:
+    sys.path.append(dossier_scripts)
+
+from normalisation_texte import (
+    clean_text, clean_summary_global, summarize_text,
+    nettoyer_resumes, MOTIF_HOMONYMIE, MOTIF_PHRASES,
+    mots_significatifs, nom_normalise, replier_accents
+)
 
 # ----------------- Variantes du titre -----------------
 def generate_title_variants(title):
-    title = title.lower()
-    stopwords = ["musée", "de", "du", "des", "d'", "la", "le", "l’", "à"]
-    words = [w for w in re.split(r'\W+', title) if w not in stopwords]
+    # Même normalisation que la jointure (minuscules, sans accents, sans mots
+    # vides "musée", "de", "d"…), gardée en cache : chaque titre n'est traité qu'une fois
+    words = mots_significatifs(title)
+    title = nom_normalise(title)
     variants = set()
     if words:
         variants.add(" ".join(words))          # version courte
@@ -294,7 +338,7 @@ class TitleParser(HTMLParser):
 class ParagraphParserAfterTitleVariants(HTMLParser):
     def __init__(self, title_variants):
         super().__init__()
-        self.title_variants = set([v.lower() for v in title_variants])
+        self.title_variants = set([replier_accents(v) for v in title_variants])
         self.in_infobox = False
         self.in_bandeau = False
         self.in_p = False
@@ -320,11 +364,12 @@ class ParagraphParserAfterTitleVariants(HTMLParser):
         if tag == "p" and self.in_p:
             self.in_p = False
             txt = clean_text(self.current_text)
-            if re.match(r"^(Pour les articles homonymes|Ne pas confondre)", txt, re.IGNORECASE):
+            if MOTIF_HOMONYMIE.match(txt):
                 return
             if not self.found_title_paragraph:
+                txt_normalise = replier_accents(txt)
                 for variant in self.title_variants:
-                    if variant in txt.lower():
+                    if variant in txt_normalise:
                         self.found_title_paragraph = True
                         break
             if self.found_title_paragraph and len(txt) > 30:
@@ -355,66 +400,117 @@ class SecondParagraphParser(HTMLParser):
         if self.in_p:
             self.current_text += data
 
-# ----------------- Nettoyage global pour toutes les résumés -----------------
-def clean_summary_global(txt):
-    if not txt:
-        return txt
-    patterns = [
-        r"modifier\s*-\s*modifier le code\s*-\s*modifier wikidata",
-        r"\d+\s*m2\s*d'expositions permanentes",
-        r"\d+\s*m²\s*d'expositions permanentes"
-    ]
-    for pat in patterns:
-        txt = re.sub(pat, '', txt, flags=re.IGNORECASE)
-    txt = re.sub(r'\s+', ' ', txt).strip()
-    return txt
-
-# ----------------- Résumé ~150 mots -----------------
-def summarize_text(text, max_words=150):
-    if not text:
+# ----------------- Lecture de l'article en flux -----------------
+# On n'a besoin que du titre et des premiers paragraphes, alors que l'article
+# complet pèse souvent plus de 500 Ko. En mode streaming, la réponse est lue
+# par morceaux, donnée au parser au fur et à mesure, et la connexion est
+# fermée dès que le résumé de ~150 mots est complet.
+MODE_STREAMING = True
+TAILLE_MORCEAU = 16 * 1024  # octets décodés par morceau
+
+stats_streaming = {"pages": 0, "octets": 0, "arrets_anticipes": 0}
+
+def resume_complet(paragraphs, max_words=150):
+    """
+    Indique si les paragraphes déjà lus suffisent pour obtenir exactement
+    le même résumé qu'avec l'article complet.
+    summarize_text ne garde que des phrases entières : si les phrases
+    complètes (toutes sauf la dernière, peut-être coupée) font déjà
+    max_words mots, la suite de l'article ne changera plus le résumé.
+    """
+    if not paragraphs:
+        return False
+    sentences = MOTIF_PHRASES.split(" ".join(paragraphs))
+    if len(sentences) < 2:
+        return False
+    return sum(len(s.split()) for s in sentences[:-1]) >= max_words
+
+def lire_article_en_flux(url, headers):
+    """
+    Télécharge l'article par morceaux et renvoie (html_lu, parser) :
+    - html_lu : le HTML effectivement reçu (complet si pas d'arrêt anticipé)
+    - parser  : le ParagraphParserAfterTitleVariants alimenté en continu
+    Renvoie None si la page est introuvable ou sans titre.
+    """
+    with requests.get(url, headers=headers, timeout=10, stream=True) as r:
+        if r.status_code != 200:
+            return None
+        if not r.encoding:
+            r.encoding = "utf-8"
+
+        morceaux = []
+        detecteur_titre = TitleParser()
+        parser = None
+
+        for morceau in r.iter_content(chunk_size=TAILLE_MORCEAU, decode_unicode=True):
+            morceaux.append(morceau)
+
+            if parser is None:
+                # Le titre (h1) arrive avant le contenu : on attend qu'il soit fermé
+                detecteur_titre.feed(morceau)
+                if not detecteur_titre.title or detecteur_titre.in_h1:
+                    continue
+
+                # Relecture du début en une fois : le texte du h1 a pu être
+                # coupé entre deux morceaux
+                debut = "".join(morceaux)
+                title_parser = TitleParser()
+                title_parser.feed(debut)
+                title_variants = generate_title_variants(title_parser.title)
+
+                parser = ParagraphParserAfterTitleVariants(title_variants)
+                parser.feed(debut)
+            else:
+                parser.feed(morceau)
+
+            if resume_complet(parser.paragraphs):
+                stats_streaming["arrets_anticipes"] += 1
+                break
+
+        # Octets réellement reçus (compressés), connexion fermée par le "with"
+        stats_streaming["pages"] += 1
+        stats_streaming["octets"] += r.raw.tell() if hasattr(r.raw, "tell") else 0
+
+    if parser is None:
         return None
-    sentences = re.split(r'(?<=[.!?]) +', text)
-    summary_words = []
-    word_count = 0
-    for s in sentences:
-        s_words = s.split()
-        if word_count + len(s_words) > max_words and word_count > 0:
-            break
-        summary_words.append(s)
-        word_count += len(s_words)
-    summary = " ".join(summary_words).strip()
-    if not summary.endswith("."):
-        summary += "."
-    return summary
+    return "".join(morceaux), parser
 
 # ----------------- Scraper principal -----------------
 def get_summary_wiki_variants(url):
     try:
         headers = {"User-Agent": "Mozilla/5.0"}
-        r = requests.get(url, headers=headers, timeout=10)
-        if r.status_code != 200:
-            return None
-        html = r.text
 
-        # Titre de la page
-        title_parser = TitleParser()
-        title_parser.feed(html)
-        page_title = title_parser.title
-        if not page_title:
-            return None
+        if MODE_STREAMING:
+            lu = lire_article_en_flux(url, headers)
+            if lu is None:
+                return None
+            html, parser = lu
+        else:
+            r = requests.get(url, headers=headers, timeout=10)
+            if r.status_code != 200:
+                return None
+            html = r.text
 
-        # Variantes du titre
-        title_variants = generate_title_variants(page_title)
+            # Titre de la page
+            title_parser = TitleParser()
+            title_parser.feed(html)
+            page_title = title_parser.title
+            if not page_title:
+                return None
+
+            # Variantes du titre
+            title_variants = generate_title_variants(page_title)
+
+            # Parser principal
+            parser = ParagraphParserAfterTitleVariants(title_variants)
+            parser.feed(html)
 
-        # Parser principal
-        parser = ParagraphParserAfterTitleVariants(title_variants)
-        parser.feed(html)
         if parser.paragraphs:
             full_text = " ".join(parser.paragraphs)
             summary = summarize_text(full_text)
             return clean_summary_global(summary)
 
-        # Fallback
+        # Fallback (sans arrêt anticipé, html contient tout l'article)
         fallback_parser = SecondParagraphParser()
         fallback_parser.feed(html)
         if len(fallback_parser.paragraphs) >= 2:
@@ -431,6 +527,25 @@ def get_summary_wiki_variants(url):
     except:
         return None
 
+# ----------------- Backends de résumé -----------------
+# Les deux backends exposent la même méthode resumes(urls), qui renvoie un
+# dictionnaire {scrap_url: résumé ou None}. On peut donc passer de l'un à
+# l'autre sans toucher à l'injection dans QGIS.
+BACKEND_RESUMES = "html"   # "html" : une page par musée / "api" : API MediaWiki par lots
+
+# Backend API MediaWiki rangé dans le module script/scraper_mediawiki.py
+from scraper_mediawiki import ScraperMediaWiki
+
+class ScraperHTML:
+    """Scraping classique : une requête par musée sur la page HTML."""
+
+    def resumes(self, urls):
+        resultats = {}
+        for url in dict.fromkeys(urls):
+            print("Scraping :", url)
+            resultats[url] = get_summary_wiki_variants(url)
+        return resultats
+
 # ----------------- Injection dans QGIS -----------------
 layer = QgsProject.instance().mapLayersByName("Musees_Paris_4326")[0]
 
@@ -443,65 +558,37 @@ if idx_info == -1:
 
 idx_url = layer.fields().indexOf("scrap_url")
 
-layer.startEditing()
-for f in layer.getFeatures():
-    url = f[idx_url]
-    if not url:
-        continue
-
-    print("Scraping :", url)
-    summary = get_summary_wiki_variants(url)
-    if summary:
-        # Nettoyage global appliqué à tous les résumés
-        summary = clean_summary_global(summary)
-        f[idx_info] = summary
-    else:
-        f[idx_info] = "[Résumé non trouvé]"
+# Une seule lecture de la couche : identifiant et URL, sans géométrie
+from qgis.core import QgsFeatureRequest
 
-    layer.updateFeature(f)
+requete = QgsFeatureRequest()
+requete.setFlags(QgsFeatureRequest.NoGeometry)
+requete.setSubsetOfAttributes([idx_url])
+url_par_fid = {f.id(): f[idx_url] for f in layer.getFeatures(requete) if f[idx_url]}
 
-layer.commitChanges()
-print(" Scraping et nettoyage global appliqué à toutes les lignes terminé !")
+# Récupération de tous les résumés avec le backend choisi
+backend = ScraperMediaWiki() if BACKEND_RESUMES == "api" else ScraperHTML()
+resumes = backend.resumes(list(url_par_fid.values()))
 
-#Nettoyage du champ information_musee et suppression des chiffres avant le texte
-import re
-from qgis.PyQt.QtCore import QVariant
-from qgis.core import QgsProject, QgsField
+# Tout le nettoyage en mémoire et en une seule passe :
+# résidus de l'infobox + suppression de ce qui précède la première majuscule
+urls_resumes = list(resumes)
+resumes = dict(zip(urls_resumes, nettoyer_resumes([resumes[u] for u in urls_resumes])))
 
-# ----------------- Configuration -----------------
-layer_name = "Musees_Paris_4326"
-field_name = "information_musee"
+# Écriture unique du champ information_musee (modification groupée du fournisseur)
+changements = {
+    fid: {idx_info: resumes.get(url) or "[Résumé non trouvé]"}
+    for fid, url in url_par_fid.items()
+}
+layer.dataProvider().changeAttributeValues(changements)
 
-# Récupérer la couche
-layer = QgsProject.instance().mapLayersByName(layer_name)[0]
+print(" Scraping et nettoyage global appliqué à toutes les lignes terminé !")
+print(" Champ '{}' nettoyé (première majuscule) et écrit en une seule fois.".format(field_name))
 
-# Vérifier que le champ existe
-idx_info = layer.fields().indexOf(field_name)
-if idx_info == -1:
-    layer.dataProvider().addAttributes([QgsField(field_name, QVariant.String)])
-    layer.updateFields()
-    idx_info = layer.fields().indexOf(field_name)
+if MODE_STREAMING and stats_streaming["pages"]:
+    print(" Streaming : {} pages, {:.0f} Ko reçus au total, {} lectures arrêtées avant la fin.".format(
+        stats_streaming["pages"], stats_streaming["octets"] / 1024, stats_streaming["arrets_anticipes"]))
 
-# ----------------- Fonction de nettoyage -----------------
-def keep_from_first_uppercase(text):
-    if not text:
-        return text
-    # Cherche la première lettre majuscule (y compris accents)
-    match = re.search(r'[A-ZÀ-ÖÙ-Ý]', text)
-    if match:
-        return text[match.start():].strip()
-    return text
-
-# ----------------- Mise à jour des entités -----------------
-layer.startEditing()
-
-for f in layer.getFeatures():
-    original_text = f[idx_info]
-    if original_text:
-        cleaned_text = keep_from_first_uppercase(original_text)
-        f[idx_info] = cleaned_text
-        layer.updateFeature(f)
-
-layer.commitChanges()
-
-print(" Champ '{}' mis à jour pour commencer par la première majuscule.".format(field_name))
+cache_noms = mots_significatifs.cache_info()
+print(" Noms normalisés (jointure + titres) : {} calculs, {} reprises depuis le cache.".format(
+    cache_noms.misses, cache_noms.hits))
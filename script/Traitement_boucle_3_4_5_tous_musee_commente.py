@@ -30,6 +30,267 @@ layer_gares = project.mapLayersByName("Gares_dans_Paris")[0]
 if layer_musees is None:
     raise Exception(" La couche des musées est introuvable !")
 
+# API ORS : clé personnelle + endpoint des isochrones (le profil est ajouté à la fin)
+ORS_API_KEY = ""
+ORS_URL_BASE = "https://api.openrouteservice.org/v2/isochrones"
+
+# Bandes des isochrones (secondes) par profil ORS : toutes les bandes d'un
+# profil sont demandées dans la même requête (10 au maximum)
+BANDES_ISOCHRONES = {
+    "foot-walking": [300, 600],              # 5, 10 minutes à pied
+    # "cycling-regular": [300, 600, 900],    # 5, 10, 15 minutes à vélo
+}
+LIBELLES_PROFILS = {
+    "foot-walking": "de marche",
+    "cycling-regular": "à vélo",
+}
+
+# Bande utilisée pour l'analyse des gares : (profil, secondes)
+BANDE_GARES = ("foot-walking", 600)
+
+# Isochrones par lots : plusieurs musées par requête ORS (5 au maximum sur
+# l'API publique), la réponse est redécoupée par musée avec group_index.
+# 1 = une requête par musée (fonctionnement d'origine)
+TAILLE_LOT_ISOCHRONES = 5
+
+# Quotas du compte ORS (compte gratuit : 20 requêtes isochrones par minute,
+# 500 par jour) et nombre de lots envoyés sans attendre la réponse du précédent
+QUOTA_ORS_PAR_MINUTE = 20
+QUOTA_ORS_PAR_JOUR = 500
+REQUETES_ORS_SIMULTANEES = 4
+
+# Moteur des isochrones : "ors" (API OpenRouteService), "local" (graphe
+# piéton calculé à partir d'un extrait OSM, sans accès réseau ni quota) ou
+# "grille" (temps de marche précalculés sur le même graphe, une fois pour
+# tous les musées, puis seuillés : recalculés si l'extrait ou les musées changent)
+MOTEUR_ISOCHRONES = "ors"
+FICHIER_OSM_PIETON = os.path.join(monCheminDeBase, "osm", "paris_pietons.osm")   # .osm ou .geojson de lignes
+FICHIER_GRILLE_TEMPS = os.path.join(monCheminDeBase, "isochrones", "grille_temps_marche.bin")
+PAS_GRILLE_M = 50.0
+
+# Post-traitement des isochrones avant écriture du GeoJSON : simplification
+# des contours (tolérance en mètres, 0 = aucune) et coordonnées arrondies
+# (5 décimales ≈ 1 m). Cache des réponses brutes en "geojson" ou "binaire"
+# (format compact, sans perte)
+TOLERANCE_SIMPLIFICATION_M = 5.0
+DECIMALES_COORDONNEES = 5
+FORMAT_CACHE_ISOCHRONES = "geojson"
+
+# Stock unique des isochrones : une table GeoPackage (musée, bande, polygone)
+# avec index spatial, chargée une seule fois comme couche et filtrée par musée
+FICHIER_STOCK_ISOCHRONES = os.path.join(monCheminDeBase, "isochrones", "isochrones_musees.gpkg")
+NOM_COUCHE_ISOCHRONES = "Isochrones_musees"
+
+# Analyse de couverture après la boucle (si CALCULER_COUVERTURE) : part de
+# chaque arrondissement à moins de BANDE_COUVERTURE d'au moins un musée.
+# Arrondissements de opendata.paris.fr, téléchargés une fois (à défaut, Paris entier)
+CALCULER_COUVERTURE = True
+BANDE_COUVERTURE = ("foot-walking", 600)
+FICHIER_ARRONDISSEMENTS = os.path.join(monCheminDeBase, "arrondissements.geojson")
+URL_ARRONDISSEMENTS = ("https://opendata.paris.fr/api/explore/v2.1/catalog/datasets/"
+                       "arrondissements/exports/geojson")
+DOSSIER_COUVERTURE = os.path.join(monCheminDeBase, "couverture")
+
+# Mise en page : résolution de l'export PDF et logos distants, téléchargés
+# et vérifiés une fois dans icons/cache, puis déclinés en PNG à la taille
+# de leur cadre à DPI_EXPORT (plus d'accès réseau à chaque export)
+DPI_EXPORT = 300
+DOSSIER_RESSOURCES = os.path.join(monCheminDeBase, "icons", "cache")
+URL_LOGO_MUSEE_DE_FRANCE = "https://upload.wikimedia.org/wikipedia/commons/4/4e/Logo_label_mus%C3%A9e_de_France.svg"
+URL_LOGO_CY = "https://upload.wikimedia.org/wikipedia/commons/c/cc/CY_Cergy_Paris_Universite_-_Logo.png"
+
+# Modèle de mise en page (.qpt) : créé à la première exécution à partir de
+# construire_modele_mise_en_page, puis lu une fois par exécution et cloné
+# pour chaque musée. Le modifier dans QGIS suffit à changer toutes les cartes
+# (garder les identifiants des éléments de ELEMENTS_DYNAMIQUES)
+FICHIER_MODELE_MISE_EN_PAGE = os.path.join(monCheminDeBase, "modeles", "mise_en_page_musee.qpt")
+
+# Génération des cartes : "boucle" (musée par musée : filtres, symbologies
+# et mise en page réglés en Python) ou "atlas" (une seule mise en page
+# pilotée par un atlas QGIS sur Musees_Paris_4326 : titre, textes, carte de
+# localisation, isochrones et gares du musée donnés par des expressions).
+# EXPORT_ATLAS : "par_musee" (un PDF par musée, comme la boucle) ou "unique"
+MODE_MISE_EN_PAGE = "boucle"
+EXPORT_ATLAS = "par_musee"
+
+# Export des PDF de l'atlas (par_musee) en parallèle : nombre de processus
+# Python sans interface, chacun ouvrant un instantané du projet et prenant
+# le musée suivant dans une file commune (0 ou 1 = export dans QGIS).
+# PYTHON_QGIS : interpréteur capable d'importer qgis (None = celui de QGIS)
+PROCESSUS_EXPORT_PDF = 0
+PYTHON_QGIS = None
+FICHIER_PROJET_EXPORT = os.path.join(monCheminDeBase, "cartes", "export", "projet_export.qgz")
+
+# Fonctions ORS rangées dans le module script/client_ors.py
+import sys
+dossier_scripts = os.path.join(monCheminDeBase, "script")
+if dossier_scripts not in sys.path:
+    sys.path.append(dossier_scripts)
+
+from client_ors import CacheIsochrones, LimiteurDebit, fusionner_profils, isochrones_par_lots, parametres_bandes
+from couverture_isochrones import analyser_couverture, ecrire_couverture, lire_zones
+from export_parallele import commande_travailleur, environnement_travailleur, exporter_en_parallele
+from grille_temps import GrilleTemps, construire_grille
+from isochrones_locaux import MoteurIsochrones, empreinte_fichier, isochrones_locaux
+from ressources_mise_en_page import CacheRessources
+from simplification_isochrones import nombre_sommets, simplifier_isochrones
+from stock_isochrones import StockIsochrones, filtre_musee
+
+# Cache des isochrones : un fichier par requête (profil, position, ranges,
+# unités, version du moteur) ; seuls les musées absents sont demandés à ORS
+if MOTEUR_ISOCHRONES == "local":
+    print("⏳ Chargement du graphe piéton OSM…")
+    moteur_local = MoteurIsochrones.depuis_fichier(FICHIER_OSM_PIETON)
+    print(f" Graphe piéton : {len(moteur_local.graphe.lonlat)} nœuds, {len(moteur_local.graphe.aretes)} tronçons.")
+    cache_isochrones = CacheIsochrones(os.path.join(monCheminDeBase, "isochrones", "cache"),
+                                       version_moteur=moteur_local.version,
+                                       format_stockage=FORMAT_CACHE_ISOCHRONES)
+else:
+    cache_isochrones = CacheIsochrones(os.path.join(monCheminDeBase, "isochrones", "cache"),
+                                       format_stockage=FORMAT_CACHE_ISOCHRONES)
+
+# Un seul limiteur pour toutes les requêtes ORS de l'exécution : les quotas sont par compte
+limiteur_ors = LimiteurDebit(par_minute=QUOTA_ORS_PAR_MINUTE, par_jour=QUOTA_ORS_PAR_JOUR)
+
+
+def emprise_paris_4326():
+    """Emprise de la couche Paris (Lambert 93) en lon/lat : (lon_min, lat_min, lon_max, lat_max)."""
+    layer_paris = project.mapLayersByName("Paris")[0]
+    transformation = QgsCoordinateTransform(layer_paris.crs(), QgsCoordinateReferenceSystem("EPSG:4326"), project)
+    emprise = transformation.transformBoundingBox(layer_paris.extent())
+    return (emprise.xMinimum(), emprise.yMinimum(), emprise.xMaximum(), emprise.yMaximum())
+
+
+def grille_temps_musees(points):
+    """
+    Grille des temps de marche ouverte, recalculée si elle manque des musées,
+    vient d'un autre extrait ou d'un autre pas (PAS_GRILLE_M) ou emprise de Paris.
+    """
+    empreinte = empreinte_fichier(FICHIER_OSM_PIETON)
+    emprise = emprise_paris_4326()
+    if os.path.exists(FICHIER_GRILLE_TEMPS):
+        grille = GrilleTemps(FICHIER_GRILLE_TEMPS)
+        if grille.couvre(points, empreinte, pas_m=PAS_GRILLE_M, emprise=emprise):
+            return grille
+        # recalcul pour les musées de la grille et les nouveaux
+        points = {**grille.positions, **points}
+        grille.fermer()
+
+    print(f"⏳ Grille des temps de marche ({len(points)} musées, cases de {PAS_GRILLE_M:g} m)…")
+    moteur = MoteurIsochrones.depuis_fichier(FICHIER_OSM_PIETON)
+    nb_cases = construire_grille(FICHIER_GRILLE_TEMPS, moteur, points, emprise, pas_m=PAS_GRILLE_M)
+    print(f" Grille des temps : {nb_cases} cases par musée → {FICHIER_GRILLE_TEMPS}")
+    return GrilleTemps(FICHIER_GRILLE_TEMPS)
+
+
+def calculer_isochrones(points, taille_lot):
+    """
+    points : {identifiant: (lon, lat)} → ({identifiant: FeatureCollection}, statistiques).
+    Une requête par lot de musées et par profil, avec toutes les bandes du profil.
+    """
+    resultats_par_profil = {}
+    stats = {"musees": len(points), "appels": 0, "appels_evites": 0, "depuis_cache": 0}
+    for profil, bandes in BANDES_ISOCHRONES.items():
+        parametres = parametres_bandes(bandes)
+        if MOTEUR_ISOCHRONES == "local":
+            if profil != "foot-walking":
+                raise Exception(f" Le moteur local ne calcule que le profil foot-walking (pas {profil})")
+            resultats, stats_profil = isochrones_locaux(points, moteur_local, parametres, cache=cache_isochrones)
+        elif MOTEUR_ISOCHRONES == "grille":
+            if profil != "foot-walking":
+                raise Exception(f" La grille des temps ne couvre que le profil foot-walking (pas {profil})")
+            with grille_temps_musees(points) as grille:
+                resultats = {identifiant: grille.isochrones(identifiant, bandes) for identifiant in points}
+            stats_profil = {"appels": 0, "appels_evites": len(points), "depuis_cache": 0}
+        else:
+            resultats, stats_profil = isochrones_par_lots(
+                points, f"{ORS_URL_BASE}/{profil}", ORS_API_KEY, parametres, taille_lot=taille_lot,
+                cache=cache_isochrones, limiteur=limiteur_ors, requetes_simultanees=REQUETES_ORS_SIMULTANEES)
+        resultats_par_profil[profil] = resultats
+        for cle in ("appels", "appels_evites", "depuis_cache"):
+            stats[cle] += stats_profil[cle]
+    return fusionner_profils(resultats_par_profil), stats
+
+stock_isochrones = StockIsochrones(FICHIER_STOCK_ISOCHRONES)
+
+ressources_mise_en_page = CacheRessources(DOSSIER_RESSOURCES)
+
+# Musées dont les isochrones de cette exécution sont dans le stock
+musees_stockes = set()
+
+
+def identifiant_musee(musee):
+    """Clé du musée dans le stock : identifiant_museofile, sinon musee_<fid> (comme les cartes de localisation)."""
+    return musee["identifiant_museofile"] or f"musee_{musee.id()}"
+
+
+def stocker_isochrones(resultats, identifiants_actuels=None):
+    """
+    {identifiant: FeatureCollection} → simplification puis écriture dans le
+    stock (une transaction) ; avec identifiants_actuels, les musées retirés
+    de la couche sont supprimés du stock.
+    """
+    nb_avant = sum(nombre_sommets(iso_data) for iso_data in resultats.values())
+    if TOLERANCE_SIMPLIFICATION_M > 0:
+        resultats = {identifiant: simplifier_isochrones(iso_data, TOLERANCE_SIMPLIFICATION_M, DECIMALES_COORDONNEES)
+                     for identifiant, iso_data in resultats.items()}
+        print(f" Contours simplifiés : {nb_avant} → {sum(nombre_sommets(d) for d in resultats.values())} sommets.")
+    bilan = stock_isochrones.enregistrer_tous(resultats, identifiants_actuels)
+    if bilan["ignores"]:
+        print(f" {bilan['ignores']} musée(s) sans identifiant non stocké(s).")
+    if bilan["retires"]:
+        print(f" {len(bilan['retires'])} musée(s) absent(s) de la couche retiré(s) du stock :"
+              f" {', '.join(sorted(bilan['retires']))}")
+    musees_stockes.update(resultats)
+
+
+def couche_isochrones():
+    """Couche QGIS du stock, chargée et stylée au premier appel, réutilisée ensuite."""
+    couches = QgsProject.instance().mapLayersByName(NOM_COUCHE_ISOCHRONES)
+    if couches:
+        return couches[0]
+
+    couche = QgsVectorLayer(f"{FICHIER_STOCK_ISOCHRONES}|layername=isochrones", NOM_COUCHE_ISOCHRONES, "ogr")
+    if not couche.isValid():
+        raise Exception(f" Stock d'isochrones illisible : {FICHIER_STOCK_ISOCHRONES}")
+
+    #            SYMBOLOGIE : contours colorés selon la bande, tirets hors marche
+  
+    # Palette ColorBrewer Set2 (5 min vert, 10 min orange, 15 min bleu…)
+    colors = [
+        QColor(102, 194, 165),
+        QColor(252, 141, 98),
+        QColor(141, 160, 203),
+        QColor(231, 138, 195),
+        QColor(166, 216, 84),
+        QColor(255, 217, 47),
+        QColor(229, 196, 148),
+        QColor(179, 179, 179),
+    ]
+
+    categories = []
+
+    for profil, bandes in BANDES_ISOCHRONES.items():
+        for i, value in enumerate(sorted(bandes)):
+            color = colors[i % len(colors)]
+            symbol = QgsFillSymbol.createSimple({
+                'color': '0,0,0,0',  # pas de remplissage
+                'outline_color': f'{color.red()},{color.green()},{color.blue()},255',
+                'outline_width': '0.5',
+                'outline_style': 'solid' if profil == "foot-walking" else 'dash'
+            })
+            libelle = f"{value//60} min {LIBELLES_PROFILS.get(profil, profil)} du musée"
+            cat = QgsRendererCategory(f"{profil}:{value}", symbol, libelle)
+            categories.append(cat)
+
+    # une catégorie par couple (profil, bande)
+    renderer = QgsCategorizedSymbolRenderer("concat(\"profil\", ':', to_int(\"value\"))", categories)
+    couche.setRenderer(renderer)
+    QgsProject.instance().addMapLayer(couche)
+
+    print(f" Couche des isochrones chargée, symbologie de {len(categories)} bandes appliquée.")
+    return couche
+
 # CREATION DES FONCTIONS 
 
 # ---------------------------------------------------------------------
@@ -38,12 +299,7 @@ if layer_musees is None:
 def run_isochrone_for_one_museum(musee):
             
 
-    import json
-
-    # Calcul isochrone 1 musée
-    ORS_API_KEY = ""
-    ORS_URL = "https://api.openrouteservice.org/v2/isochrones/foot-walking"
-
+    # Calcul isochrone 1 musée (ORS_API_KEY, ORS_URL_BASE, BANDES_ISOCHRONES : paramètres globaux)
     project = QgsProject.instance()
 
    
@@ -69,76 +325,28 @@ def run_isochrone_for_one_museum(musee):
     print("🔍 Vue centrée sur le musée sélectionné à l'échelle 10000 ")
 
    
-    #            PARAMÈTRES ISOCHRONES
+    #            PARAMÈTRES ISOCHRONES (bandes par profil : BANDES_ISOCHRONES)
     
-    payload = {
-        "locations": [[lon, lat]],
-        "range": [300, 600],  # 5, 10 minutes
-        "units": "m",
-        "location_type": "start"
-    }
-
-    headers = {
-        "Authorization": ORS_API_KEY,
-        "Content-Type": "application/json"
-    }
-
-    print("⏳ Envoi de la requête ORS (foot-walking)…")
-    response = requests.post(ORS_URL, headers=headers, data=json.dumps(payload))
-
-    if response.status_code != 200:
-        raise Exception(" Erreur ORS : " + response.text)
-
-    iso_data = response.json()
-
-    
-    #            SAUVEGARDE GEOJSON
-    
-    identifiant = musee["identifiant_museofile"]   # ou un autre identifiant unique
-    iso_output_test = os.path.join(monCheminDeBase, "isochrones", f"Isochrones_{identifiant}.geojson")
-
-
-    with open(iso_output_test, "w", encoding="utf-8") as f:
-        json.dump(iso_data, f)
-
-    print(" Isochrone test sauvegardé :", iso_output_test)
+    identifiant = identifiant_musee(musee)   # identifiant_museofile, sinon musee_<fid>
+
+    # Isochrone déjà stocké à l'étape 0, sinon cache ou requête pour ce seul musée
+    layer_iso = couche_isochrones()
+    if identifiant not in musees_stockes:
+        print(f"⏳ Isochrone du musée (cache, sinon moteur {MOTEUR_ISOCHRONES}, foot-walking)…")
+        resultats_iso, _ = calculer_isochrones({identifiant: (lon, lat)}, taille_lot=1)
+        stocker_isochrones(resultats_iso)
+        layer_iso.dataProvider().reloadData()
+    else:
+        print(" Isochrone déjà dans le stock (étape 0).")
 
     
-    #            CHARGEMENT DANS QGIS
+    #            FILTRE DE LA COUCHE DES ISOCHRONES SUR LE MUSÉE
    
-    # Nom de la couche basé sur l'identifiant
-    nom_couche_iso = f"Isochrones_{identifiant}"
-
-    layer_iso_test = QgsVectorLayer(iso_output_test, nom_couche_iso, "ogr")
-    project.addMapLayer(layer_iso_test)
-
-    print(" Isochrones test (foot-walking) chargés dans QGIS.")
+    # Pas de fichier ni de couche par musée : la couche unique n'affiche que ses bandes
+    layer_iso.setSubsetString(filtre_musee(identifiant))
+    layer_iso.triggerRepaint()
 
-
-   
-    #            SYMBOLOGIE : contours colorés selon catégorie
-  
-    colors = {
-        300: QColor(102, 194, 165),  # 5 min - vert
-        600: QColor(252, 141, 98),   # 10 min - orange
-    }
-
-    categories = []
-
-    for value, color in colors.items():
-        symbol = QgsFillSymbol.createSimple({
-            'color': '0,0,0,0',  # pas de remplissage
-            'outline_color': f'{color.red()},{color.green()},{color.blue()},255',
-            'outline_width': '0.5'
-        })
-        cat = QgsRendererCategory(value, symbol, f"{value//60} min de marche du musée")
-        categories.append(cat)
-
-    renderer = QgsCategorizedSymbolRenderer("value", categories)
-    layer_iso_test.setRenderer(renderer)
-    layer_iso_test.triggerRepaint()
-
-    print(" Symbologie contours appliquée avec catégories 5/10/15 min ")
+    print(f" Couche {NOM_COUCHE_ISOCHRONES} filtrée sur le musée {identifiant}.")
 
    
     #            SYMBOLOGIE SVG POUR LE MUSÉE SÉLECTIONNÉ
@@ -188,10 +396,11 @@ def run_isochrone_for_one_museum(musee):
 # ---------------------------------------------------------------------
 #  FONCTION 2 : Symbologie gares + croisement isochrone
 
-def run_symbology_gares(nom_couche_iso):
+def run_symbology_gares(nom_couche_iso, bande=BANDE_GARES):
     """
-    Applique la symbologie sur les gares et marque celles dans l'isochrone 10 min
+    Applique la symbologie sur les gares et marque celles dans l'isochrone de la bande choisie
     nom_couche_iso : nom exact de la couche d'isochrone dans QGIS
+    bande : (profil, secondes), 10 min à pied par défaut
     """
     project = QgsProject.instance()
 
@@ -209,7 +418,8 @@ def run_symbology_gares(nom_couche_iso):
 
     # --- paramètres ---
     iso_field = "value"
-    iso_10_min = 600
+    profil_gares, iso_bande = bande
+    minutes = iso_bande // 60
     gare_field = "nom_zda"
     svg_path = os.path.join(monCheminDeBase, "icons", "railway.svg")
 
@@ -217,28 +427,42 @@ def run_symbology_gares(nom_couche_iso):
         raise Exception(f" Le SVG est introuvable : {svg_path}")
 
    
-    # 1. Récupérer les gares dans l’isochrone 10 min
+    # 1. Récupérer les gares dans l’isochrone de la bande choisie
     
     iso_geom = None
     for f in layer_iso.getFeatures():
-        if f[iso_field] == iso_10_min:
+        if f["profil"] == profil_gares and f[iso_field] == iso_bande:
             iso_geom = f.geometry()
             break
 
     if iso_geom is None:
-        raise Exception(" Aucun polygone 10 min trouvé dans la couche d'isochrone.")
+        raise Exception(f" Aucun polygone {minutes} min ({profil_gares}) trouvé dans la couche d'isochrone.")
 
     gares_inside = []
     gares_outside = []
 
+    # moteur de géométrie préparé : le polygone est indexé une seule fois pour toutes les gares
+    moteur_iso = QgsGeometry.createGeometryEngine(iso_geom.constGet())
+    moteur_iso.prepareGeometry()
+
+    geometries_gares = {}
     for g in layer_gares.getFeatures():
-        if g.geometry().intersects(iso_geom):
+        geometries_gares[g.id()] = g.geometry()   # gardée en vie tant que constGet() est utilisé
+        if moteur_iso.intersects(geometries_gares[g.id()].constGet()):
             gares_inside.append(g)
         else:
             gares_outside.append(g)
 
-    print(f" {len(gares_inside)} gares dans 10 min.")
-    print(f" {len(gares_outside)} gares hors 10 min.")
+    print(f" {len(gares_inside)} gares dans {minutes} min.")
+    print(f" {len(gares_outside)} gares hors {minutes} min.")
+
+    # Gares de chaque bande de chaque profil du musée (journal)
+    for f in layer_iso.getFeatures():
+        geom_bande = f.geometry()
+        moteur_bande = QgsGeometry.createGeometryEngine(geom_bande.constGet())
+        moteur_bande.prepareGeometry()
+        nb = sum(1 for geom in geometries_gares.values() if moteur_bande.intersects(geom.constGet()))
+        print(f"   {int(f[iso_field]) // 60} min {LIBELLES_PROFILS.get(f['profil'], f['profil'])} : {nb} gares")
 
    
     #  2. Ajouter le champ Accesible_10min et le remplir
@@ -246,7 +470,7 @@ def run_symbology_gares(nom_couche_iso):
     from qgis.core import QgsField
     from PyQt5.QtCore import QVariant
 
-    field_name = "Accesible_10min"
+    field_name = "Accesible_10min"   # nom historique du champ, quelle que soit la bande
 
     if field_name not in [f.name() for f in layer_gares.fields()]:
         layer_gares.dataProvider().addAttributes([QgsField(field_name, QVariant.String)])
@@ -311,7 +535,7 @@ def run_symbology_gares(nom_couche_iso):
     })
 
     # Catégorie "autres" basée sur une valeur absente (None)
-    cat_red = QgsRendererCategory(None, symbol_red, "Autres gares (+ de 10 min)")
+    cat_red = QgsRendererCategory(None, symbol_red, f"Autres gares (+ de {minutes} min)")
     categories.append(cat_red)
 
     
@@ -323,7 +547,7 @@ def run_symbology_gares(nom_couche_iso):
 
 
     
-    #  Labeling uniquement pour les gares accessibles à 10 min
+    #  Labeling uniquement pour les gares accessibles dans la bande
    
     from qgis.core import Qgis
 
@@ -363,7 +587,7 @@ def run_symbology_gares(nom_couche_iso):
     root_rule = QgsRuleBasedLabeling.Rule(None)
 
     rule_10min = QgsRuleBasedLabeling.Rule(pal_layer)
-    rule_10min.setDescription("Gares accessibles 10 min")
+    rule_10min.setDescription(f"Gares accessibles {minutes} min")
     rule_10min.setFilterExpression("\"Accesible_10min\" = 'oui'")
     root_rule.appendChild(rule_10min)
 
@@ -382,8 +606,12 @@ def run_symbology_gares(nom_couche_iso):
 # ---------------------------------------------------------------------
 #  FONCTION 3 : Mise en page + export PDF
 
-def run_map_layout(musee):
-    #5
+def construire_modele_mise_en_page(layout):
+    """
+    Éléments fixes de la mise en page (carte, légende, échelle, logos, nord,
+    cadres de texte vides). Les éléments mis à jour pour chaque musée sont
+    repérés par leur identifiant (setId) : voir ELEMENTS_DYNAMIQUES.
+    """
     from qgis.core import (
         QgsProject, QgsPrintLayout, QgsLayoutItemMap, QgsLayoutItemLabel,
         QgsLayoutItemLegend, QgsLayoutItemScaleBar, QgsLayoutItemPicture,
@@ -392,47 +620,17 @@ def run_map_layout(musee):
     from PyQt5.QtGui import QFont, QFontMetrics
     from PyQt5.QtCore import Qt
     import os
-    # Ajouter au début, avant toute manipulation de layout
     project = QgsProject.instance()
-    manager = project.layoutManager()
-
-    # --- Récupérer la valeur du champ identifiant_museofile ---
-    identifiant = musee["identifiant_museofile"]
-
-    # Sécurité si le champ est vide
-    if not identifiant:
-        identifiant = "identifiant_inconnu"
-
-    # Construire le nom du layout SANS nettoyage
-    layoutName = f"Carte_musee_{identifiant}"
-
-    # Vérification de la non-existence d'un layout de même nom
-    layouts_list = manager.printLayouts()
-    for layout in layouts_list:
-        if layout.name() == layoutName:
-            manager.removeLayout(layout)
-     
-    # Génération d'un layout vide
-    layout = QgsPrintLayout(project)
-    layout.initializeDefaults()
-    layout.setName(layoutName)
-     
-    manager.addLayout(layout)
 
     # Charger une carte vide
     map = QgsLayoutItemMap(layout)
+    map.setId("carte")
     map.setRect(20, 20, 20, 20)
      
-    # Mettre un canvas basique
+    # Mettre un canvas basique (remplacé par la vue du canvas pour chaque musée)
     rectangle = QgsRectangle(1355502, -46398, 1734534, 137094)
     map.setExtent(rectangle)
     layout.addLayoutItem(map)
-
-    # Mettre finalement le canvas courant
-    canvas = iface.mapCanvas()
-    map.setExtent(canvas.extent())
-     
-    layout.addLayoutItem(map)
      
     # Redimensionner la carte
     map.attemptMove(QgsLayoutPoint(3.217, 30.748, QgsUnitTypes.LayoutMillimeters))
@@ -440,43 +638,17 @@ def run_map_layout(musee):
      
     map.setFrameEnabled(True)
 
-    # Légende personnalisée
-    tree_layers = project.layerTreeRoot().children()
-    checked_layers = [layer.name() for layer in tree_layers if layer.isVisible()]
-
-    layers_to_remove = [layer for layer in project.mapLayers().values() if layer.name() not in checked_layers]
+    # Légende : seuls la position et le style sont dans le modèle ; ses
+    # couches sont choisies sur chaque clone (legende_couches_visibles)
+    from qgis.core import QgsLegendStyle
 
     legend = QgsLayoutItemLegend(layout)
+    legend.setId("legende")
     legend.setTitle("")
     legend.setLinkedMap(map)
     layout.addLayoutItem(legend)
     legend.attemptMove(QgsLayoutPoint(184.288, 25.395, QgsUnitTypes.LayoutMillimeters))
 
-    # Ne pas synchroniser avec le panneau de couches
-    legend.setAutoUpdateModel(False)
-
-    m = legend.model()
-    g = m.rootGroup()
-    for l in layers_to_remove:
-        g.removeLayer(l)
-
-    
-    # Masquer tous les noms de couches dans la légende (layout uniquement)
-    
-    from qgis.core import QgsLegendRenderer, QgsLegendStyle
-
-    def hide_node_labels(node):
-        # Appliquer le style "Hidden" à ce nœud
-        QgsLegendRenderer.setNodeLegendStyle(node, QgsLegendStyle.Hidden)
-        # Parcours récursif des enfants
-        if hasattr(node, "children"):
-            for child in node.children():
-                hide_node_labels(child)
-
-    # Appliquer à tous les nœuds racine
-    for node in g.children():
-        hide_node_labels(node)
-
     # -------------------------------
     # Ajuster la légende
     # -------------------------------
@@ -495,67 +667,20 @@ def run_map_layout(musee):
 
     # Mise à jour finale
     legend.updateLegend()
-    iface.mapCanvas().refresh()
 
-    # Titre
-    # --- Recuperation du musee selectionne ---
-    layer_musees_disk = QgsProject.instance().mapLayersByName("Musees_Paris_4326")[0]
-    musee = musee
-
-    if musee is None:
-        raise Exception("Aucun musee trouve.")
-
-    # Nom du musee correct
-    nom_musee = str(musee["nom_officiel_du_musee"]) if musee["nom_officiel_du_musee"] else "Nom inconnu"
-    nom_musee = nom_musee[0].upper() + nom_musee[1:]  # Mettre 1ère lettre en majuscule
-
-    # --- Titre dans la mise en page ---
+    # --- Titre dans la mise en page (nom du musée) ---
     title = QgsLayoutItemLabel(layout)
-    title.setText(nom_musee)  #  insertion dynamique du nom du musée
+    title.setId("titre")
     title.setFont(QFont("Verdana", 14))
-    title.adjustSizeToText()
 
     layout.addLayoutItem(title)
 
     title.attemptMove(QgsLayoutPoint(5, 4, QgsUnitTypes.LayoutMillimeters))
 
 
-    #Texte d'information en dessous du titre
-    from PyQt5.QtCore import QDate
-    # Récupération des valeurs des champs
-    nom = musee['nom_officiel_du_musee']
-    date_appellation = musee['date_arrete_attribution_appellation']
-    adresse = musee['adresse']
-    code_postal = musee['code_postal']
-    commune = musee['commune']
-    tel = musee['telephone']
-    site = musee['url']
-
-    # Conversion de la date si nécessaire
-    date_str = ""
-    if date_appellation and isinstance(date_appellation, QDate):
-        date_str = date_appellation.toString("dd/MM/yyyy")
-
-    # Construction du texte avec conditions pour ignorer les champs vides
-    texte = ""
-
-    if nom and date_appellation:
-        texte += f"Le {nom} a obtenu l’appellation Musée de Paris le {date_str}.\n"
-
-    # Adresse complète
-    adresse_complete = " ".join(filter(None, [adresse, code_postal, commune]))
-    if adresse_complete:
-        texte += f"Adresse : {adresse_complete}\n"
-
-    if tel:
-        texte += f"Tél : {tel}\n"
-
-    if site:
-        texte += f"Site web : {site}"
-
-    # Ajout dans le layout
+    #Texte d'information en dessous du titre (appellation, adresse, téléphone, site)
     TextCustom = QgsLayoutItemLabel(layout)
-    TextCustom.setText(texte)
+    TextCustom.setId("texte_musee")
     TextCustom.setFont(QFont("Verdana", 7))
 
 
@@ -566,6 +691,7 @@ def run_map_layout(musee):
 
     # Échelle
     scalebar = QgsLayoutItemScaleBar(layout)
+    scalebar.setId("echelle")
     scalebar.setStyle('Single Box')
     scalebar.setUnits(QgsUnitTypes.DistanceMeters)
     scalebar.setNumberOfSegments(2)
@@ -584,7 +710,8 @@ def run_map_layout(musee):
     # Logo
 
     Logo = QgsLayoutItemPicture(layout)
-    Logo.setPicturePath("https://upload.wikimedia.org/wikipedia/commons/4/4e/Logo_label_mus%C3%A9e_de_France.svg")
+    Logo.setId("logo_musee_de_france")
+    Logo.setPicturePath(ressources_mise_en_page.image(URL_LOGO_MUSEE_DE_FRANCE, 40, 15, DPI_EXPORT))
     Logo.attemptResize(QgsLayoutSize(40, 15, QgsUnitTypes.LayoutMillimeters))
     Logo.attemptMove(QgsLayoutPoint(250, 4, QgsUnitTypes.LayoutMillimeters))
     layout.addLayoutItem(Logo)
@@ -594,18 +721,9 @@ def run_map_layout(musee):
     from qgis.PyQt.QtGui import QFont, QColor
     from qgis.PyQt.QtCore import Qt
 
-    # --- Récupération du champ "information_musee" ---
-    # musee = l'entité du musée sélectionné dans ta couche (déjà définie avant ce code)
-    info = musee["information_musee"]
-    info = str(info) if info else ""
-
-    # Si le champ est NULL, éviter une erreur
-    if info is None:
-        info = ""
-
-    # Création de l'item texte
+    # Création de l'item texte du champ "information_musee"
     TextCustom = QgsLayoutItemLabel(layout)
-    TextCustom.setText(info)
+    TextCustom.setId("information_musee")
     TextCustom.setFont(QFont("Verdana", 8))
 
     # --- Ajouter un cadre autour du texte ---
@@ -627,23 +745,16 @@ def run_map_layout(musee):
     TextCustom.attemptResize(QgsLayoutSize(108.395, 49.349, QgsUnitTypes.LayoutMillimeters))
     TextCustom.attemptMove(QgsLayoutPoint(184.438, 158, QgsUnitTypes.LayoutMillimeters))
 
-    # Signature de la carte et source
-    from PyQt5.QtCore import QDate
-    from PyQt5.QtGui import QFont
-
-    # Récupérer la date actuelle
-    from datetime import datetime
-    date_aujourdhui = datetime.now().strftime("%d/%m/%Y")
-
-    # Texte de signature
+    # Texte de signature : la date est une expression QGIS, évaluée à chaque export
     texte_signature = (
-        f"Carte réalisée par Sewedo GNANSOUNOU le {date_aujourdhui}.\n"
+        "Carte réalisée par Sewedo GNANSOUNOU le [% format_date(now(), 'dd/MM/yyyy') %].\n"
         "Atlas des musées de Paris dotés de l'appellation 'Musée de France' au sens du Code du patrimoine.\n"
         "Source des données : Open Data Région Ile de France publié le 30 Avril 2025, https://data.iledefrance.fr"
     )
 
     # Créer un item texte pour la signature
     signature_item = QgsLayoutItemLabel(layout)
+    signature_item.setId("signature")
     signature_item.setText(texte_signature)
     signature_item.setFont(QFont("Verdana", 7))
     signature_item.setFrameEnabled(False)  # pas de cadre
@@ -658,24 +769,23 @@ def run_map_layout(musee):
     
     #LOGO Master
     Logomaster = QgsLayoutItemPicture(layout)
-    Logomaster.setPicturePath("https://upload.wikimedia.org/wikipedia/commons/c/cc/CY_Cergy_Paris_Universite_-_Logo.png")
+    Logomaster.setId("logo_cy")
+    Logomaster.setPicturePath(ressources_mise_en_page.image(URL_LOGO_CY, 36.561, 12.023, DPI_EXPORT))
     Logomaster.attemptResize(QgsLayoutSize(36.561, 12.023, QgsUnitTypes.LayoutMillimeters))
     Logomaster.attemptMove(QgsLayoutPoint(144.129, 195.477, QgsUnitTypes.LayoutMillimeters))
     layout.addLayoutItem(Logomaster)
 
 
    
-    #        AJOUT DU NORD (SVG) AVEC ROTATION AUTOMATIQUE
+    #        AJOUT DU NORD (SVG), tourné selon la carte à chaque musée
   
 
     # Ton chemin vers le fichier nord.svg
     svg_path2 = os.path.join(monCheminDeBase, "icons", "nord.svg")
 
-    # Récupération de la rotation de la carte dans la mise en page
-    map_rotation = map.rotation()
-
     # Création de l'item SVG
     north_item = QgsLayoutItemPicture(layout)
+    north_item.setId("nord")
     north_item.setPicturePath(svg_path2)
 
     # Taille du nord (en mm)
@@ -684,47 +794,218 @@ def run_map_layout(musee):
     # Position (à ajuster selon besoin)
     north_item.attemptMove(QgsLayoutPoint(7.802, 35.029, QgsUnitTypes.LayoutMillimeters))
 
-    # Appliquer la rotation du layout map
-    north_item.setRotation(-map_rotation)   # le signe - compense la rotation inverse de QGIS
-
     # Ajouter l'item à la mise en page
     layout.addLayoutItem(north_item)
 
-    print(" Nord ajouté et synchronisé avec la rotation de la carte.")
-    #Mettre la carte de localisation
-    #Mettre la carte de localisation
-    from qgis.PyQt.QtGui import QColor
-    from qgis.core import QgsLayoutMeasurement
-    import os
-    from qgis.PyQt.QtGui import QPixmap
+    #Mettre la carte de localisation (image choisie pour chaque musée, masquée si absente)
+    Cartelocalisation = QgsLayoutItemPicture(layout)
+    Cartelocalisation.setId("localisation")
 
-    # --- Dossier où sont stockées les cartes de localisation ---
-    folder_localisation = os.path.join(monCheminDeBase, "localisation")  # le même que pour l'export
+    # Définir la taille et la position dans le layout principal
+    Cartelocalisation.attemptResize(QgsLayoutSize(55.676, 40.733, QgsUnitTypes.LayoutMillimeters))
+    Cartelocalisation.attemptMove(QgsLayoutPoint(125.014, 19.000, QgsUnitTypes.LayoutMillimeters))
+
+    # -------- Ajouter un cadre --------
+    Cartelocalisation.setFrameEnabled(True)                                 # active le cadre
+    Cartelocalisation.setFrameStrokeColor(QColor(0, 0, 255))                # couleur bleue
+    Cartelocalisation.setFrameStrokeWidth(QgsLayoutMeasurement(0.5))        # épaisseur en mm
+
+    layout.addLayoutItem(Cartelocalisation)
+
+
+# Éléments du modèle modifiés pour chaque musée (identifiants des items)
+ELEMENTS_DYNAMIQUES = ["carte", "titre", "texte_musee", "information_musee", "nord", "localisation"]
+
+def legende_couches_visibles(layout):
+    """
+    Légende d'un clone du modèle reconstruite sur les couches du projet
+    ouvert : couches cochées seulement, noms de couches masqués. Jamais
+    figée dans le modèle : les identifiants des couches (isochrones, gares)
+    changent d'une session de QGIS à l'autre.
+    """
+    from qgis.core import QgsLegendRenderer, QgsLegendStyle
+
+    legend = layout.itemById("legende")
+    if legend is None:
+        return
+
+    # Arbre des couches du projet à cet instant, puis détaché du panneau de couches
+    legend.setAutoUpdateModel(True)
+    legend.setAutoUpdateModel(False)
+
+    tree_layers = project.layerTreeRoot().children()
+    checked_layers = [layer.name() for layer in tree_layers if layer.isVisible()]
+    g = legend.model().rootGroup()
+    for l in project.mapLayers().values():
+        if l.name() not in checked_layers:
+            g.removeLayer(l)
+
+    # Masquer tous les noms de couches dans la légende (layout uniquement)
+    def hide_node_labels(node):
+        # Appliquer le style "Hidden" à ce nœud
+        QgsLegendRenderer.setNodeLegendStyle(node, QgsLegendStyle.Hidden)
+        # Parcours récursif des enfants
+        if hasattr(node, "children"):
+            for child in node.children():
+                hide_node_labels(child)
+
+    # Appliquer à tous les nœuds racine
+    for node in g.children():
+        hide_node_labels(node)
+
+    legend.adjustBoxSize()
+    legend.updateLegend()
+
+
+# Modèle chargé une seule fois par exécution (voir charger_modele_mise_en_page)
+modele_mise_en_page = None
+
+
+def charger_modele_mise_en_page():
+    """
+    Modèle de mise en page : lu dans FICHIER_MODELE_MISE_EN_PAGE s'il existe,
+    sinon construit puis enregistré à cet endroit (modifiable ensuite dans
+    le concepteur de mise en page de QGIS). Lu une fois, cloné pour chaque musée.
+    """
+    global modele_mise_en_page
+    if modele_mise_en_page is not None:
+        return modele_mise_en_page
+
+    from qgis.PyQt.QtXml import QDomDocument
+
+    modele = QgsPrintLayout(project)
+    if os.path.exists(FICHIER_MODELE_MISE_EN_PAGE):
+        document = QDomDocument()
+        with open(FICHIER_MODELE_MISE_EN_PAGE, encoding="utf-8") as f:
+            document.setContent(f.read())
+        _, ok = modele.loadFromTemplate(document, QgsReadWriteContext())
+        if not ok:
+            raise Exception(f" Modèle de mise en page illisible : {FICHIER_MODELE_MISE_EN_PAGE}")
+        # images du modèle données par URL : copies locales du cache
+        ressources_mise_en_page.localiser_images(modele, DPI_EXPORT)
+        print(f" Modèle de mise en page lu : {FICHIER_MODELE_MISE_EN_PAGE}")
+    else:
+        modele.initializeDefaults()
+        construire_modele_mise_en_page(modele)
+        os.makedirs(os.path.dirname(FICHIER_MODELE_MISE_EN_PAGE), exist_ok=True)
+        modele.saveAsTemplate(FICHIER_MODELE_MISE_EN_PAGE, QgsReadWriteContext())
+        print(f" Modèle de mise en page enregistré : {FICHIER_MODELE_MISE_EN_PAGE}")
+
+    manquants = [element for element in ELEMENTS_DYNAMIQUES if modele.itemById(element) is None]
+    if manquants:
+        raise Exception(f" Éléments absents du modèle de mise en page : {', '.join(manquants)}")
+    modele_mise_en_page = modele
+    return modele
+
+
+def run_map_layout(musee):
+    #5
+    from qgis.core import QgsProject
+    from PyQt5.QtCore import QDate
+    import os
+    # Ajouter au début, avant toute manipulation de layout
+    project = QgsProject.instance()
+    manager = project.layoutManager()
 
     # --- Récupérer la valeur du champ identifiant_museofile ---
     identifiant = musee["identifiant_museofile"]
+
+    # Sécurité si le champ est vide
     if not identifiant:
-        identifiant = f"musee_{musee.id()}"  # fallback
+        identifiant = "identifiant_inconnu"
+
+    # Construire le nom du layout SANS nettoyage
+    layoutName = f"Carte_musee_{identifiant}"
+
+    # Vérification de la non-existence d'un layout de même nom
+    layouts_list = manager.printLayouts()
+    for layout in layouts_list:
+        if layout.name() == layoutName:
+            manager.removeLayout(layout)
+     
+    # Copie en mémoire du modèle (aucune relecture du .qpt, aucun élément fixe reconstruit)
+    layout = charger_modele_mise_en_page().clone()
+    layout.setName(layoutName)
+     
+    manager.addLayout(layout)
+
+    # Légende sur les couches de cette session (jamais reprise du modèle)
+    legende_couches_visibles(layout)
+
+    # Mettre finalement le canvas courant
+    map = layout.itemById("carte")
+    canvas = iface.mapCanvas()
+    map.setExtent(canvas.extent())
+
+    # Titre
+    # Nom du musee correct
+    nom_musee = str(musee["nom_officiel_du_musee"]) if musee["nom_officiel_du_musee"] else "Nom inconnu"
+    nom_musee = nom_musee[0].upper() + nom_musee[1:]  # Mettre 1ère lettre en majuscule
+
+    title = layout.itemById("titre")
+    title.setText(nom_musee)  #  insertion dynamique du nom du musée
+    title.adjustSizeToText()
+
+
+    #Texte d'information en dessous du titre
+    # Récupération des valeurs des champs
+    nom = musee['nom_officiel_du_musee']
+    date_appellation = musee['date_arrete_attribution_appellation']
+    adresse = musee['adresse']
+    code_postal = musee['code_postal']
+    commune = musee['commune']
+    tel = musee['telephone']
+    site = musee['url']
+
+    # Conversion de la date si nécessaire
+    date_str = ""
+    if date_appellation and isinstance(date_appellation, QDate):
+        date_str = date_appellation.toString("dd/MM/yyyy")
+
+    # Construction du texte avec conditions pour ignorer les champs vides
+    texte = ""
+
+    if nom and date_appellation:
+        texte += f"Le {nom} a obtenu l’appellation Musée de Paris le {date_str}.\n"
+
+    # Adresse complète
+    adresse_complete = " ".join(filter(None, [adresse, code_postal, commune]))
+    if adresse_complete:
+        texte += f"Adresse : {adresse_complete}\n"
+
+    if tel:
+        texte += f"Tél : {tel}\n"
+
+    if site:
+        texte += f"Site web : {site}"
+
+    layout.itemById("texte_musee").setText(texte)
+
+    # --- Récupération du champ "information_musee" ---
+    info = musee["information_musee"]
+    info = str(info) if info else ""
+    layout.itemById("information_musee").setText(info)
+
+    # Nord : le signe - compense la rotation inverse de QGIS
+    layout.itemById("nord").setRotation(-map.rotation())
+
+    #Mettre la carte de localisation
+    # --- Dossier où sont stockées les cartes de localisation ---
+    folder_localisation = os.path.join(monCheminDeBase, "localisation")  # le même que pour l'export
 
     # --- Construire le chemin du fichier PNG ---
+    if not musee["identifiant_museofile"]:
+        identifiant = f"musee_{musee.id()}"  # fallback
     localisation_image = os.path.join(folder_localisation, f"{identifiant}.png")
+
+    Cartelocalisation = layout.itemById("localisation")
     # --- Vérifier si le fichier existe ---
     if os.path.exists(localisation_image):
-        Cartelocalisation = QgsLayoutItemPicture(layout)
         Cartelocalisation.setPicturePath(localisation_image)
-
-        # Définir la taille et la position dans le layout principal
-        Cartelocalisation.attemptResize(QgsLayoutSize(55.676, 40.733, QgsUnitTypes.LayoutMillimeters))
-        Cartelocalisation.attemptMove(QgsLayoutPoint(125.014, 19.000, QgsUnitTypes.LayoutMillimeters))
-
-        # -------- Ajouter un cadre --------
-        Cartelocalisation.setFrameEnabled(True)                                 # active le cadre
-        Cartelocalisation.setFrameStrokeColor(QColor(0, 0, 255))                # couleur bleue
-        Cartelocalisation.setFrameStrokeWidth(QgsLayoutMeasurement(0.5))        # épaisseur en mm
-
-        layout.addLayoutItem(Cartelocalisation)
+        Cartelocalisation.setVisibility(True)
         print(f" Carte de localisation ajoutée avec cadre pour {identifiant}")
     else:
+        Cartelocalisation.setVisibility(False)
         print(f" Aucun fichier de localisation trouvé pour {identifiant}")
 
 
@@ -732,19 +1013,13 @@ def run_map_layout(musee):
 
 
     #Export_pdf
-    manager = QgsProject.instance().layoutManager()
-    layout = manager.layoutByName(layoutName)
-
-    if layout is None:
-        raise Exception("La mise en page n'existe pas !")
-
     exporter = QgsLayoutExporter(layout)
 
     # Construire le chemin PDF correctement
     pdf_path = os.path.join(monCheminDeBase, "cartes", f"{layoutName}.pdf")
 
     pdf_settings = QgsLayoutExporter.PdfExportSettings()
-    pdf_settings.dpi = 300
+    pdf_settings.dpi = DPI_EXPORT
 
     result = exporter.exportToPdf(pdf_path, pdf_settings)
 
@@ -756,61 +1031,448 @@ def run_map_layout(musee):
     pass
 
 
-# EXECUTION DES FONCTIONS
+# ---------------------------------------------------------------------
+#  FONCTION 3 bis : Atlas de tous les musées (une seule mise en page)
+
+# Musée de la page en cours de l'atlas, pour les filtres des couches (clé du stock : voir identifiant_musee)
+EXPRESSION_IDENTIFIANT_ATLAS = ("coalesce(attribute(@atlas_feature, 'identifiant_museofile'),"
+                                " 'musee_' || to_string(@atlas_featureid))")
+EXPRESSION_MUSEE_ATLAS = "$id = @atlas_featureid"
+EXPRESSION_ISOCHRONES_ATLAS = f"\"identifiant_museofile\" = {EXPRESSION_IDENTIFIANT_ATLAS}"
+
+# Titre et textes de la boucle, écrits en expressions QGIS (évaluées à chaque page)
+EXPRESSION_TITRE_ATLAS = ("[% upper(left(coalesce(\"nom_officiel_du_musee\", 'Nom inconnu'), 1))"
+                          " || substr(coalesce(\"nom_officiel_du_musee\", 'Nom inconnu'), 2) %]")
+EXPRESSION_TEXTE_ATLAS = """[% concat(
+    if("nom_officiel_du_musee" IS NOT NULL AND "date_arrete_attribution_appellation" IS NOT NULL,
+       'Le ' || "nom_officiel_du_musee" || ' a obtenu l’appellation Musée de Paris le '
+       || format_date("date_arrete_attribution_appellation", 'dd/MM/yyyy') || '.' || char(10), ''),
+    with_variable('adresse_complete',
+       array_to_string(array_filter(array(to_string("adresse"), to_string("code_postal"), to_string("commune")),
+                                    coalesce(@element, '') <> ''), ' '),
+       if(@adresse_complete <> '', 'Adresse : ' || @adresse_complete || char(10), '')),
+    if(coalesce("telephone", '') <> '', 'Tél : ' || "telephone" || char(10), ''),
+    if(coalesce("url", '') <> '', 'Site web : ' || "url", '')
+) %]"""
+EXPRESSION_INFORMATION_ATLAS = "[% coalesce(\"information_musee\", '') %]"
+
+CHAMP_MUSEES_ACCESSIBLES = "musees_accessibles"
+
+
+def gares_accessibles_par_musee(bande=BANDE_GARES):
+    """
+    Remplit le champ CHAMP_MUSEES_ACCESSIBLES des gares ("|id1|id2|" : musées
+    dont la bande (profil, secondes) contient la gare), pour que l'atlas
+    filtre les gares de chaque musée par expression. Renvoie le nombre de
+    couples (musée, gare).
+    """
+    from qgis.core import QgsField, QgsFeatureRequest
+    from PyQt5.QtCore import QVariant
 
-# =====================================================================
-#  BOUCLE GÉNÉRALE : TRAITEMENT DE CHAQUE MUSÉE
+    profil, value = bande
+    layer_iso = couche_isochrones()
+    layer_iso.setSubsetString("")
 
+    if CHAMP_MUSEES_ACCESSIBLES not in [f.name() for f in layer_gares.fields()]:
+        layer_gares.dataProvider().addAttributes([QgsField(CHAMP_MUSEES_ACCESSIBLES, QVariant.String)])
+        layer_gares.updateFields()
+    index_champ = layer_gares.fields().indexOf(CHAMP_MUSEES_ACCESSIBLES)
+
+    # géométries gardées en vie tant que constGet() est utilisé
+    geometries_gares = {g.id(): g.geometry() for g in layer_gares.getFeatures()}
+    accessibles = {fid: [] for fid in geometries_gares}
+
+    requete = QgsFeatureRequest().setFilterExpression(f"\"profil\" = '{profil}' AND \"value\" = {value}")
+    for f in layer_iso.getFeatures(requete):
+        geom_bande = f.geometry()
+        emprise = geom_bande.boundingBox()
+        moteur_bande = QgsGeometry.createGeometryEngine(geom_bande.constGet())
+        moteur_bande.prepareGeometry()
+        for fid, geom in geometries_gares.items():
+            if emprise.intersects(geom.boundingBox()) and moteur_bande.intersects(geom.constGet()):
+                accessibles[fid].append(str(f["identifiant_museofile"]))
+
+    valeurs = {fid: {index_champ: "|" + "|".join(ids) + "|" if ids else ""} for fid, ids in accessibles.items()}
+    layer_gares.dataProvider().changeAttributeValues(valeurs)
+    layer_gares.reload()
+    return sum(len(ids) for ids in accessibles.values())
+
+
+def symbologie_atlas(bande=BANDE_GARES):
+    """Symbologie des musées, des isochrones et des gares filtrée sur le musée de la page de l'atlas."""
+    from qgis.core import Qgis
+    profil_gares, iso_bande = bande
+    minutes = iso_bande // 60
 
-total = layer_musees.featureCount()
-print(f" Début du traitement automatique de {total} musées…")
+    # Musées : SVG pour le musée de la page, cercle vert pour les autres
+    svg_layer = QgsSvgMarkerSymbolLayer(os.path.join(monCheminDeBase, "icons", "museum1.svg"))
+    svg_layer.setSize(8)
+    symbol_musee_svg = QgsMarkerSymbol()
+    symbol_musee_svg.changeSymbolLayer(0, svg_layer)
+    symbol_other = QgsMarkerSymbol.createSimple({
+        'name': 'circle',
+        'color': '0,150,0',
+        'outline_color': '0,80,0',
+        'size': '3'
+    })
+    root_rule = QgsRuleBasedRenderer.Rule(None)
+    root_rule.appendChild(QgsRuleBasedRenderer.Rule(symbol_musee_svg, filterExp=EXPRESSION_MUSEE_ATLAS,
+                                                    label="Musée sélectionné"))
+    root_rule.appendChild(QgsRuleBasedRenderer.Rule(symbol_other, filterExp="ELSE", label="Autres musées"))
+    layer_musees.setRenderer(QgsRuleBasedRenderer(root_rule))
+
+    # Isochrones : catégories de couche_isochrones, sous une règle limitée au musée de la page
+    layer_iso = couche_isochrones()
+    regles = QgsRuleBasedRenderer.convertFromRenderer(layer_iso.renderer())
+    regle_musee = QgsRuleBasedRenderer.Rule(None, filterExp=EXPRESSION_ISOCHRONES_ATLAS)
+    for regle in regles.rootRule().children():
+        regle_musee.appendChild(regle.clone())
+    root_rule = QgsRuleBasedRenderer.Rule(None)
+    root_rule.appendChild(regle_musee)
+    layer_iso.setRenderer(QgsRuleBasedRenderer(root_rule))
+
+    # Gares : SVG pour les gares dans la bande du musée de la page, point rouge sinon
+    filtre_gares = f"\"{CHAMP_MUSEES_ACCESSIBLES}\" LIKE '%|' || {EXPRESSION_IDENTIFIANT_ATLAS} || '|%'"
+    svg_gare = QgsSvgMarkerSymbolLayer(os.path.join(monCheminDeBase, "icons", "railway.svg"))
+    svg_gare.setSize(5)
+    symbol_gare = QgsMarkerSymbol()
+    symbol_gare.changeSymbolLayer(0, svg_gare)
+    symbol_gare.setColor(QColor(102, 102, 204))
+    symbol_red = QgsMarkerSymbol.createSimple({
+        "name": "circle",
+        "size": "2",
+        "color": "red"
+    })
+    root_rule = QgsRuleBasedRenderer.Rule(None)
+    root_rule.appendChild(QgsRuleBasedRenderer.Rule(symbol_gare, filterExp=filtre_gares,
+                                                    label=f"Gares à {minutes} min du musée"))
+    root_rule.appendChild(QgsRuleBasedRenderer.Rule(symbol_red, filterExp="ELSE",
+                                                    label=f"Autres gares (+ de {minutes} min)"))
+    layer_gares.setRenderer(QgsRuleBasedRenderer(root_rule))
+
+    # Étiquettes des seules gares accessibles
+    text_format = QgsTextFormat()
+    text_format.setSize(10)
+    text_format.setColor(QColor("black"))
+    pal_layer = QgsPalLayerSettings()
+    pal_layer.fieldName = "nom_zda"
+    pal_layer.setFormat(text_format)
+    pal_layer.placement = Qgis.LabelPlacement.OrderedPositionsAroundPoint
+    pal_layer.prioritization = Qgis.LabelPrioritization.PreferPositionOrdering
+    pal_layer.dist = 3  # mm
+    root_rule = QgsRuleBasedLabeling.Rule(None)
+    rule_gares = QgsRuleBasedLabeling.Rule(pal_layer)
+    rule_gares.setDescription(f"Gares accessibles {minutes} min")
+    rule_gares.setFilterExpression(filtre_gares)
+    root_rule.appendChild(rule_gares)
+    layer_gares.setLabeling(QgsRuleBasedLabeling(root_rule))
+    layer_gares.setLabelsEnabled(True)
 
-for i, musee in enumerate(layer_musees.getFeatures(), start=1):
 
-    nom = musee["nom_officiel_du_musee"]
-    ident = musee["identifiant_museofile"]
+def exporter_atlas_en_parallele(layoutName, dossier_cartes):
+    """
+    Instantané du projet (symbologies et mise en page de l'atlas comprises),
+    puis un PDF par musée exporté par PROCESSUS_EXPORT_PDF processus.
+    """
+    # seules les couches sur disque sont relues par les processus d'export
+    memoire = [c.name() for c in project.mapLayers().values() if c.providerType() == "memory"]
+    if memoire:
+        print(f" Couches en mémoire absentes des exports parallèles : {', '.join(memoire)}")
+
+    chemin_projet = project.fileName()
+    os.makedirs(os.path.dirname(FICHIER_PROJET_EXPORT), exist_ok=True)
+    if not project.write(FICHIER_PROJET_EXPORT):
+        raise Exception(f" Instantané du projet impossible : {FICHIER_PROJET_EXPORT}")
+    project.setFileName(chemin_projet)   # le projet ouvert garde son fichier
+
+    travaux = []
+    for musee in layer_musees.getFeatures():
+        identifiant = musee["identifiant_museofile"] or "identifiant_inconnu"
+        travaux.append({"id": identifiant, "fid": musee.id(),
+                        "pdf": os.path.join(dossier_cartes, f"Carte_musee_{identifiant}.pdf")})
+
+    commande = commande_travailleur(FICHIER_PROJET_EXPORT, layoutName, DPI_EXPORT,
+                                    QgsApplication.prefixPath(), PYTHON_QGIS)
+    print(f"⏳ Export de {len(travaux)} PDF par {min(PROCESSUS_EXPORT_PDF, len(travaux))} processus…")
+    bilan = exporter_en_parallele(travaux, commande, PROCESSUS_EXPORT_PDF, env=environnement_travailleur(),
+                                  dossier_journaux=os.path.dirname(FICHIER_PROJET_EXPORT))
+    print(f" Export parallèle : {len(bilan['reussis'])} PDF en {bilan['duree']:.1f} s"
+          f" ({bilan['processus']} processus), {len(bilan['echecs'])} échecs.")
+    for identifiant, erreur in bilan["echecs"]:
+        print(f"   {identifiant} : {erreur}")
+    return bilan
+
+
+def run_atlas_musees():
+    """
+    Une seule mise en page (clone du modèle) pilotée par un atlas sur
+    Musees_Paris_4326 : QGIS parcourt les musées et réévalue titre, textes,
+    carte de localisation et filtres des couches à chaque page.
+    Export en un PDF par musée ou en un seul PDF (EXPORT_ATLAS) ; un PDF
+    par musée peut être exporté par plusieurs processus (PROCESSUS_EXPORT_PDF).
+    """
+    from qgis.core import QgsLayoutObject, QgsProperty
+    manager = project.layoutManager()
 
-    print("\n" + "="*70)
-    print(f"  Musée {i}/{total} : {nom} (ID {ident})")
-    print("="*70)
+    nb_couples = gares_accessibles_par_musee()
+    print(f" Gares accessibles : {nb_couples} couples (musée, gare) dans le champ {CHAMP_MUSEES_ACCESSIBLES}.")
+
+    # Symbologies remises en place après l'export (le canvas n'a pas de page d'atlas)
+    couches = [layer_musees, couche_isochrones(), layer_gares]
+    sauvegardes = [(couche, couche.renderer().clone(),
+                    couche.labeling().clone() if couche.labeling() else None, couche.labelsEnabled())
+                   for couche in couches]
+    symbologie_atlas()
+
+    layoutName = "Atlas_musees"
+    for ancien in manager.printLayouts():
+        if ancien.name() == layoutName:
+            manager.removeLayout(ancien)
+    layout = charger_modele_mise_en_page().clone()
+    layout.setName(layoutName)
+    manager.addLayout(layout)
 
-    # ------------------------------
-    # 1️⃣ Calcul isochrone
-    # ------------------------------
-    print(" Étape 1 : calcul des isochrones…")
-    run_isochrone_for_one_museum(musee)
+    # Carte centrée sur le musée de chaque page, à l'échelle de la boucle (1:10 000)
+    map = layout.itemById("carte")
+    map.setAtlasDriven(True)
+    map.setAtlasScalingMode(QgsLayoutItemMap.Fixed)
+    map.setScale(10000)
+
+    title = layout.itemById("titre")
+    title.setText(EXPRESSION_TITRE_ATLAS)
+    title.attemptResize(QgsLayoutSize(240, 10, QgsUnitTypes.LayoutMillimeters))   # texte variable : taille fixe
+    layout.itemById("texte_musee").setText(EXPRESSION_TEXTE_ATLAS)
+    layout.itemById("information_musee").setText(EXPRESSION_INFORMATION_ATLAS)
+
+    # Carte de localisation : chemin calculé par page, exclue de l'export si le PNG manque
+    dossier_localisation = os.path.join(monCheminDeBase, "localisation").replace("\\", "/").replace("'", "''")
+    chemin_localisation = (f"'{dossier_localisation}/' || coalesce(\"identifiant_museofile\", "
+                           "'musee_' || to_string($id)) || '.png'")
+    Cartelocalisation = layout.itemById("localisation")
+    Cartelocalisation.setVisibility(True)
+    proprietes = Cartelocalisation.dataDefinedProperties()
+    proprietes.setProperty(QgsLayoutObject.PictureSource, QgsProperty.fromExpression(chemin_localisation))
+    proprietes.setProperty(QgsLayoutObject.ExcludeFromExports,
+                           QgsProperty.fromExpression(f"NOT file_exists({chemin_localisation})"))
+    Cartelocalisation.setDataDefinedProperties(proprietes)
+
+    # Légende : couches de cette session, puis seulement les symboles présents sur la page
+    legende_couches_visibles(layout)
+    legend = layout.itemById("legende")
+    legend.setLegendFilterByMapEnabled(True)
+    legend.updateLegend()
 
-    # ------------------------------
-    # Définir le nom dynamique de la couche isochrone
-    # ------------------------------
-    nom_couche_iso = f"Isochrones_{ident}"
+    atlas = layout.atlas()
+    atlas.setCoverageLayer(layer_musees)
+    atlas.setHideCoverage(False)
+    atlas.setSortFeatures(True)
+    atlas.setSortExpression("\"nom_officiel_du_musee\"")
+    atlas.setFilenameExpression("'Carte_musee_' || coalesce(\"identifiant_museofile\", 'identifiant_inconnu')")
+    atlas.setEnabled(True)
 
-    # ------------------------------
-    # 2️⃣ Symbologie gares
-    # ------------------------------
-    print(" Étape 2 : symbologie et analyse des gares…")
-    run_symbology_gares(nom_couche_iso)
+    pdf_settings = QgsLayoutExporter.PdfExportSettings()
+    pdf_settings.dpi = DPI_EXPORT
+    dossier_cartes = os.path.join(monCheminDeBase, "cartes")
+    os.makedirs(dossier_cartes, exist_ok=True)
+    try:
+        if EXPORT_ATLAS == "unique":
+            pdf_path = os.path.join(dossier_cartes, f"{layoutName}.pdf")
+            result, erreur = QgsLayoutExporter.exportToPdf(atlas, pdf_path, pdf_settings)
+        elif PROCESSUS_EXPORT_PDF > 1:
+            pdf_path = dossier_cartes
+            bilan = exporter_atlas_en_parallele(layoutName, dossier_cartes)
+            result = QgsLayoutExporter.Success if not bilan["echecs"] else QgsLayoutExporter.FileError
+            erreur = f"{len(bilan['echecs'])} PDF non exportés (journaux : {os.path.dirname(FICHIER_PROJET_EXPORT)})"
+        else:
+            # le nom de chaque PDF vient de setFilenameExpression
+            pdf_path = dossier_cartes
+            result, erreur = QgsLayoutExporter.exportToPdfs(atlas, os.path.join(dossier_cartes, "atlas.pdf"),
+                                                            pdf_settings)
+    finally:
+        for couche, renderer, labeling, etiquettes in sauvegardes:
+            couche.setRenderer(renderer)
+            couche.setLabeling(labeling)
+            couche.setLabelsEnabled(etiquettes)
+            couche.triggerRepaint()
 
-    # ------------------------------
-    # 3️⃣ Mise en page + PDF
-    # ------------------------------
-    print(" Étape 3 : création du layout + export PDF…")
-    run_map_layout(musee)
+    if result == QgsLayoutExporter.Success:
+        print(f" Atlas exporté ({atlas.count()} musées) :", pdf_path)
+    else:
+        print(" Erreur lors de l'export de l'atlas :", erreur)
 
-    # ------------------------------
-    # 4️⃣ Supprimer la couche d'isochrones et le fichier GeoJSON
-    # ------------------------------
 
-    # 1. Supprimer la couche si elle existe
-    iso_layer = project.mapLayersByName(nom_couche_iso)
-    if iso_layer:
-        iso_layer = iso_layer[0]
-        QgsProject.instance().removeMapLayer(iso_layer.id())
-        print(f" Couche d'isochrones supprimée : {nom_couche_iso}")
+# ---------------------------------------------------------------------
+#  FONCTION 4 : Couverture de Paris par les isochrones de tous les musées
+
+def telecharger_arrondissements():
+    """
+    Télécharge les arrondissements dans FICHIER_ARRONDISSEMENTS ; renvoie le
+    motif de l'échec, ou None. Seule une FeatureCollection de polygones est
+    gardée (pas de page d'erreur ni de réponse tronquée servie en 200), et
+    le fichier est écrit à part puis renommé.
+    """
+    try:
+        reponse = requests.get(URL_ARRONDISSEMENTS, timeout=60)
+        reponse.raise_for_status()
+        contenu = json.loads(reponse.content)
+    except (requests.RequestException, ValueError) as erreur:
+        return str(erreur)
+    features = contenu.get("features") if isinstance(contenu, dict) else None
+    if (not isinstance(contenu, dict) or contenu.get("type") != "FeatureCollection" or not features
+            or not all((f.get("geometry") or {}).get("type") in ("Polygon", "MultiPolygon") for f in features)):
+        return f"réponse inattendue ({reponse.headers.get('Content-Type')}), pas une FeatureCollection de polygones"
+
+    temporaire = FICHIER_ARRONDISSEMENTS + ".tmp"
+    with open(temporaire, "wb") as f:
+        f.write(reponse.content)
+    os.replace(temporaire, FICHIER_ARRONDISSEMENTS)
+    return None
+
+
+def zones_couverture():
+    """[(code, nom, géométrie lon/lat)] des arrondissements, ou Paris entier si le fichier est indisponible."""
+    if not os.path.exists(FICHIER_ARRONDISSEMENTS):
+        erreur = telecharger_arrondissements()
+        if erreur is not None:
+            print(f" Arrondissements indisponibles ({erreur}) : couverture calculée sur Paris entier.")
+            layer_paris = project.mapLayersByName("Paris")[0]
+            transformation = QgsCoordinateTransform(layer_paris.crs(), QgsCoordinateReferenceSystem("EPSG:4326"),
+                                                    project)
+            zones = []
+            for entite in layer_paris.getFeatures():
+                geometrie = QgsGeometry(entite.geometry())
+                geometrie.transform(transformation)
+                zones.append((None, entite["NOM"], json.loads(geometrie.asJson())))
+            return zones
+    return lire_zones(FICHIER_ARRONDISSEMENTS)
+
+
+def run_couverture_paris(identifiants, bande=BANDE_COUVERTURE):
+    """Union de la bande des musées identifiants (clés du stock), découpée par arrondissement : couche + CSV."""
+    profil, value = bande
+    entites, statistiques = analyser_couverture(stock_isochrones, zones_couverture(), profil, value, identifiants)
+
+    nom = f"Couverture_{int(value) // 60}min_{profil}"
+    os.makedirs(DOSSIER_COUVERTURE, exist_ok=True)
+    chemin_geojson = os.path.join(DOSSIER_COUVERTURE, f"{nom}.geojson")
+    chemin_csv = os.path.join(DOSSIER_COUVERTURE, f"{nom}.csv")
+    ecrire_couverture(entites, statistiques, chemin_geojson, chemin_csv)
+
+    for ligne in statistiques:
+        print(f"   {ligne['nom'] or ligne['code']!s:<22s} {ligne['part_couverte']:5.1f} % couverts"
+              f" ({ligne['couverte_ha']:.0f} / {ligne['surface_ha']:.0f} ha),"
+              f" {ligne['musees_dans_zone']} musées, {ligne['musees_a_portee']} à portée")
+    print(f" Statistiques de couverture : {chemin_csv}")
+
+    #            SYMBOLOGIE : parties couvertes, teinte selon la part couverte de l'arrondissement
+
+    for ancienne in project.mapLayersByName(nom):
+        project.removeMapLayer(ancienne)
+    couche = QgsVectorLayer(chemin_geojson, nom, "ogr")
+    if not couche.isValid():
+        raise Exception(f" Couche de couverture illisible : {chemin_geojson}")
+
+    # Palette ColorBrewer Greens
+    classes = [
+        (0, 25, QColor(199, 233, 192)),
+        (25, 50, QColor(161, 217, 155)),
+        (50, 75, QColor(65, 171, 93)),
+        (75, 100, QColor(0, 109, 44)),
+    ]
+    plages = []
+    for bas, haut, color in classes:
+        symbol = QgsFillSymbol.createSimple({
+            'color': f'{color.red()},{color.green()},{color.blue()},150',
+            'outline_style': 'no'
+        })
+        plages.append(QgsRendererRange(bas, haut, symbol, f"{bas} à {haut} % de l'arrondissement couverts"))
+    couche.setRenderer(QgsGraduatedSymbolRenderer("part_couverte", plages))
+    project.addMapLayer(couche)
+    return statistiques
 
-    # 2. Attendre la libération du fichier GeoJSON
-    import time
-    time.sleep(0.5)
 
+# EXECUTION DES FONCTIONS
+
+# =====================================================================
+#  BOUCLE GÉNÉRALE : TRAITEMENT DE CHAQUE MUSÉE
+
+
+total = layer_musees.featureCount()
+print(f" Début du traitement automatique de {total} musées…")
+
+# ------------------------------
+# 0️⃣ Isochrones de tous les musées, par lots de TAILLE_LOT_ISOCHRONES
+#    (ou tous d'un coup avec le moteur local), rangés dans le stock GeoPackage
+# ------------------------------
+points_musees = {}
+for musee in layer_musees.getFeatures():
+    pt = musee.geometry().asPoint()
+    points_musees[identifiant_musee(musee)] = (pt.x(), pt.y())
+
+print(f"⏳ Isochrones de tous les musées (moteur {MOTEUR_ISOCHRONES}, {TAILLE_LOT_ISOCHRONES} musées par requête ORS)…")
+isochrones_calcules, stats_ors = calculer_isochrones(points_musees, TAILLE_LOT_ISOCHRONES)
+print(f" Isochrones par lots : {stats_ors['appels']} requêtes ORS pour {stats_ors['musees']} musées"
+      f" ({stats_ors['depuis_cache']} depuis le cache, {stats_ors['appels_evites']} requêtes évitées).")
+stocker_isochrones(isochrones_calcules, identifiants_actuels=set(points_musees))
+print(f" Stock des isochrones : {FICHIER_STOCK_ISOCHRONES}")
+
+if MODE_MISE_EN_PAGE == "atlas":
+    # ------------------------------
+    # 1️⃣ à 3️⃣ Un atlas pour tous les musées : QGIS filtre et met en page chaque musée
+    # ------------------------------
+    print(" Étapes 1 à 3 : atlas de tous les musées + export PDF…")
+    run_atlas_musees()
+
+else:
+    # chaque carte de la boucle dépend de l'état des couches au moment de son export
+    if PROCESSUS_EXPORT_PDF > 1:
+        print(" Export parallèle réservé au mode atlas : PDF exportés un par un dans QGIS.")
+    for i, musee in enumerate(layer_musees.getFeatures(), start=1):
+
+        nom = musee["nom_officiel_du_musee"]
+        ident = musee["identifiant_museofile"]
+
+        print("\n" + "="*70)
+        print(f"  Musée {i}/{total} : {nom} (ID {ident})")
+        print("="*70)
+
+        # ------------------------------
+        # 1️⃣ Calcul isochrone
+        # ------------------------------
+        print(" Étape 1 : calcul des isochrones…")
+        run_isochrone_for_one_museum(musee)
+
+        # ------------------------------
+        # 2️⃣ Symbologie gares (couche des isochrones filtrée sur le musée)
+        # ------------------------------
+        print(" Étape 2 : symbologie et analyse des gares…")
+        run_symbology_gares(NOM_COUCHE_ISOCHRONES)
+
+        # ------------------------------
+        # 3️⃣ Mise en page + PDF
+        # ------------------------------
+        print(" Étape 3 : création du layout + export PDF…")
+        run_map_layout(musee)
+
+
+# ------------------------------
+# 4️⃣ Couche des isochrones sans filtre : tous les musées visibles et interrogeables d'un coup
+# ------------------------------
+couche_isochrones().setSubsetString("")
+
+# ------------------------------
+# 5️⃣ Couverture de Paris (si CALCULER_COUVERTURE) : union des bandes BANDE_COUVERTURE
+#    des musées de la couche, par arrondissement
+# ------------------------------
+if CALCULER_COUVERTURE:
+    print(f"⏳ Couverture de Paris à {BANDE_COUVERTURE[1] // 60} min ({BANDE_COUVERTURE[0]}) d'un musée…")
+    run_couverture_paris(set(points_musees))
+stock_isochrones.fermer()
 
 print(" Tous les musées ont été traités !")
+print(f" Cache des isochrones : {cache_isochrones.succes} trouvés, {cache_isochrones.echecs} calculés.")
+if MOTEUR_ISOCHRONES == "ors":
+    print(f" Requêtes ORS : {limiteur_ors.envois} envois, {limiteur_ors.reessais} réessais,"
+          f" {limiteur_ors.attente:.1f} s d'attente de quota.")
+print(f" Logos de la mise en page : {ressources_mise_en_page.telechargements} téléchargés,"
+      f" {ressources_mise_en_page.depuis_cache} repris du cache local.")
@@ -0,0 +1,486 @@
+"""
+===========================================================
+MODULE — APPARIEMENT DES NOMS DE MUSÉES (JOINTURE WIKIPÉDIA)
+===========================================================
+Fonctions utilisées par la section « jointure » du script 2 pour relier
+chaque musée de la couche Musees_Paris_4326 à une entrée de la liste
+scrapée sur Wikipédia (scrap_data).
+
+Chaque entrée de scrap_data est un dictionnaire :
+    {"nom": ..., "tokens": tokens_nom(nom), "url_original": ..., "url_clean": ...}
+les mots sont normalisés par normalisation_texte (sans accents ni mots
+vides), comme pour les variantes de titres du scraping.
+
+Première passe — similarité de Jaccard sur les mots :
+- meilleur_match_exhaustif : la boucle historique, qui compare chaque
+  musée à toutes les entrées (N × M comparaisons)
+- IndexTokens : index inversé mot → entrées, seules les entrées qui
+  partagent un mot non vide avec le musée sont évaluées une à une
+- jaccard_par_lots : tous les musées d'un coup, par produit de matrices
+  creuses (NumPy / SciPy si disponibles, sinon IndexTokens)
+
+Deuxième passe — URL du site du musée comparée aux noms scrapés :
+- meilleur_match_url_exhaustif : la boucle historique (difflib sur tout)
+- RechercheFloue : bornes supérieures du ratio difflib pour écarter
+  la plupart des entrées avant le calcul exact
+
+IndexTokens et RechercheFloue renvoient exactement le même résultat que
+les boucles exhaustives pour tout score ≥ seuil (même entrée en cas
+d'égalité : la première dans l'ordre de scrap_data).
+"""
+
+import difflib
+import hashlib
+import re
+from collections import Counter
+
+from normalisation_texte import mots_significatifs, replier_accents
+
+# NumPy / SciPy sont facultatifs (jaccard_par_lots) : sans eux, repli sur IndexTokens
+try:
+    import numpy as np
+    from scipy import sparse
+except ImportError:
+    np = None
+    sparse = None
+
+
+# ---------------------------------------------------------
+#            MOTS D'UN NOM
+
+def tokens_nom(nom):
+    """
+    Ensemble des mots significatifs d'un nom : normalisation partagée avec
+    generate_title_variants (minuscules, sans accents, sans mots vides),
+    mise en cache par normalisation_texte.
+    """
+    return set(mots_significatifs(nom)) if nom else set()
+
+
+# ---------------------------------------------------------
+#            VERSION EXHAUSTIVE (RÉFÉRENCE)
+
+def meilleur_match_exhaustif(tokens_sig, scrap_data):
+    """Boucle historique : renvoie (meilleur_match, meilleur_score)."""
+    meilleur_match = None
+    meilleur_score = 0
+
+    for s in scrap_data:
+        inter = tokens_sig & s["tokens"]
+        union = tokens_sig | s["tokens"]
+        score_token = len(inter) / len(union) if union else 0
+
+        if score_token > meilleur_score:
+            meilleur_score = score_token
+            meilleur_match = s
+
+    return meilleur_match, meilleur_score
+
+
+# ---------------------------------------------------------
+#            INDEX INVERSÉ
+
+class IndexTokens:
+    """
+    Index inversé mot → positions dans scrap_data.
+
+    Les mots vides ("musée", "de", "la"…) sont déjà retirés des ensembles de
+    mots (mots_significatifs) : une entrée sans mot commun avec le musée a
+    un score nul. Seules les entrées qui partagent au moins un mot sont
+    évaluées, et l'intersection est comptée avec l'index.
+
+    Le résultat est celui de la boucle exhaustive : meilleur score, et en cas
+    d'égalité l'entrée la plus haute dans scrap_data.
+    """
+
+    def __init__(self, scrap_data):
+        self.scrap_data = scrap_data
+        self.postings = {}
+        self.tailles = []
+        for i, s in enumerate(scrap_data):
+            self.tailles.append(len(s["tokens"]))
+            for t in s["tokens"]:
+                self.postings.setdefault(t, []).append(i)
+        self.nb_scores = 0  # nombre de scores calculés (pour les benchmarks)
+
+    def meilleur_match(self, tokens_sig, seuil):
+        """
+        Renvoie (meilleur_match, meilleur_score) si le score atteint le seuil,
+        sinon (None, meilleur score trouvé).
+        """
+        n_sig = len(tokens_sig)
+
+        # nombre de mots communs avec chaque entrée qui en partage au moins un
+        communs = {}
+        for t in tokens_sig:
+            for i in self.postings.get(t, ()):
+                communs[i] = communs.get(i, 0) + 1
+
+        # (score, -position) : le plus grand couple donne le meilleur score
+        # et, à égalité, la première position dans scrap_data
+        meilleur = (0, float("-inf"))
+        for i, n_inter in communs.items():
+            score = n_inter / (n_sig + self.tailles[i] - n_inter)
+            if (score, -i) > meilleur:
+                meilleur = (score, -i)
+        self.nb_scores += len(communs)
+
+        score, position = meilleur
+        if position == float("-inf") or score < seuil:
+            return None, score
+        return self.scrap_data[-position], score
+
+
+# ---------------------------------------------------------
+#            JACCARD PAR LOTS (MATRICES CREUSES)
+
+def jaccard_par_lots(tokens_officiels, tokens_scrapes, seuil=0.0, taille_lot=500):
+    """
+    Meilleur appariement de Jaccard de chaque ensemble de tokens_officiels
+    parmi tokens_scrapes, en un seul appel. Sert à la jointure des musées,
+    mais aussi à relier d'autres couches (gares, monuments…) à une liste
+    Wikipédia : il suffit de fournir les ensembles de mots des deux côtés.
+
+    Renvoie une liste de (position, score) alignée sur tokens_officiels :
+    position = indice dans tokens_scrapes, ou None si le meilleur score est
+    sous le seuil (ou nul). En cas d'égalité, la première position l'emporte,
+    comme dans la boucle exhaustive.
+
+    Avec NumPy / SciPy, les deux listes deviennent des matrices d'incidence
+    creuses (une ligne par nom, une colonne par mot) : le produit A × Bᵀ donne
+    la taille de toutes les intersections, et les scores d'un lot de
+    taille_lot musées sont calculés en une opération sur tableaux (la mémoire
+    reste bornée à taille_lot × len(tokens_scrapes) scores). Sans SciPy (installation QGIS minimale),
+    le calcul passe par IndexTokens, avec le même résultat.
+    """
+    if sparse is None:
+        entrees = [{"tokens": t, "position": j} for j, t in enumerate(tokens_scrapes)]
+        index = IndexTokens(entrees)
+        resultats = []
+        for tokens_sig in tokens_officiels:
+            match, score = index.meilleur_match(tokens_sig, seuil)
+            resultats.append((match["position"] if match else None, score))
+        return resultats
+
+    vocabulaire = {}
+
+    def incidence(ensembles):
+        colonnes, debuts = [], [0]
+        for ensemble in ensembles:
+            colonnes.extend(vocabulaire.setdefault(t, len(vocabulaire)) for t in ensemble)
+            debuts.append(len(colonnes))
+        return colonnes, debuts
+
+    colonnes_b, debuts_b = incidence(tokens_scrapes)
+    colonnes_a, debuts_a = incidence(tokens_officiels)
+    forme = len(vocabulaire)
+    a = sparse.csr_matrix(
+        (np.ones(len(colonnes_a), dtype=np.int32), colonnes_a, debuts_a),
+        shape=(len(tokens_officiels), forme))
+    b_t = sparse.csr_matrix(
+        (np.ones(len(colonnes_b), dtype=np.int32), colonnes_b, debuts_b),
+        shape=(len(tokens_scrapes), forme)).T.tocsr()
+    tailles_a = np.diff(np.asarray(debuts_a))
+    tailles_b = np.diff(np.asarray(debuts_b))
+
+    resultats = []
+    for debut in range(0, len(tokens_officiels), taille_lot):
+        # intersections du lot (presque tous les noms partagent "musée" : le
+        # résultat est quasi plein, on le passe en tableau dense)
+        inter = (a[debut:debut + taille_lot] @ b_t).toarray()
+        union = tailles_a[debut:debut + taille_lot, None] + tailles_b[None, :] - inter
+        scores = np.divide(inter, union, out=np.zeros(inter.shape), where=union > 0)
+        # argmax renvoie la première position en cas d'égalité
+        positions = scores.argmax(axis=1) if scores.shape[1] else np.zeros(len(scores), dtype=int)
+        for ligne, position in enumerate(positions):
+            score = float(scores[ligne, position]) if scores.shape[1] else 0
+            resultats.append((int(position) if score > 0 and score >= seuil else None, score))
+    return resultats
+
+
+# ---------------------------------------------------------
+#            DEUXIÈME PASSE (URL DU MUSÉE → NOM SCRAPÉ)
+
+def meilleur_match_url_exhaustif(url_sig_clean, scrap_data):
+    """Boucle historique de la deuxième passe : sous-chaîne exacte, sinon difflib."""
+    meilleur_match = None
+    meilleur_score = 0
+
+    for s in scrap_data:
+        score_url = 1.0 if url_sig_clean and url_sig_clean in s["nom"] else 0
+        if score_url == 0:
+            score_url = difflib.SequenceMatcher(None, url_sig_clean, s["nom"]).ratio()
+
+        if score_url > meilleur_score:
+            meilleur_score = score_url
+            meilleur_match = s
+
+    return meilleur_match, meilleur_score
+
+
+class RechercheFloue:
+    """
+    Deuxième passe sans SequenceMatcher sur toute la liste.
+
+    Pour une URL donnée, les entrées de scrap_data sont filtrées par des
+    bornes supérieures du ratio difflib de plus en plus fines :
+    1. quick_ratio (caractères communs) pour toutes les entrées d'un coup,
+       grâce à un index inversé caractère → (entrée, nombre d'occurrences) :
+       les entrées sans caractère commun ne sont jamais visitées. Cette borne
+       est toujours ≤ real_quick_ratio (longueurs seules), qui n'apporte donc
+       rien de plus une fois quick_ratio connu.
+    2. plus longue sous-séquence commune (LCS) par calcul bit-parallèle,
+       arrêté dès que la distance d'édition (insertions / suppressions)
+       dépasse ce que le score visé autorise ; les blocs de difflib forment
+       une sous-séquence commune, donc 2 × LCS / longueurs ≥ ratio
+    3. ratio exact, avec un SequenceMatcher par entrée (l'analyse du nom
+       n'est faite qu'une fois)
+
+    Les entrées sont examinées par borne décroissante : dès que la borne
+    passe sous le seuil ou sous le meilleur score trouvé, la recherche s'arrête.
+
+    Le résultat est celui de meilleur_match_url_exhaustif dès que le score
+    atteint le seuil (même entrée en cas d'égalité : la première dans
+    l'ordre de scrap_data).
+    """
+
+    def __init__(self, scrap_data):
+        self.scrap_data = scrap_data
+        self.noms = [s["nom"] for s in scrap_data]
+        self.caracteres = {}
+        self.masques = []
+        for i, nom in enumerate(self.noms):
+            masques = {}
+            for j, c in enumerate(nom):
+                masques[c] = masques.get(c, 0) | (1 << j)
+            self.masques.append(masques)
+            for c, n in Counter(nom).items():
+                self.caracteres.setdefault(c, []).append((i, n))
+        self._matchers = {}
+        # nombre d'entrées arrivées à chaque étape (pour les benchmarks)
+        self.nb_etapes = {"caracteres": 0, "lcs": 0, "difflib": 0}
+
+    @staticmethod
+    def _ratio(correspondances, longueur):
+        # même calcul que difflib, pour des comparaisons exactes entre flottants
+        return 2.0 * correspondances / longueur if longueur else 1.0
+
+    def _lcs_bornee(self, a, i, minimum):
+        """
+        Longueur de la LCS entre a et le nom i (algorithme bit-parallèle de
+        Hyyrö), ou None dès qu'elle ne peut plus atteindre minimum.
+        """
+        masques = self.masques[i]
+        m = len(self.noms[i])
+        plein = (1 << m) - 1
+        v = plein
+        reste = len(a)
+        for c in a:
+            u = v & masques.get(c, 0)
+            v = ((v + u) | (v - u)) & plein
+            reste -= 1
+            # LCS courante + caractères restants de a : borne de la LCS finale
+            if m - bin(v).count("1") + reste < minimum:
+                return None
+        return m - bin(v).count("1")
+
+    def _ratio_exact(self, a, i):
+        matcher = self._matchers.get(i)
+        if matcher is None:
+            matcher = self._matchers[i] = difflib.SequenceMatcher(None, "", self.noms[i])
+        matcher.set_seq1(a)
+        return matcher.ratio()
+
+    def meilleur_match(self, url_sig_clean, seuil, positions=None):
+        """
+        Renvoie (meilleur_match, meilleur_score) si le score atteint le seuil,
+        sinon (None, meilleur score trouvé ou 0).
+        positions : sous-ensemble trié de scrap_data à examiner (blocage LSH).
+        """
+        a = url_sig_clean
+
+        # URL vide : pas de sous-chaîne possible, boucle historique (triviale)
+        if not a:
+            liste = self.scrap_data if positions is None else [self.scrap_data[i] for i in positions]
+            match, score = meilleur_match_url_exhaustif(a, liste)
+            return (match, score) if match and score >= seuil else (None, score)
+
+        # Sous-chaîne exacte : score 1.0, le maximum possible
+        for i in (range(len(self.noms)) if positions is None else positions):
+            if a in self.noms[i]:
+                return self.scrap_data[i], 1.0
+
+        # 1) Caractères communs de toutes les entrées en un passage sur l'index
+        communs = {}
+        for c, n in Counter(a).items():
+            for i, n_i in self.caracteres.get(c, ()):
+                communs[i] = communs.get(i, 0) + (n if n < n_i else n_i)
+        if positions is not None:
+            retenues = set(positions)
+            communs = {i: n for i, n in communs.items() if i in retenues}
+        self.nb_etapes["caracteres"] += len(communs)
+
+        la = len(a)
+        bornes = sorted(
+            ((self._ratio(n, la + len(self.noms[i])), -i, n) for i, n in communs.items()),
+            reverse=True,
+        )
+
+        meilleur = (0, float("-inf"))
+        for borne, moins_i, n_car in bornes:
+            if borne < seuil or (borne, moins_i) < meilleur:
+                break
+            i = -moins_i
+            longueur = la + len(self.noms[i])
+
+            # 2) LCS bornée : nombre minimal de caractères communs pour battre
+            # le meilleur score actuel et atteindre le seuil
+            self.nb_etapes["lcs"] += 1
+            minimum = max(0, int(max(seuil, meilleur[0]) * longueur / 2) - 1)
+            while minimum < n_car and (
+                    self._ratio(minimum, longueur) < seuil or (self._ratio(minimum, longueur), moins_i) < meilleur):
+                minimum += 1
+            lcs = self._lcs_bornee(a, i, minimum)
+            if lcs is None:
+                continue
+            borne = self._ratio(lcs, longueur)
+            if borne < seuil or (borne, moins_i) < meilleur:
+                continue
+
+            # 3) Ratio exact
+            self.nb_etapes["difflib"] += 1
+            score = self._ratio_exact(a, i)
+            if (score, moins_i) > meilleur:
+                meilleur = (score, moins_i)
+
+        score, position = meilleur
+        if position == float("-inf") or score < seuil:
+            return None, score
+        return self.scrap_data[-position], score
+
+
+# ---------------------------------------------------------
+#            BLOCAGE MINHASH / LSH (GRANDS VOLUMES)
+
+_MOTIF_URL = re.compile(r'^(https?://)?(www\.)?|\.(fr|com|org|net|paris|eu)(/.*)?$')
+
+
+def elements_nom(nom, taille_shingle=3):
+    """
+    Éléments comparés par MinHash : les mots non vides du nom et les
+    n-grammes de caractères du nom réduit à ces mots.
+    """
+    mots = list(mots_significatifs(nom)) if nom else []
+    texte = " ".join(mots)
+    elements = {"m:" + m for m in mots}
+    if len(texte) <= taille_shingle:
+        if texte:
+            elements.add("c:" + texte)
+    else:
+        elements.update("c:" + texte[i:i + taille_shingle] for i in range(len(texte) - taille_shingle + 1))
+    return elements
+
+
+def elements_url(url, taille_shingle=3):
+    """Même découpage pour l'URL du site du musée (sans http, www et extension)."""
+    return elements_nom(_MOTIF_URL.sub(" ", replier_accents(url)) if url else "", taille_shingle)
+
+
+class BlocageLSH:
+    """
+    Propose des paires candidates (musée, entrée scrapée) en temps quasi
+    linéaire, au lieu de comparer chaque musée à toutes les entrées.
+
+    Chaque nom reçoit une signature MinHash de nb_bandes × lignes_par_bande
+    valeurs ; la signature est découpée en bandes et deux noms sont candidats
+    s'ils ont au moins une bande identique. La probabilité d'être candidats
+    vaut environ 1 - (1 - J^lignes)^bandes pour une similarité de Jaccard J
+    entre leurs éléments (mots + n-grammes de caractères).
+
+    La signature est calculée par « one permutation hashing » : chaque
+    élément n'est haché qu'une fois et tombe dans une des cases de la
+    signature (on garde le minimum par case) ; les cases vides reprennent
+    la valeur de la case pleine suivante (densification par rotation).
+
+    Les seaux trop remplis (au-delà de taille_max_seau entrées) sont ignorés
+    pour rester linéaire quand un fragment est très fréquent.
+    """
+
+    def __init__(self, nb_bandes=32, lignes_par_bande=2, taille_shingle=3,
+                 taille_max_seau=500, graine=1):
+        self.nb_bandes = nb_bandes
+        self.lignes_par_bande = lignes_par_bande
+        self.taille_shingle = taille_shingle
+        self.taille_max_seau = taille_max_seau
+        self.nb_cases = nb_bandes * lignes_par_bande
+        self.graine = graine.to_bytes(8, "little")
+        self.seaux = {}
+        self.nb_entrees = 0
+        self._hash_elements = {}
+
+    def _hash_element(self, element):
+        # hash() de Python change à chaque session : on utilise blake2b
+        h = self._hash_elements.get(element)
+        if h is None:
+            h = int.from_bytes(
+                hashlib.blake2b(element.encode("utf-8"), digest_size=8, key=self.graine).digest(), "little")
+            self._hash_elements[element] = h
+        return h
+
+    def signature(self, elements):
+        """Signature MinHash d'un ensemble d'éléments (None si l'ensemble est vide)."""
+        if not elements:
+            return None
+        k = self.nb_cases
+        cases = [None] * k
+        for e in elements:
+            case, valeur = divmod(self._hash_element(e), 1 << 56)
+            case %= k
+            if cases[case] is None or valeur < cases[case]:
+                cases[case] = valeur
+
+        # Densification : une case vide prend la valeur de la prochaine case
+        # pleine (en tournant), décalée selon la distance parcourue
+        signature = list(cases)
+        for j in range(k):
+            if cases[j] is None:
+                distance = 1
+                while cases[(j + distance) % k] is None:
+                    distance += 1
+                signature[j] = cases[(j + distance) % k] + distance * (1 << 56)
+        return signature
+
+    def _bandes(self, signature):
+        r = self.lignes_par_bande
+        for k in range(self.nb_bandes):
+            yield (k, tuple(signature[k * r:(k + 1) * r]))
+
+    def indexer(self, scrap_data):
+        """Range chaque entrée de scrap_data dans les seaux de ses bandes."""
+        self.seaux = {}
+        self.nb_entrees = len(scrap_data)
+        for i, s in enumerate(scrap_data):
+            sig = self.signature(elements_nom(s["nom"], self.taille_shingle))
+            if sig is None:
+                continue
+            for bande in self._bandes(sig):
+                self.seaux.setdefault(bande, []).append(i)
+        return self
+
+    def candidats(self, elements):
+        """Positions (triées) des entrées de scrap_data proches de ces éléments."""
+        sig = self.signature(elements)
+        if sig is None:
+            return []
+        positions = set()
+        for bande in self._bandes(sig):
+            seau = self.seaux.get(bande)
+            if seau and len(seau) <= self.taille_max_seau:
+                positions.update(seau)
+        return sorted(positions)
+
+    def candidats_musee(self, nom_sig, url_sig):
+        """Candidats d'un musée : proches de son nom officiel ou de l'URL de son site."""
+        positions = set(self.candidats(elements_nom(nom_sig, self.taille_shingle)))
+        positions.update(self.candidats(elements_url(url_sig, self.taille_shingle)))
+        return sorted(positions)
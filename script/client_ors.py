@@ -0,0 +1,379 @@
+"""
+===========================================================
+MODULE — CLIENT OPENROUTESERVICE (ISOCHRONES)
+===========================================================
+Requêtes d'isochrones piétons vers l'API OpenRouteService (ORS), utilisées
+par le script 3 et par Traitement_boucle_3_4_5_tous_musee.
+
+L'endpoint /v2/isochrones/{profil} accepte plusieurs points dans
+"locations" (5 au maximum sur l'API publique) : isochrones_par_lots
+regroupe les musées par lots, envoie une requête par lot, puis redécoupe
+la FeatureCollection renvoyée par musée grâce à la propriété group_index
+(position du point dans "locations").
+
+CacheIsochrones garde chaque isochrone dans un fichier dont le nom est
+l'empreinte de la requête (profil, lon/lat arrondis, ranges, unités,
+version du moteur) : un musée déjà calculé avec les mêmes paramètres
+n'est plus redemandé à ORS. Les fichiers sont en GeoJSON, ou dans le
+format binaire compact de simplification_isochrones (sans perte).
+
+LimiteurDebit répartit les envois selon les quotas du compte ORS (seau à
+jetons par minute, compteur journalier) ; les réponses 429 et les erreurs
+passagères sont réessayées après le délai Retry-After ou un délai
+exponentiel aléatoire, et plusieurs lots peuvent être en cours à la fois
+pour rester au débit maximal permis par le quota.
+
+Utilisation dans QGIS (le dossier script/ doit être dans sys.path) :
+    from client_ors import isochrones_par_lots
+    resultats, stats = isochrones_par_lots({"M0363": (2.35, 48.85)}, ORS_URL, ORS_API_KEY)
+"""
+
+import collections
+import hashlib
+import json
+import os
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from email.utils import parsedate_to_datetime
+
+import requests
+
+from simplification_isochrones import decoder_binaire, encoder_binaire
+
+
+# Paramètres des isochrones du projet : 5 et 10 minutes de marche
+PARAMETRES_ISOCHRONES = {
+    "range": [300, 600],  # 5, 10 minutes
+    "units": "m",
+    "location_type": "start",
+}
+
+# Nombre maximal de points par requête accepté par l'API publique ORS
+TAILLE_LOT_ORS = 5
+
+# Nombre maximal de valeurs dans "range" pour une requête ORS
+MAX_BANDES_ORS = 10
+
+# Version du moteur de calcul, dans la clé du cache : à changer pour
+# invalider les isochrones stockés (nouvelle version d'ORS, autre moteur…)
+VERSION_MOTEUR = "ors-v2"
+
+# Arrondi des coordonnées dans la clé (5 décimales ≈ 1 m)
+DECIMALES_CLE = 5
+
+# Quotas du compte gratuit ORS pour l'endpoint isochrones
+QUOTA_MINUTE_ORS = 20
+QUOTA_JOUR_ORS = 500
+
+# Réessais : nombre d'essais par requête, délai de base et plafond (secondes)
+ESSAIS_MAX_ORS = 6
+DELAI_BASE_ORS = 1.0
+DELAI_MAX_ORS = 60.0
+# Codes HTTP passagers, réessayés (429 : quota dépassé)
+CODES_REESSAI = (429, 500, 502, 503, 504)
+# Marge ajoutée à la fenêtre du quota : le serveur compte une requête à son
+# arrivée, un peu après son départ du client
+MARGE_FENETRE = 0.5
+DELAI_REPONSE_ORS = 60
+
+
+class LimiteurDebit:
+    """
+    Seau à jetons partagé par toutes les requêtes ORS : par_minute jetons,
+    chacun rendu au seau une minute après avoir servi (jamais plus de
+    par_minute envois sur une minute glissante, comme le compte ORS), et au
+    plus par_jour envois. Après une réponse 429, plus aucun envoi jusqu'à la
+    fin du délai demandé par le serveur.
+    """
+
+    def __init__(self, par_minute=QUOTA_MINUTE_ORS, par_jour=QUOTA_JOUR_ORS, fenetre=60.0,
+                 horloge=time.monotonic, dormir=time.sleep):
+        self.capacite = par_minute
+        self.fenetre = fenetre
+        self.rendus = collections.deque()      # dates de retour des jetons utilisés
+        self.restant_jour = par_jour
+        self.reprise = 0.0                      # aucun envoi avant cette date (horloge)
+        self.horloge = horloge
+        self.dormir = dormir
+        self.verrou = threading.Lock()
+        self.envois = 0
+        self.reessais = 0
+        self.attente = 0.0                      # secondes d'attente d'un jeton ou d'un réessai (tous threads)
+
+    def prendre(self):
+        """Attend qu'un envoi soit permis et consomme un jeton."""
+        while True:
+            with self.verrou:
+                if self.restant_jour is not None and self.restant_jour <= 0:
+                    raise Exception(" Quota journalier ORS épuisé")
+                maintenant = self.horloge()
+                while self.rendus and self.rendus[0] <= maintenant:
+                    self.rendus.popleft()
+                delai = self.reprise - maintenant
+                if delai <= 0 and len(self.rendus) < self.capacite:
+                    self.rendus.append(maintenant + self.fenetre + MARGE_FENETRE)
+                    self.envois += 1
+                    if self.restant_jour is not None:
+                        self.restant_jour -= 1
+                    return
+                if len(self.rendus) >= self.capacite:
+                    delai = max(delai, self.rendus[0] - maintenant)
+                self.attente += delai
+            self.dormir(delai)
+
+    def suspendre(self, secondes):
+        """Bloque tous les envois pendant `secondes` (réponse 429)."""
+        with self.verrou:
+            self.reprise = max(self.reprise, self.horloge() + secondes)
+
+    def compter_reessai(self):
+        """Compte un réessai (appelé depuis plusieurs fils à la fois)."""
+        with self.verrou:
+            self.reessais += 1
+
+    def patienter(self, secondes):
+        """Pause avant un réessai, comptée dans attente et passée par dormir (horloge injectable)."""
+        with self.verrou:
+            self.attente += secondes
+        self.dormir(secondes)
+
+    def mettre_a_jour(self, entetes):
+        """Recale le quota journalier sur l'en-tête x-ratelimit-remaining d'ORS."""
+        restant = entetes.get("x-ratelimit-remaining")
+        if restant is None or not str(restant).isdigit():
+            return
+        with self.verrou:
+            # des requêtes parties entre-temps ne sont pas encore comptées par ORS
+            if self.restant_jour is None or int(restant) < self.restant_jour:
+                self.restant_jour = int(restant)
+
+
+def delai_retry_after(valeur):
+    """Délai en secondes d'un en-tête Retry-After (secondes ou date HTTP), None s'il est illisible."""
+    if not valeur:
+        return None
+    valeur = valeur.strip()
+    if valeur.isdigit():
+        return float(valeur)
+    try:
+        return max(0.0, parsedate_to_datetime(valeur).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+def delai_reessai(essai, base=DELAI_BASE_ORS, plafond=DELAI_MAX_ORS):
+    """Délai exponentiel avec gigue complète : tirage dans [0, min(plafond, base·2^essai)]."""
+    return random.uniform(0, min(plafond, base * 2 ** essai))
+
+
+def requete_isochrones(locations, url, cle, parametres=PARAMETRES_ISOCHRONES, limiteur=None,
+                       essais_max=ESSAIS_MAX_ORS):
+    """
+    Une requête ORS pour une liste de points [lon, lat] ; renvoie la FeatureCollection.
+    Les réponses 429 / 5xx et les erreurs réseau sont réessayées (essais_max
+    essais au total) ; les autres erreurs sont levées tout de suite.
+    """
+    payload = dict(parametres)
+    payload["locations"] = [list(p) for p in locations]
+    headers = {
+        "Authorization": cle,
+        "Content-Type": "application/json"
+    }
+    for essai in range(essais_max):
+        if limiteur is not None:
+            limiteur.prendre()
+        dernier_essai = essai == essais_max - 1
+        try:
+            response = requests.post(url, headers=headers, data=json.dumps(payload),
+                                     timeout=DELAI_REPONSE_ORS)
+        except (requests.ConnectionError, requests.Timeout) as erreur:
+            if dernier_essai:
+                raise Exception(f" Erreur ORS : {erreur}")
+            delai = delai_reessai(essai)
+        else:
+            if limiteur is not None:
+                limiteur.mettre_a_jour(response.headers)
+            if response.status_code == 200:
+                return response.json()
+            if response.status_code not in CODES_REESSAI or dernier_essai:
+                raise Exception(" Erreur ORS : " + response.text)
+            delai = delai_retry_after(response.headers.get("Retry-After"))
+            if delai is None:
+                delai = delai_reessai(essai)
+            if response.status_code == 429 and limiteur is not None:
+                # le quota est atteint pour toutes les requêtes en cours, pas seulement celle-ci
+                limiteur.suspendre(delai)
+                limiteur.compter_reessai()
+                continue
+        if limiteur is not None:
+            limiteur.compter_reessai()
+            limiteur.patienter(delai)
+        else:
+            time.sleep(delai)
+
+
+def parametres_bandes(bandes, parametres=PARAMETRES_ISOCHRONES):
+    """Paramètres ORS demandant toutes les bandes (secondes) d'un profil dans une seule requête."""
+    if not bandes or len(bandes) > MAX_BANDES_ORS:
+        raise Exception(f" Entre 1 et {MAX_BANDES_ORS} bandes par profil (reçu : {list(bandes)})")
+    return dict(parametres, range=sorted(bandes))
+
+
+def fusionner_profils(resultats_par_profil):
+    """
+    {profil: {identifiant: FeatureCollection}} → {identifiant: FeatureCollection}
+    regroupant les bandes de tous les profils ; chaque polygone porte la
+    propriété "profil".
+    """
+    fusion = {}
+    for profil, resultats in resultats_par_profil.items():
+        for identifiant, iso_data in resultats.items():
+            features = [dict(f, properties=dict(f.get("properties", {}), profil=profil))
+                        for f in iso_data.get("features", [])]
+            if identifiant in fusion:
+                fusion[identifiant]["features"].extend(features)
+            else:
+                fusion[identifiant] = dict({k: v for k, v in iso_data.items() if k != "bbox"}, features=features)
+    return fusion
+
+
+def decouper_par_point(iso_data, nb_points):
+    """
+    Sépare la réponse d'une requête à plusieurs points en une
+    FeatureCollection par point (même forme qu'une requête à un seul point).
+    """
+    entete = {k: v for k, v in iso_data.items() if k not in ("features", "bbox")}
+    par_point = [dict(entete, features=[]) for _ in range(nb_points)]
+    for feature in iso_data.get("features", []):
+        proprietes = feature.get("properties", {})
+        groupe = proprietes.get("group_index", 0)
+        # chaque collection ne contient qu'un point : group_index repasse à 0
+        feature = dict(feature, properties=dict(proprietes, group_index=0))
+        par_point[groupe]["features"].append(feature)
+    return par_point
+
+
+class CacheIsochrones:
+    """
+    Cache adressé par contenu : dossier/<empreinte de la requête>.geojson
+    (ou .bin avec format_stockage="binaire").
+    Compte les isochrones trouvés (succes) et à calculer (echecs).
+    """
+
+    def __init__(self, dossier, version_moteur=VERSION_MOTEUR, format_stockage="geojson"):
+        self.dossier = dossier
+        self.version_moteur = version_moteur
+        self.binaire = format_stockage == "binaire"
+        self.succes = 0
+        self.echecs = 0
+        os.makedirs(dossier, exist_ok=True)
+
+    def cle(self, url, lon, lat, parametres=PARAMETRES_ISOCHRONES):
+        description = {
+            "profil": url.rstrip("/").rsplit("/", 1)[-1],   # foot-walking…
+            "lon": round(lon, DECIMALES_CLE),
+            "lat": round(lat, DECIMALES_CLE),
+            "parametres": parametres,
+            "moteur": self.version_moteur,
+        }
+        return hashlib.sha1(json.dumps(description, sort_keys=True).encode("utf-8")).hexdigest()
+
+    def chemin(self, cle):
+        return os.path.join(self.dossier, cle + (".bin" if self.binaire else ".geojson"))
+
+    def lire(self, cle):
+        """FeatureCollection stockée, ou None (compté comme échec)."""
+        chemin = self.chemin(cle)
+        if os.path.exists(chemin):
+            if self.binaire:
+                with open(chemin, "rb") as f:
+                    iso_data = decoder_binaire(f.read())
+            else:
+                with open(chemin, encoding="utf-8") as f:
+                    iso_data = json.load(f)
+            self.succes += 1
+            return iso_data
+        self.echecs += 1
+        return None
+
+    def ecrire(self, cle, iso_data):
+        # écriture dans un fichier temporaire puis renommage : pas de fichier
+        # à moitié écrit dans le cache si QGIS est interrompu
+        temporaire = self.chemin(cle) + ".tmp"
+        if self.binaire:
+            with open(temporaire, "wb") as f:
+                f.write(encoder_binaire(iso_data))
+        else:
+            with open(temporaire, "w", encoding="utf-8") as f:
+                json.dump(iso_data, f)
+        os.replace(temporaire, self.chemin(cle))
+
+
+def isochrones_par_lots(points, url, cle, parametres=PARAMETRES_ISOCHRONES, taille_lot=TAILLE_LOT_ORS,
+                        cache=None, limiteur=None, requetes_simultanees=1):
+    """
+    points : {identifiant: (lon, lat)}.
+    Renvoie ({identifiant: FeatureCollection}, statistiques), avec dans les
+    statistiques le nombre de requêtes envoyées et le nombre évité par
+    rapport à une requête par musée.
+    Avec un CacheIsochrones, seuls les musées absents du cache sont demandés.
+    Avec un LimiteurDebit, jusqu'à requetes_simultanees lots sont en cours à
+    la fois : un lot part dès qu'un jeton est libre, sans attendre la
+    réponse du précédent.
+    """
+    resultats = {}
+    cles_cache = {}
+    a_calculer = []
+    for identifiant, (lon, lat) in points.items():
+        if cache is not None:
+            cles_cache[identifiant] = cache.cle(url, lon, lat, parametres)
+            iso_data = cache.lire(cles_cache[identifiant])
+            if iso_data is not None:
+                resultats[identifiant] = iso_data
+                continue
+        a_calculer.append(identifiant)
+
+    lots = [a_calculer[debut:debut + taille_lot] for debut in range(0, len(a_calculer), taille_lot)]
+
+    def traiter_lot(lot):
+        return requete_isochrones([points[i] for i in lot], url, cle, parametres, limiteur=limiteur)
+
+    def ranger(lot, iso_data):
+        for identifiant, collection in zip(lot, decouper_par_point(iso_data, len(lot))):
+            resultats[identifiant] = collection
+            if cache is not None:
+                cache.ecrire(cles_cache[identifiant], collection)
+
+    # les réponses sont rangées (et mises en cache) au fil de l'eau : si un
+    # lot échoue, les lots reçus ne seront pas redemandés. En parallèle, les
+    # lots sont rangés dans l'ordre d'arrivée, les échecs sont relevés et
+    # l'erreur n'est levée qu'une fois tous les lots en cours terminés
+    if limiteur is not None and requetes_simultanees > 1 and len(lots) > 1:
+        echecs = []
+        with ThreadPoolExecutor(max_workers=requetes_simultanees) as executeur:
+            futurs = {executeur.submit(traiter_lot, lot): lot for lot in lots}
+            for futur in as_completed(futurs):
+                try:
+                    iso_data = futur.result()
+                except Exception as erreur:
+                    echecs.append((futurs[futur], erreur))
+                    continue
+                ranger(futurs[futur], iso_data)
+        if echecs:
+            lot, erreur = echecs[0]
+            raise Exception(f" {len(echecs)} lot(s) sur {len(lots)} en échec (musées {', '.join(map(str, lot))}…) :"
+                            f" {erreur}") from erreur
+    else:
+        for lot in lots:
+            ranger(lot, traiter_lot(lot))
+    nb_appels = len(lots)
+
+    stats = {
+        "musees": len(points),
+        "appels": nb_appels,
+        "appels_evites": len(points) - nb_appels,
+        "depuis_cache": len(points) - len(a_calculer),
+    }
+    return resultats, stats
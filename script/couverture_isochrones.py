@@ -0,0 +1,252 @@
+"""
+===========================================================
+MODULE — COUVERTURE DE PARIS PAR LES ISOCHRONES DES MUSÉES
+===========================================================
+Quelles parties de Paris sont à moins de 10 minutes à pied d'au moins un
+musée ? À partir du stock GeoPackage des isochrones (stock_isochrones),
+pour une bande (profil, value) :
+
+1. Union en cascade des bandes de tous les musées (unary_union : les
+   polygones sont fusionnés par paires le long d'un arbre, au lieu d'être
+   ajoutés un à un à une géométrie de plus en plus grosse).
+2. Découpage de l'union par arrondissement (GEOS écarte déjà les parties
+   dont l'emprise ne touche pas l'arrondissement : un arbre STR sur les
+   parties n'apporte rien, voir bench/bench_couverture_isochrones.py).
+3. Musées à portée de chaque arrondissement : le R-tree du GeoPackage
+   donne les bandes dont l'emprise touche l'arrondissement, puis un test
+   d'intersection exact.
+
+Les surfaces sont calculées en mètres, dans une projection locale
+(équirectangulaire centrée sur les zones, comme isochrones_locaux).
+
+Résultat : une entité par arrondissement (partie couverte + statistiques)
+et une ligne de statistiques par arrondissement, plus le total de Paris.
+
+Les géométries sont traitées avec shapely s'il est installé, sinon avec
+QgsGeometry (dans QGIS).
+
+Utilisation :
+    from couverture_isochrones import analyser_couverture, ecrire_couverture, lire_zones
+    zones = lire_zones(os.path.join(monCheminDeBase, "arrondissements.geojson"))
+    entites, statistiques = analyser_couverture(stock, zones, "foot-walking", 600)
+    ecrire_couverture(entites, statistiques, "couverture.geojson", "couverture.csv")
+"""
+
+import csv
+import json
+import math
+
+from isochrones_locaux import RAYON_TERRE
+
+# shapely est facultatif : sans lui, les géométries sont traitées avec QGIS
+try:
+    from shapely.geometry import mapping, shape
+    from shapely.ops import unary_union
+except ImportError:
+    shape = None
+
+# Champs de l'export GeoJSON « arrondissements » de opendata.paris.fr
+CHAMP_CODE = "c_ar"
+CHAMP_NOM = "l_ar"
+
+COLONNES_STATISTIQUES = ["code", "nom", "surface_ha", "couverte_ha", "part_couverte", "musees_dans_zone",
+                         "musees_a_portee"]
+
+
+# ---------------------------------------------------------
+#            ZONES ET COORDONNÉES
+
+def lire_zones(chemin, champ_code=CHAMP_CODE, champ_nom=CHAMP_NOM):
+    """GeoJSON de polygones en lon/lat → [(code, nom, géométrie)] triés par code."""
+    with open(chemin, encoding="utf-8") as f:
+        collection = json.load(f)
+    zones = []
+    for feature in collection["features"]:
+        proprietes = feature.get("properties") or {}
+        if not feature.get("geometry"):
+            continue
+        zones.append((proprietes.get(champ_code), proprietes.get(champ_nom), feature["geometry"]))
+    return sorted(zones, key=lambda zone: (zone[0] is None, zone[0]))
+
+
+def _sommets(coordonnees):
+    if coordonnees and isinstance(coordonnees[0], (int, float)):
+        yield coordonnees
+        return
+    for c in coordonnees:
+        yield from _sommets(c)
+
+
+def _convertir(coordonnees, fonction):
+    if coordonnees and isinstance(coordonnees[0], (int, float)):
+        return list(fonction(coordonnees[0], coordonnees[1]))
+    return [_convertir(c, fonction) for c in coordonnees]
+
+
+class ProjectionLocale:
+    """lon/lat ↔ mètres, équirectangulaire autour de la latitude lat0."""
+
+    def __init__(self, lat0):
+        self._cos0 = math.cos(math.radians(lat0))
+
+    def vers_xy(self, lon, lat):
+        return (math.radians(lon) * RAYON_TERRE * self._cos0, math.radians(lat) * RAYON_TERRE)
+
+    def vers_lonlat(self, x, y):
+        return (math.degrees(x / (RAYON_TERRE * self._cos0)), math.degrees(y / RAYON_TERRE))
+
+    def geometrie_xy(self, geometrie):
+        return {"type": geometrie["type"], "coordinates": _convertir(geometrie["coordinates"], self.vers_xy)}
+
+    def geometrie_lonlat(self, geometrie):
+        return {"type": geometrie["type"], "coordinates": _convertir(geometrie["coordinates"], self.vers_lonlat)}
+
+
+def _emprise(geometrie):
+    sommets = list(_sommets(geometrie["coordinates"]))
+    return (min(p[0] for p in sommets), min(p[1] for p in sommets),
+            max(p[0] for p in sommets), max(p[1] for p in sommets))
+
+
+def _point_dans_geometrie(x, y, geometrie):
+    """Test du rayon sur un Polygon / MultiPolygon GeoJSON (trous compris)."""
+    polygones = [geometrie["coordinates"]] if geometrie["type"] == "Polygon" else geometrie["coordinates"]
+    dedans = False
+    for anneaux in polygones:
+        for anneau in anneaux:
+            for (x1, y1), (x2, y2) in zip(anneau, anneau[1:]):
+                if (y1 > y) != (y2 > y) and x < x1 + (y - y1) * (x2 - x1) / (y2 - y1):
+                    dedans = not dedans
+    return dedans
+
+
+# ---------------------------------------------------------
+#            UNION EN CASCADE ET DÉCOUPAGE PAR ZONE
+#
+# isochrones : {identifiant: géométrie GeoJSON en mètres}
+# zones      : [géométrie GeoJSON en mètres]
+# candidats  : [identifiants dont la bande touche l'emprise de la zone]
+# → (surface de l'union, [(géométrie couverte GeoJSON ou None, surface zone,
+#    surface couverte, identifiants dont la bande coupe la zone)])
+
+def _decouper_shapely(isochrones, zones, candidats):
+    polygones = {}
+    for identifiant, geometrie in isochrones.items():
+        polygone = shape(geometrie)
+        polygones[identifiant] = polygone if polygone.is_valid else polygone.buffer(0)
+    union = unary_union(list(polygones.values()))
+
+    resultats = []
+    for zone, identifiants in zip(zones, candidats):
+        z = shape(zone)
+        if not z.is_valid:
+            z = z.buffer(0)
+        couverte = z.intersection(union)
+        a_portee = [i for i in identifiants if i in polygones and polygones[i].intersects(z)]
+        if couverte.is_empty:
+            resultats.append((None, z.area, 0.0, a_portee))
+        else:
+            resultats.append((mapping(couverte), z.area, couverte.area, a_portee))
+    return union.area, resultats
+
+
+def _wkt(geometrie):
+    polygones = [geometrie["coordinates"]] if geometrie["type"] == "Polygon" else geometrie["coordinates"]
+    return "MULTIPOLYGON({})".format(",".join(
+        "({})".format(",".join(
+            "({})".format(",".join(f"{p[0]!r} {p[1]!r}" for p in anneau)) for anneau in polygone))
+        for polygone in polygones))
+
+
+def _decouper_qgis(isochrones, zones, candidats):
+    from qgis.core import QgsGeometry
+    polygones = {identifiant: QgsGeometry.fromWkt(_wkt(geometrie)).makeValid()
+                 for identifiant, geometrie in isochrones.items()}
+    union = QgsGeometry.unaryUnion(list(polygones.values()))
+
+    resultats = []
+    for zone, identifiants in zip(zones, candidats):
+        z = QgsGeometry.fromWkt(_wkt(zone)).makeValid()
+        couverte = z.intersection(union)
+        a_portee = [i for i in identifiants if i in polygones and polygones[i].intersects(z)]
+        if couverte.isEmpty():
+            resultats.append((None, z.area(), 0.0, a_portee))
+        else:
+            resultats.append((json.loads(couverte.asJson()), z.area(), couverte.area(), a_portee))
+    return union.area(), resultats
+
+
+# ---------------------------------------------------------
+#            ANALYSE
+
+def analyser_couverture(stock, zones, profil="foot-walking", value=600, identifiants=None):
+    """
+    stock : StockIsochrones ; zones : [(code, nom, géométrie lon/lat)] ;
+    identifiants : musées pris en compte (None : tous ceux du stock).
+    Renvoie (entités GeoJSON : partie couverte de chaque zone, statistiques
+    par zone puis total "Paris"), surfaces en hectares, part en %.
+    """
+    bandes = stock.bandes(profil, value)
+    if identifiants is not None:
+        identifiants = set(identifiants)
+        bandes = {identifiant: bande for identifiant, bande in bandes.items() if identifiant in identifiants}
+    if not bandes or not zones:
+        raise ValueError(f"Couverture impossible : {len(bandes)} bandes {profil} {value:g} s, {len(zones)} zones")
+
+    lats = [p[1] for _, _, geometrie in zones for p in _sommets(geometrie["coordinates"])]
+    projection = ProjectionLocale(sum(lats) / len(lats))
+
+    # musées à portée : le R-tree du stock trie d'abord sur les emprises
+    candidats = []
+    for _, _, geometrie in zones:
+        trouves = stock.dans_emprise(*_emprise(geometrie), value=value, profil=profil)
+        candidats.append(sorted({identifiant for identifiant, _, _ in trouves if identifiant in bandes}))
+
+    isochrones = {identifiant: projection.geometrie_xy(geometrie) for identifiant, (_, geometrie) in bandes.items()}
+    zones_xy = [projection.geometrie_xy(geometrie) for _, _, geometrie in zones]
+    decouper = _decouper_shapely if shape is not None else _decouper_qgis
+    surface_union, decoupes = decouper(isochrones, zones_xy, candidats)
+
+    entites, statistiques = [], []
+    tous_a_portee = set()
+    for (code, nom, geometrie), (couverte, surface, surface_couverte, a_portee) in zip(zones, decoupes):
+        dans_zone = sum(1 for centre, _ in bandes.values()
+                        if centre[0] is not None and _point_dans_geometrie(centre[0], centre[1], geometrie))
+        tous_a_portee.update(a_portee)
+        ligne = {
+            "code": code,
+            "nom": nom,
+            "surface_ha": round(surface / 1e4, 2),
+            "couverte_ha": round(surface_couverte / 1e4, 2),
+            "part_couverte": round(100 * surface_couverte / surface, 1) if surface else 0.0,
+            "musees_dans_zone": dans_zone,
+            "musees_a_portee": len(a_portee),
+        }
+        statistiques.append(ligne)
+        if couverte is not None:
+            entites.append({"type": "Feature", "properties": dict(ligne, profil=profil, value=value),
+                            "geometry": projection.geometrie_lonlat(couverte)})
+
+    surface = sum(s["surface_ha"] for s in statistiques)
+    couverte = sum(s["couverte_ha"] for s in statistiques)
+    statistiques.append({
+        "code": None,
+        "nom": "Paris",
+        "surface_ha": round(surface, 2),
+        "couverte_ha": round(couverte, 2),
+        "part_couverte": round(100 * couverte / surface, 1) if surface else 0.0,
+        "musees_dans_zone": sum(s["musees_dans_zone"] for s in statistiques),
+        "musees_a_portee": len(tous_a_portee),
+        "union_ha": round(surface_union / 1e4, 2),   # couverture totale, hors de Paris comprise
+    })
+    return entites, statistiques
+
+
+def ecrire_couverture(entites, statistiques, chemin_geojson, chemin_csv):
+    """Parties couvertes en GeoJSON (lon/lat) et statistiques en CSV (séparateur ;)."""
+    with open(chemin_geojson, "w", encoding="utf-8") as f:
+        json.dump({"type": "FeatureCollection", "features": entites}, f)
+    with open(chemin_csv, "w", encoding="utf-8", newline="") as f:
+        ecrivain = csv.DictWriter(f, fieldnames=COLONNES_STATISTIQUES, delimiter=";", extrasaction="ignore")
+        ecrivain.writeheader()
+        ecrivain.writerows(statistiques)
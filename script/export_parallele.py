@@ -0,0 +1,254 @@
+"""
+===========================================================
+MODULE — EXPORT DES CARTES PDF EN PARALLÈLE
+===========================================================
+L'export PDF (QgsLayoutExporter.exportToPdf) est l'étape la plus longue
+de la boucle des musées et il s'exécute dans le seul processus de QGIS.
+Ici, plusieurs processus Python indépendants exportent les cartes :
+
+- chaque processus ouvre le même instantané du projet (.qgz enregistré
+  par Traitement_boucle, mise en page de l'atlas comprise) dans une
+  QgsApplication sans interface ;
+- le coordinateur (exporter_en_parallele) tient la file des travaux (un
+  travail = un musée, un PDF) et donne le suivant au premier processus
+  libre : les musées longs à rendre ne bloquent pas les autres ;
+- les échanges passent par l'entrée et la sortie standard, une ligne JSON
+  par message (« pret », puis un résultat par travail) ; un processus qui
+  s'arrête en cours de travail est compté en échec, les travaux restants
+  vont aux autres processus.
+
+Le coordinateur ne dépend pas de QGIS (voir bench/bench_export_parallele.py) ;
+seul le travailleur (ce fichier lancé comme script) importe qgis.
+
+Utilisation dans QGIS (le dossier script/ doit être dans sys.path) :
+    from export_parallele import commande_travailleur, environnement_travailleur, exporter_en_parallele
+    commande = commande_travailleur(projet_qgz, "Atlas_musees", 300, QgsApplication.prefixPath())
+    bilan = exporter_en_parallele(travaux, commande, 4, env=environnement_travailleur())
+"""
+
+import argparse
+import collections
+import json
+import os
+import queue
+import subprocess
+import sys
+import threading
+import time
+
+
+# ---------------------------------------------------------
+#            LANCEMENT DES PROCESSUS
+
+def interpreteur_python():
+    """
+    Interpréteur pour les travailleurs : sys.executable hors QGIS ; dans
+    QGIS, sys.executable est l'application elle-même, le Python est cherché
+    dans sys.exec_prefix.
+    """
+    if os.path.basename(sys.executable).lower().startswith("python"):
+        return sys.executable
+    for candidat in ("python.exe", "python3.exe", os.path.join("bin", "python3"), os.path.join("bin", "python")):
+        chemin = os.path.join(sys.exec_prefix, candidat)
+        if os.path.exists(chemin):
+            return chemin
+    raise FileNotFoundError(f"Interpréteur Python introuvable dans {sys.exec_prefix} : le donner explicitement")
+
+
+def commande_travailleur(projet, mise_en_page, dpi=300, prefixe_qgis=None, interpreteur=None):
+    """Ligne de commande d'un processus qui exporte les pages de l'atlas de la mise en page du projet."""
+    commande = [interpreteur or interpreteur_python(), os.path.abspath(__file__),
+                "--projet", projet, "--mise-en-page", mise_en_page, "--dpi", str(dpi)]
+    if prefixe_qgis:
+        commande += ["--prefixe-qgis", prefixe_qgis]
+    return commande
+
+
+def environnement_travailleur():
+    """Environnement courant + sys.path de QGIS (modules qgis, script/) et rendu Qt sans écran."""
+    env = dict(os.environ)
+    env["PYTHONPATH"] = os.pathsep.join(p for p in sys.path if p and os.path.isdir(p))
+    env.setdefault("QT_QPA_PLATFORM", "offscreen")
+    return env
+
+
+def _lire_messages(numero, sortie, messages):
+    """Fil de lecture d'un processus : chaque ligne JSON → (numéro, message) ; fin du flux → (numéro, None)."""
+    for ligne in sortie:
+        try:
+            message = json.loads(ligne)
+        except ValueError:
+            continue   # sortie parasite (avertissements Qt, print…)
+        if isinstance(message, dict):
+            messages.put((numero, message))
+    messages.put((numero, None))
+
+
+# ---------------------------------------------------------
+#            COORDINATEUR
+
+def exporter_en_parallele(travaux, commande, processus, env=None, dossier_journaux=None, afficher=print):
+    """
+    travaux : [{"id": …, "pdf": chemin, …}] (envoyés tels quels en JSON aux
+    processus) ; commande : ligne de commande d'un travailleur ; processus :
+    nombre de processus lancés (au plus un par travail).
+    Les erreurs des processus vont dans dossier_journaux/export_<n>.log.
+    Renvoie {"reussis": [id], "echecs": [(id, erreur)], "duree": s, "processus": n}.
+    """
+    debut = time.perf_counter()
+    en_attente = collections.deque(travaux)
+    nb = max(1, min(processus, len(travaux)))
+    bilan = {"reussis": [], "echecs": [], "duree": 0.0, "processus": nb}
+    if not travaux:
+        return bilan
+
+    messages = queue.Queue()
+    lances, journaux, en_cours = {}, [], {}
+    if dossier_journaux:
+        os.makedirs(dossier_journaux, exist_ok=True)
+    for numero in range(nb):
+        journal = subprocess.DEVNULL
+        if dossier_journaux:
+            journal = open(os.path.join(dossier_journaux, f"export_{numero + 1}.log"), "w", encoding="utf-8")
+            journaux.append(journal)
+        lances[numero] = subprocess.Popen(commande, stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=journal,
+                                          env=env, text=True, encoding="utf-8", bufsize=1)
+        threading.Thread(target=_lire_messages, args=(numero, lances[numero].stdout, messages), daemon=True).start()
+
+    def envoyer(numero):
+        """Travail suivant de la file au processus libre, ou fin de son entrée si la file est vide."""
+        entree = lances[numero].stdin
+        if not en_attente:
+            en_cours[numero] = None
+            try:
+                entree.close()
+            except OSError:
+                pass
+            return
+        travail = en_attente.popleft()
+        try:
+            entree.write(json.dumps(travail) + "\n")
+            entree.flush()
+            en_cours[numero] = travail
+        except OSError:
+            en_attente.appendleft(travail)   # processus arrêté : le travail reste dans la file
+            en_cours[numero] = None
+
+    vivants = set(lances)
+    derniere_erreur = None
+    while vivants:
+        numero, message = messages.get()
+        if message is None:
+            vivants.discard(numero)
+            code = lances[numero].wait()
+            travail = en_cours.pop(numero, None)
+            if travail is not None:
+                bilan["echecs"].append((travail["id"], f"processus {numero + 1} arrêté (code {code})"))
+                afficher(f" Échec {travail['id']} : processus {numero + 1} arrêté (code {code})")
+            continue
+
+        if message.get("etat") == "pret":
+            envoyer(numero)
+        elif message.get("etat") == "erreur":
+            derniere_erreur = message.get("erreur")
+            afficher(f" Processus d'export {numero + 1} non démarré : {derniere_erreur}")
+        else:
+            travail = en_cours.get(numero)
+            if travail is None:
+                continue
+            if message.get("ok"):
+                bilan["reussis"].append(travail["id"])
+                afficher(f" PDF {len(bilan['reussis'])}/{len(travaux)} : {os.path.basename(travail['pdf'])}"
+                         f" (processus {numero + 1}, {message.get('duree', 0):.1f} s)")
+            else:
+                bilan["echecs"].append((travail["id"], message.get("erreur")))
+                afficher(f" Échec {travail['id']} : {message.get('erreur')}")
+            envoyer(numero)
+
+    # plus aucun processus : les travaux restants ne seront pas faits
+    for travail in en_attente:
+        bilan["echecs"].append((travail["id"], derniere_erreur or "aucun processus d'export disponible"))
+    for journal in journaux:
+        journal.close()
+    bilan["duree"] = time.perf_counter() - debut
+    return bilan
+
+
+# ---------------------------------------------------------
+#            TRAVAILLEUR (processus lancé par le coordinateur)
+
+def _repondre(**message):
+    sys.stdout.write(json.dumps(message) + "\n")
+    sys.stdout.flush()
+
+
+def travailleur(projet, mise_en_page, dpi, prefixe_qgis=None):
+    """
+    Ouvre le projet, puis pour chaque travail lu sur l'entrée standard
+    ({"id", "fid", "pdf"}) exporte la page de l'atlas de l'entité fid.
+    """
+    from qgis.core import QgsApplication, QgsLayoutExporter, QgsProject
+
+    if prefixe_qgis:
+        QgsApplication.setPrefixPath(prefixe_qgis, True)
+    application = QgsApplication([], False)
+    application.initQgis()
+    try:
+        projet_qgis = QgsProject.instance()
+        if not projet_qgis.read(projet):
+            _repondre(etat="erreur", erreur=f"projet illisible : {projet}")
+            return 1
+        layout = projet_qgis.layoutManager().layoutByName(mise_en_page)
+        if layout is None:
+            _repondre(etat="erreur", erreur=f"mise en page {mise_en_page} absente du projet")
+            return 1
+        atlas = layout.atlas()
+        exporter = QgsLayoutExporter(layout)
+        pdf_settings = QgsLayoutExporter.PdfExportSettings()
+        pdf_settings.dpi = dpi
+        _repondre(etat="pret")
+
+        for ligne in sys.stdin:
+            if not ligne.strip():
+                continue
+            travail = json.loads(ligne)
+            debut = time.perf_counter()
+            erreur = None
+            # l'atlas réduit à l'entité du travail : une page, données de ce musée
+            atlas.setFilterFeatures(True)
+            atlas.setFilterExpression(f"$id = {int(travail['fid'])}")
+            atlas.beginRender()
+            try:
+                if not atlas.first():
+                    erreur = f"entité {travail['fid']} absente de l'atlas"
+                else:
+                    os.makedirs(os.path.dirname(travail["pdf"]), exist_ok=True)
+                    resultat = exporter.exportToPdf(travail["pdf"], pdf_settings)
+                    if resultat != QgsLayoutExporter.Success:
+                        erreur = f"exportToPdf a échoué (code {resultat})"
+            except Exception as exception:
+                erreur = str(exception)
+            finally:
+                atlas.endRender()
+            _repondre(id=travail["id"], ok=erreur is None, erreur=erreur, duree=time.perf_counter() - debut)
+    finally:
+        application.exitQgis()
+    return 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Processus d'export PDF des pages d'un atlas QGIS")
+    parser.add_argument("--projet", required=True)
+    parser.add_argument("--mise-en-page", required=True)
+    parser.add_argument("--dpi", type=float, default=300)
+    parser.add_argument("--prefixe-qgis")
+    args = parser.parse_args()
+    try:
+        return travailleur(args.projet, args.mise_en_page, args.dpi, args.prefixe_qgis)
+    except ImportError as erreur:
+        _repondre(etat="erreur", erreur=f"qgis introuvable ({erreur})")
+        return 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,313 @@
+"""
+===========================================================
+MODULE — GRILLE PRÉCALCULÉE DES TEMPS DE MARCHE
+===========================================================
+Pour chaque musée, le temps de marche (secondes) jusqu'à chaque case
+d'une grille régulière couvrant Paris, calculé une fois sur le graphe
+piéton local (isochrones_locaux) et rangé dans un fichier binaire lu par
+projection en mémoire (mmap) : ouvrir la grille ne charge ni le graphe
+ni les temps, et l'isochrone ou les gares à portée d'un musée
+s'obtiennent en seuillant ses cases, sans calcul d'itinéraire.
+
+Temps d'une case : chaque case est rattachée une fois pour toutes au
+tronçon le plus proche de son centre (à moins de ACCROCHE_MAX_M) ; son
+temps est celui du Dijkstra depuis le musée jusqu'au point de
+rattachement, plus la marche hors voirie jusqu'au centre de la case.
+Cases non atteintes en moins de duree_max : INATTEINT.
+
+Fichier (entiers petit-boutistes) :
+    en-tête      "GTMP", version, colonnes, lignes, nombre de musées, pas (m),
+                 origine x0 y0 (m, projection locale autour de lat0), lat0,
+                 taille des métadonnées
+    métadonnées  JSON : musées [identifiant, lon, lat] dans l'ordre des grilles,
+                 source (modèle de marche + empreinte de l'extrait), emprise
+                 demandée (lon/lat), durée max
+    temps        uint16, une grille lignes × colonnes par musée (ligne 0 au sud)
+
+Utilisation :
+    from grille_temps import GrilleTemps, construire_grille
+    construire_grille(chemin, moteur, {"M0363": (lon, lat), ...}, (lon_min, lat_min, lon_max, lat_max))
+    with GrilleTemps(chemin) as grille:
+        iso_data = grille.isochrones("M0363", [300, 600])
+        gares = grille.atteints("M0363", {nom: (lon, lat), ...}, 600)
+"""
+
+import array
+import json
+import math
+import mmap
+import os
+import struct
+import sys
+
+from couverture_isochrones import ProjectionLocale
+from isochrones_locaux import FACTEURS_VITESSE, VITESSE_MARCHE_KMH
+
+# shapely est facultatif : sans lui, les polygones sont construits avec QGIS
+try:
+    from shapely.geometry import box, mapping
+    from shapely.ops import unary_union
+except ImportError:
+    box = None
+
+SIGNATURE = b"GTMP"
+VERSION = 1
+ENTETE = struct.Struct("<4sHHIIIddddI")
+
+# Côté des cases (mètres) et temps maximal stocké (secondes, moins de 65535)
+PAS_M = 50.0
+DUREE_MAX_S = 1800
+
+# Distance maximale entre le centre d'une case et la rue la plus proche (mètres)
+ACCROCHE_MAX_M = 150.0
+
+INATTEINT = 0xFFFF
+
+
+def source_grille(empreinte_extrait):
+    """Modèle de marche + extrait OSM : une grille d'une autre source est à recalculer."""
+    return "{}-{}-{}-{}".format(VITESSE_MARCHE_KMH, json.dumps(FACTEURS_VITESSE, sort_keys=True),
+                                ACCROCHE_MAX_M, empreinte_extrait)
+
+
+# ---------------------------------------------------------
+#            CALCUL DE LA GRILLE
+
+def _accroches(graphe, x0, y0, pas, nb_colonnes, nb_lignes):
+    """(arête, position, distance) du tronçon le plus proche de chaque case, ou None."""
+    accroches = []
+    for i in range(nb_lignes):
+        y = y0 + (i + 0.5) * pas
+        for j in range(nb_colonnes):
+            rattachement = graphe.arete_la_plus_proche(x0 + (j + 0.5) * pas, y)
+            accroches.append(rattachement if rattachement is not None and rattachement[2] <= ACCROCHE_MAX_M
+                             else None)
+    return accroches
+
+
+def _temps_cases(graphe, accroches, lon, lat, x0, y0, pas, nb_colonnes, nb_lignes, duree_max):
+    """array uint16 des temps du point (lon, lat) vers toutes les cases."""
+    temps = array.array("H", [INATTEINT]) * (nb_colonnes * nb_lignes)
+    vitesse = VITESSE_MARCHE_KMH / 3.6
+    x, y = graphe.vers_xy(lon, lat)
+    rattachement = graphe.arete_la_plus_proche(x, y)
+    if rattachement is None:
+        return temps
+
+    # mêmes sources que MoteurIsochrones.isochrones : les extrémités du tronçon le plus proche
+    k0, t0, distance = rattachement
+    a0, b0, _, cout0 = graphe.aretes[k0]
+    depart = distance / vitesse
+    sources = {a0: depart + t0 * cout0}
+    sources[b0] = min(sources.get(b0, math.inf), depart + (1 - t0) * cout0)
+    atteints = graphe.temps_de_parcours(sources, duree_max)
+
+    # seules les cases à moins de duree_max de marche du point peuvent être atteintes
+    rayon = duree_max * vitesse + ACCROCHE_MAX_M
+    j_min, j_max = max(0, int((x - rayon - x0) // pas)), min(nb_colonnes - 1, int((x + rayon - x0) // pas))
+    i_min, i_max = max(0, int((y - rayon - y0) // pas)), min(nb_lignes - 1, int((y + rayon - y0) // pas))
+    for i in range(i_min, i_max + 1):
+        base = i * nb_colonnes
+        for j in range(j_min, j_max + 1):
+            accroche = accroches[base + j]
+            if accroche is None:
+                continue
+            k, t, d = accroche
+            a, b, _, cout = graphe.aretes[k]
+            tc = min(atteints.get(a, math.inf) + t * cout, atteints.get(b, math.inf) + (1 - t) * cout)
+            if k == k0:
+                tc = min(tc, depart + abs(t - t0) * cout)
+            tc += d / vitesse
+            if tc <= duree_max:
+                temps[base + j] = int(round(tc))
+    return temps
+
+
+def construire_grille(chemin, moteur, points, emprise, pas_m=PAS_M, duree_max=DUREE_MAX_S):
+    """
+    moteur : MoteurIsochrones ; points : {identifiant: (lon, lat)} ;
+    emprise : (lon_min, lat_min, lon_max, lat_max). Écrit le fichier (remplacé
+    d'un coup, jamais à moitié écrit) et renvoie le nombre de cases par musée.
+    """
+    if not 0 < duree_max < INATTEINT:
+        raise ValueError(f"duree_max hors de l'intervalle ]0, {INATTEINT}[ : {duree_max}")
+    graphe = moteur.graphe
+    x0, y0 = graphe.vers_xy(emprise[0], emprise[1])
+    x1, y1 = graphe.vers_xy(emprise[2], emprise[3])
+    nb_colonnes = max(1, int(math.ceil((x1 - x0) / pas_m)))
+    nb_lignes = max(1, int(math.ceil((y1 - y0) / pas_m)))
+    accroches = _accroches(graphe, x0, y0, pas_m, nb_colonnes, nb_lignes)
+
+    musees = [[identifiant, lon, lat] for identifiant, (lon, lat) in points.items()]
+    metadonnees = json.dumps({
+        "musees": musees,
+        "source": source_grille(moteur.empreinte_source),
+        "emprise": list(emprise),
+        "duree_max": duree_max,
+    }).encode("utf-8")
+    # les temps commencent sur un octet pair
+    metadonnees += b" " * ((ENTETE.size + len(metadonnees)) % 2)
+
+    dossier = os.path.dirname(chemin)
+    if dossier:
+        os.makedirs(dossier, exist_ok=True)
+    provisoire = chemin + ".tmp"
+    with open(provisoire, "wb") as f:
+        f.write(ENTETE.pack(SIGNATURE, VERSION, 0, nb_colonnes, nb_lignes, len(musees), pas_m, x0, y0,
+                            graphe.lat0, len(metadonnees)))
+        f.write(metadonnees)
+        for _, lon, lat in musees:
+            temps = _temps_cases(graphe, accroches, lon, lat, x0, y0, pas_m, nb_colonnes, nb_lignes, duree_max)
+            if sys.byteorder == "big":
+                temps.byteswap()
+            temps.tofile(f)
+    os.replace(provisoire, chemin)
+    return nb_colonnes * nb_lignes
+
+
+# ---------------------------------------------------------
+#            POLYGONES (bandes de cases contiguës d'une même ligne)
+
+def _polygone_shapely(rectangles):
+    zone = unary_union([box(*r) for r in rectangles])
+    parties = [type(p)(p.exterior) for p in getattr(zone, "geoms", [zone])]
+    return mapping(unary_union(parties))
+
+
+def _polygone_qgis(rectangles):
+    from qgis.core import QgsGeometry, QgsRectangle
+    zone = QgsGeometry.unaryUnion([QgsGeometry.fromRect(QgsRectangle(*r)) for r in rectangles])
+    zone = zone.removeInteriorRings()
+    return json.loads(zone.asJson())
+
+
+# ---------------------------------------------------------
+#            LECTURE
+
+class GrilleTemps:
+    """Grille des temps de marche ouverte en lecture seule par projection en mémoire."""
+
+    def __init__(self, chemin):
+        self.chemin = chemin
+        self._fichier = open(chemin, "rb")
+        self._mmap = mmap.mmap(self._fichier.fileno(), 0, access=mmap.ACCESS_READ)
+        (signature, version, _, self.nb_colonnes, self.nb_lignes, nb_musees, self.pas, self.x0, self.y0, lat0,
+         taille) = ENTETE.unpack_from(self._mmap, 0)
+        if signature != SIGNATURE or version != VERSION:
+            self.fermer()
+            raise ValueError(f"Grille des temps illisible (signature {signature!r}, version {version}) : {chemin}")
+        metadonnees = json.loads(self._mmap[ENTETE.size:ENTETE.size + taille])
+        self.source = metadonnees["source"]
+        self.duree_max = metadonnees["duree_max"]
+        self.emprise = tuple(metadonnees["emprise"]) if "emprise" in metadonnees else None
+        self.positions = {identifiant: (lon, lat) for identifiant, lon, lat in metadonnees["musees"]}
+        self._ordre = {identifiant: k for k, (identifiant, _, _) in enumerate(metadonnees["musees"])}
+        self.projection = ProjectionLocale(lat0)
+        self._temps = memoryview(self._mmap)[ENTETE.size + taille:].cast("H")
+        if len(self._temps) != nb_musees * self.nb_cases:
+            self.fermer()
+            raise ValueError(f"Grille des temps tronquée : {chemin}")
+
+    @property
+    def nb_cases(self):
+        return self.nb_colonnes * self.nb_lignes
+
+    def __contains__(self, identifiant):
+        return identifiant in self._ordre
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.fermer()
+
+    def couvre(self, points, empreinte_extrait, pas_m=PAS_M, emprise=None):
+        """
+        Vrai si la grille vient de cet extrait, a des cases de pas_m mètres,
+        couvre l'emprise demandée (si donnée) et contient tous les points,
+        aux mêmes positions.
+        """
+        if self.source != source_grille(empreinte_extrait) or abs(self.pas - pas_m) > 1e-9:
+            return False
+        if emprise is not None and (self.emprise is None
+                                    or any(abs(a - b) > 1e-7 for a, b in zip(self.emprise, emprise))):
+            return False
+        return all(identifiant in self.positions
+                   and all(abs(a - b) < 1e-7 for a, b in zip(self.positions[identifiant], position))
+                   for identifiant, position in points.items())
+
+    def _grille(self, identifiant):
+        debut = self._ordre[identifiant] * self.nb_cases
+        return self._temps[debut:debut + self.nb_cases]
+
+    def case(self, lon, lat):
+        """Indice de la case contenant le point, None hors de la grille."""
+        x, y = self.projection.vers_xy(lon, lat)
+        i, j = int((y - self.y0) // self.pas), int((x - self.x0) // self.pas)
+        if 0 <= i < self.nb_lignes and 0 <= j < self.nb_colonnes:
+            return i * self.nb_colonnes + j
+        return None
+
+    def temps_au_point(self, identifiant, lon, lat):
+        """Temps de marche (secondes) du musée jusqu'au point, None si non atteint ou hors grille."""
+        k = self.case(lon, lat)
+        if k is None:
+            return None
+        with self._grille(identifiant) as temps:
+            t = temps[k]
+        return None if t == INATTEINT else t
+
+    def cases_atteintes(self, identifiant, duree):
+        """Indices des cases atteintes en duree secondes au plus."""
+        with self._grille(identifiant) as temps:
+            return [k for k, t in enumerate(temps) if t <= duree]
+
+    def atteints(self, identifiant, points, duree):
+        """Identifiants des points {identifiant: (lon, lat)} atteints en duree secondes au plus (gares…)."""
+        cases = {identifiant_point: self.case(lon, lat) for identifiant_point, (lon, lat) in points.items()}
+        with self._grille(identifiant) as temps:
+            return [p for p, k in cases.items() if k is not None and temps[k] <= duree]
+
+    def isochrones(self, identifiant, durees):
+        """FeatureCollection du musée, un polygone par durée, comme la réponse ORS (value, group_index, center)."""
+        if max(durees) > self.duree_max:
+            raise ValueError(f"Durée {max(durees)} s au-delà de la grille ({self.duree_max} s)")
+        construire = _polygone_shapely if box is not None else _polygone_qgis
+        lon, lat = self.positions[identifiant]
+        features = []
+        with self._grille(identifiant) as temps:
+            for duree in sorted(durees):
+                rectangles = []
+                for i in range(self.nb_lignes):
+                    ligne = temps[i * self.nb_colonnes:(i + 1) * self.nb_colonnes]
+                    j = 0
+                    while j < self.nb_colonnes:
+                        if ligne[j] > duree:
+                            j += 1
+                            continue
+                        debut = j
+                        while j < self.nb_colonnes and ligne[j] <= duree:
+                            j += 1
+                        rectangles.append((self.x0 + debut * self.pas, self.y0 + i * self.pas,
+                                           self.x0 + j * self.pas, self.y0 + (i + 1) * self.pas))
+                    ligne.release()
+                if not rectangles:
+                    continue
+                features.append({
+                    "type": "Feature",
+                    "properties": {"group_index": 0, "value": float(duree), "center": [lon, lat]},
+                    "geometry": self.projection.geometrie_lonlat(construire(rectangles)),
+                })
+        return {
+            "type": "FeatureCollection",
+            "features": features,
+            "metadata": {"service": "isochrones", "engine": {"version": f"grille-{self.pas:g}m-{self.source}"}},
+        }
+
+    def fermer(self):
+        """Libère la projection en mémoire (aucune vue sur les temps ne doit rester ouverte)."""
+        if getattr(self, "_temps", None) is not None:
+            self._temps.release()
+            self._temps = None
+        self._mmap.close()
+        self._fichier.close()
@@ -0,0 +1,406 @@
+"""
+===========================================================
+MODULE — MOTEUR D'ISOCHRONES PIÉTONS HORS LIGNE (GRAPHE OSM)
+===========================================================
+Calcule les isochrones à pied sans appeler OpenRouteService, à partir
+d'un extrait OpenStreetMap local de Paris :
+- fichier .osm (XML exporté d'OSM, lu avec la bibliothèque standard)
+- ou fichier .geojson de lignes avec l'attribut "highway" (par exemple
+  un .pbf ouvert dans QGIS puis la couche « lines » exportée en GeoJSON)
+
+Étapes :
+1. Graphe piéton : chaque tronçon de voie praticable à pied devient une
+   arête, pondérée par son temps de parcours (vitesse de marche, plus
+   lente dans les escaliers).
+2. Le musée est rattaché au tronçon le plus proche ; les deux extrémités
+   de ce tronçon sont les sources d'un Dijkstra multi-sources, avec comme
+   temps de départ le trajet jusqu'à elles.
+3. Pour chaque durée (300 s, 600 s), les portions de tronçons atteintes
+   sont élargies d'un tampon de TAMPON_M mètres puis fusionnées ; les îlots
+   entourés de rues atteintes sont remplis.
+
+Le résultat a la même forme que la réponse ORS (FeatureCollection, un
+polygone par durée avec les propriétés "value", "group_index", "center"),
+directement utilisable par run_symbology_gares.
+
+Les polygones sont construits avec shapely s'il est installé, sinon avec
+QgsGeometry (dans QGIS).
+"""
+
+import hashlib
+import heapq
+import json
+import math
+import os
+import xml.etree.ElementTree as ET
+
+# shapely est facultatif : sans lui, les polygones sont construits avec QGIS
+try:
+    from shapely.geometry import LineString, mapping
+    from shapely.ops import unary_union
+except ImportError:
+    LineString = None
+
+
+# ---------------------------------------------------------
+#            PARAMÈTRES DU MODÈLE DE MARCHE
+
+# Vitesse de marche (même ordre de grandeur que le profil foot-walking d'ORS)
+VITESSE_MARCHE_KMH = 5.0
+
+# Ralentissement par type de voie (1 = vitesse normale)
+FACTEURS_VITESSE = {
+    "steps": 0.5,
+    "path": 0.9,
+    "track": 0.9,
+}
+
+# Voies praticables à pied (valeurs de highway)
+VOIES_PIETONNES = frozenset([
+    "footway", "pedestrian", "path", "steps", "living_street", "residential",
+    "service", "unclassified", "tertiary", "tertiary_link", "secondary",
+    "secondary_link", "primary", "primary_link", "track", "cycleway",
+    "corridor", "platform",
+])
+
+# Largeur ajoutée de part et d'autre des rues atteintes (mètres)
+TAMPON_M = 30.0
+
+# Distance maximale entre le musée et la rue la plus proche (mètres)
+RATTACHEMENT_MAX_M = 500.0
+
+# Taille des cases de l'index spatial des tronçons (mètres)
+TAILLE_CASE_M = 100.0
+
+RAYON_TERRE = 6371008.8
+
+
+def _voie_pietonne(tags):
+    """Vrai si la voie décrite par ses tags OSM est praticable à pied."""
+    if tags.get("highway") not in VOIES_PIETONNES:
+        return tags.get("foot") in ("yes", "designated")
+    if tags.get("foot") == "no" or tags.get("access") in ("private", "no"):
+        return tags.get("foot") in ("yes", "designated")
+    return True
+
+
+# ---------------------------------------------------------
+#            GRAPHE PIÉTON
+
+class GraphePieton:
+    """
+    Graphe non orienté : sommets numérotés 0..n-1 (lon, lat), arêtes
+    (a, b, longueur en m, durée en s). Les coordonnées sont aussi gardées
+    dans une projection locale en mètres (équirectangulaire autour du
+    centre de l'extrait), suffisante à l'échelle d'une ville.
+    """
+
+    def __init__(self):
+        self.lonlat = []
+        self.xy = []
+        self.voisins = []
+        self.aretes = []
+        self._sommets = {}
+        self.lat0 = None
+        self.cases = {}
+
+    # --- projection locale ---
+    def vers_xy(self, lon, lat):
+        return (math.radians(lon) * RAYON_TERRE * self._cos0, math.radians(lat) * RAYON_TERRE)
+
+    def vers_lonlat(self, x, y):
+        return (math.degrees(x / (RAYON_TERRE * self._cos0)), math.degrees(y / RAYON_TERRE))
+
+    def _fixer_projection(self, lats):
+        self.lat0 = sum(lats) / len(lats) if lats else 48.86
+        self._cos0 = math.cos(math.radians(self.lat0))
+
+    # --- construction ---
+    def _sommet(self, cle, lon, lat):
+        i = self._sommets.get(cle)
+        if i is None:
+            i = self._sommets[cle] = len(self.lonlat)
+            self.lonlat.append((lon, lat))
+            self.xy.append(self.vers_xy(lon, lat))
+            self.voisins.append([])
+        return i
+
+    def _ajouter_voie(self, points, facteur):
+        """points : liste de (cle, lon, lat) le long de la voie."""
+        vitesse = VITESSE_MARCHE_KMH / 3.6 * facteur
+        precedent = None
+        for cle, lon, lat in points:
+            i = self._sommet(cle, lon, lat)
+            if precedent is not None and precedent != i:
+                (xa, ya), (xb, yb) = self.xy[precedent], self.xy[i]
+                longueur = math.hypot(xb - xa, yb - ya)
+                k = len(self.aretes)
+                self.aretes.append((precedent, i, longueur, longueur / vitesse))
+                self.voisins[precedent].append((i, k))
+                self.voisins[i].append((precedent, k))
+            precedent = i
+
+    def _indexer(self):
+        """Index spatial des arêtes par cases de TAILLE_CASE_M mètres."""
+        self.cases = {}
+        for k, (a, b, _, _) in enumerate(self.aretes):
+            (xa, ya), (xb, yb) = self.xy[a], self.xy[b]
+            for cx in range(int(min(xa, xb) // TAILLE_CASE_M), int(max(xa, xb) // TAILLE_CASE_M) + 1):
+                for cy in range(int(min(ya, yb) // TAILLE_CASE_M), int(max(ya, yb) // TAILLE_CASE_M) + 1):
+                    self.cases.setdefault((cx, cy), []).append(k)
+
+    @staticmethod
+    def _elements_osm(chemin):
+        """
+        Éléments de premier niveau (node, way, relation) d'un extrait OSM, lus
+        en flux : chacun est retiré de la racine, avec ceux qui le précèdent,
+        dès qu'il a été traité (mémoire bornée quelle que soit la taille).
+        """
+        contexte = ET.iterparse(chemin, events=("start", "end"))
+        _, racine = next(contexte)
+        for evenement, elem in contexte:
+            if evenement == "end" and elem.tag in ("node", "way", "relation"):
+                yield elem
+                racine.clear()
+
+    @classmethod
+    def depuis_osm(cls, chemin):
+        """Lit un extrait OSM XML en deux passages (voies, puis seulement leurs nœuds)."""
+        voies = []
+        noeuds_utiles = set()
+        for elem in cls._elements_osm(chemin):
+            if elem.tag == "way":
+                tags = {t.get("k"): t.get("v") for t in elem.iter("tag")}
+                if "highway" in tags and _voie_pietonne(tags):
+                    refs = [int(nd.get("ref")) for nd in elem.iter("nd")]
+                    voies.append((refs, FACTEURS_VITESSE.get(tags["highway"], 1.0)))
+                    noeuds_utiles.update(refs)
+
+        coords = {}
+        for elem in cls._elements_osm(chemin):
+            if elem.tag == "node":
+                i = int(elem.get("id"))
+                if i in noeuds_utiles:
+                    coords[i] = (float(elem.get("lon")), float(elem.get("lat")))
+
+        graphe = cls()
+        graphe._fixer_projection([lat for _, lat in coords.values()])
+        for refs, facteur in voies:
+            graphe._ajouter_voie([(r, *coords[r]) for r in refs if r in coords], facteur)
+        graphe._indexer()
+        return graphe
+
+    @classmethod
+    def depuis_geojson(cls, chemin):
+        """Lit des lignes GeoJSON (LineString / MultiLineString) avec l'attribut highway."""
+        with open(chemin, encoding="utf-8") as f:
+            data = json.load(f)
+        lignes = []
+        for feature in data["features"]:
+            tags = {k: v for k, v in (feature.get("properties") or {}).items() if isinstance(v, str)}
+            geom = feature.get("geometry") or {}
+            if "highway" not in tags or not _voie_pietonne(tags):
+                continue
+            parties = [geom["coordinates"]] if geom.get("type") == "LineString" else (
+                geom["coordinates"] if geom.get("type") == "MultiLineString" else [])
+            for partie in parties:
+                lignes.append((partie, FACTEURS_VITESSE.get(tags["highway"], 1.0)))
+
+        graphe = cls()
+        graphe._fixer_projection([p[1] for partie, _ in lignes for p in partie])
+        for partie, facteur in lignes:
+            # les voies se rejoignent là où elles partagent un point (coordonnées arrondies)
+            graphe._ajouter_voie([((round(p[0], 7), round(p[1], 7)), p[0], p[1]) for p in partie], facteur)
+        graphe._indexer()
+        return graphe
+
+    # --- rattachement du musée ---
+    def arete_la_plus_proche(self, x, y):
+        """Renvoie (arête, position 0..1 sur l'arête, distance en m) ou None."""
+        cx, cy = int(x // TAILLE_CASE_M), int(y // TAILLE_CASE_M)
+        rayon_max = int(RATTACHEMENT_MAX_M // TAILLE_CASE_M) + 1
+        meilleur = None
+        for rayon in range(rayon_max + 1):
+            for i in range(cx - rayon, cx + rayon + 1):
+                for j in range(cy - rayon, cy + rayon + 1):
+                    if max(abs(i - cx), abs(j - cy)) != rayon:
+                        continue
+                    for k in self.cases.get((i, j), ()):
+                        a, b, _, _ = self.aretes[k]
+                        (xa, ya), (xb, yb) = self.xy[a], self.xy[b]
+                        dx, dy = xb - xa, yb - ya
+                        n2 = dx * dx + dy * dy
+                        t = 0.0 if n2 == 0 else max(0.0, min(1.0, ((x - xa) * dx + (y - ya) * dy) / n2))
+                        d = math.hypot(xa + t * dx - x, ya + t * dy - y)
+                        if meilleur is None or d < meilleur[2]:
+                            meilleur = (k, t, d)
+            # les cases de l'anneau suivant sont toutes à plus de rayon × TAILLE_CASE_M
+            if meilleur is not None and meilleur[2] <= rayon * TAILLE_CASE_M:
+                break
+        if meilleur is None or meilleur[2] > RATTACHEMENT_MAX_M:
+            return None
+        return meilleur
+
+    # --- Dijkstra multi-sources ---
+    def temps_de_parcours(self, sources, duree_max):
+        """sources : {sommet: temps de départ}. Renvoie {sommet: temps ≤ duree_max}."""
+        temps = {}
+        tas = [(t, s) for s, t in sources.items()]
+        heapq.heapify(tas)
+        while tas:
+            t, s = heapq.heappop(tas)
+            if s in temps:
+                continue
+            temps[s] = t
+            for v, k in self.voisins[s]:
+                tv = t + self.aretes[k][3]
+                if tv <= duree_max and v not in temps:
+                    heapq.heappush(tas, (tv, v))
+        return temps
+
+
+# ---------------------------------------------------------
+#            POLYGONES
+
+def _segments_atteints(graphe, temps, duree):
+    """Portions d'arêtes atteignables en duree secondes, en coordonnées locales."""
+    segments = []
+    vus = set()
+    for s, ts in temps.items():
+        if ts > duree:
+            continue
+        for v, k in graphe.voisins[s]:
+            if k in vus:
+                continue
+            vus.add(k)
+            a, b, _, cout = graphe.aretes[k]
+            ta, tb = temps.get(a, math.inf), temps.get(b, math.inf)
+            (xa, ya), (xb, yb) = graphe.xy[a], graphe.xy[b]
+            fa = 1.0 if cout == 0 else max(0.0, min(1.0, (duree - ta) / cout))
+            fb = 1.0 if cout == 0 else max(0.0, min(1.0, (duree - tb) / cout))
+            if fa + fb >= 1.0:
+                segments.append(((xa, ya), (xb, yb)))
+                continue
+            if fa > 0:
+                segments.append(((xa, ya), (xa + fa * (xb - xa), ya + fa * (yb - ya))))
+            if fb > 0:
+                segments.append(((xb, yb), (xb + fb * (xa - xb), yb + fb * (ya - yb))))
+    return segments
+
+
+def _polygone_shapely(segments, tampon):
+    zone = unary_union([LineString(seg).buffer(tampon, 4) for seg in segments])
+    if zone.geom_type == "Polygon":
+        zone = type(zone)(zone.exterior)
+    else:
+        zone = unary_union([type(p)(p.exterior) for p in zone.geoms])
+    return mapping(zone)
+
+
+def _polygone_qgis(segments, tampon):
+    from qgis.core import QgsGeometry, QgsPointXY
+    zone = QgsGeometry.unaryUnion([
+        QgsGeometry.fromPolylineXY([QgsPointXY(*p) for p in seg]).buffer(tampon, 4)
+        for seg in segments
+    ])
+    zone = zone.removeInteriorRings()
+    return json.loads(zone.asJson())
+
+
+def _convertir_coordonnees(coords, graphe):
+    if coords and isinstance(coords[0], (int, float)):
+        return list(graphe.vers_lonlat(coords[0], coords[1]))
+    return [_convertir_coordonnees(c, graphe) for c in coords]
+
+
+def empreinte_fichier(chemin):
+    """Empreinte courte d'un extrait (nom, taille, date de modification), sans le relire."""
+    infos = os.stat(chemin)
+    return hashlib.sha1(
+        f"{os.path.basename(chemin)}:{infos.st_size}:{infos.st_mtime_ns}".encode("utf-8")).hexdigest()[:12]
+
+
+# ---------------------------------------------------------
+#            MOTEUR
+
+class MoteurIsochrones:
+    """Isochrones piétons calculés sur un GraphePieton, au format de la réponse ORS."""
+
+    def __init__(self, graphe, tampon=TAMPON_M, empreinte_source=""):
+        self.graphe = graphe
+        self.tampon = tampon
+        self.empreinte_source = empreinte_source
+        # version du moteur pour la clé du cache des isochrones
+        self.version = "local-{}-{}-{}-{}".format(
+            VITESSE_MARCHE_KMH, json.dumps(FACTEURS_VITESSE, sort_keys=True), tampon, empreinte_source)
+
+    @classmethod
+    def depuis_fichier(cls, chemin, tampon=TAMPON_M):
+        """Charge un extrait .osm ou .geojson (une fois par exécution, c'est l'étape la plus longue)."""
+        if chemin.lower().endswith((".geojson", ".json")):
+            graphe = GraphePieton.depuis_geojson(chemin)
+        else:
+            graphe = GraphePieton.depuis_osm(chemin)
+        return cls(graphe, tampon, empreinte_fichier(chemin))
+
+    def isochrones(self, lon, lat, durees=(300, 600)):
+        """FeatureCollection d'un point : un polygone par durée (secondes), comme ORS."""
+        graphe = self.graphe
+        x, y = graphe.vers_xy(lon, lat)
+        rattachement = graphe.arete_la_plus_proche(x, y)
+        if rattachement is None:
+            raise Exception(f" Aucune rue praticable à moins de {RATTACHEMENT_MAX_M:.0f} m du point {lon}, {lat}")
+
+        # sources : les deux extrémités du tronçon le plus proche
+        k, t, distance = rattachement
+        a, b, _, cout = graphe.aretes[k]
+        depart = distance / (VITESSE_MARCHE_KMH / 3.6)
+        sources = {a: depart + t * cout}
+        sources[b] = min(sources.get(b, math.inf), depart + (1 - t) * cout)
+
+        temps = graphe.temps_de_parcours(sources, max(durees))
+        construire = _polygone_shapely if LineString is not None else _polygone_qgis
+
+        features = []
+        for duree in sorted(durees):
+            segments = _segments_atteints(graphe, temps, duree)
+            # point de départ toujours inclus, même si la rue est loin
+            (xa, ya), (xb, yb) = graphe.xy[a], graphe.xy[b]
+            segments.append(((x, y), (xa + t * (xb - xa), ya + t * (yb - ya))))
+            geometrie = construire(segments, self.tampon)
+            geometrie["coordinates"] = _convertir_coordonnees(geometrie["coordinates"], graphe)
+            features.append({
+                "type": "Feature",
+                "properties": {"group_index": 0, "value": float(duree), "center": [lon, lat]},
+                "geometry": geometrie,
+            })
+        return {
+            "type": "FeatureCollection",
+            "features": features,
+            "metadata": {"service": "isochrones", "engine": {"version": self.version}},
+        }
+
+
+def isochrones_locaux(points, moteur, parametres, cache=None, profil="local/foot-walking"):
+    """
+    Même interface que client_ors.isochrones_par_lots, sans requête réseau :
+    points : {identifiant: (lon, lat)} → ({identifiant: FeatureCollection}, statistiques).
+    """
+    resultats = {}
+    calcules = 0
+    for identifiant, (lon, lat) in points.items():
+        cle = cache.cle(profil, lon, lat, parametres) if cache is not None else None
+        iso_data = cache.lire(cle) if cache is not None else None
+        if iso_data is None:
+            iso_data = moteur.isochrones(lon, lat, parametres["range"])
+            calcules += 1
+            if cache is not None:
+                cache.ecrire(cle, iso_data)
+        resultats[identifiant] = iso_data
+    stats = {
+        "musees": len(points),
+        "appels": 0,
+        "appels_evites": len(points),
+        "depuis_cache": len(points) - calcules,
+    }
+    return resultats, stats
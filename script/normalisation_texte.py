@@ -0,0 +1,196 @@
+"""
+===========================================================
+MODULE — NORMALISATION DU TEXTE DES RÉSUMÉS WIKIPÉDIA
+===========================================================
+Fonctions de nettoyage utilisées par le script 2 (scraping Wikipédia).
+
+Les expressions régulières sont compilées une seule fois, au chargement
+du module, au lieu d'être recompilées à chaque paragraphe et à chaque
+musée. Un motif n'est appliqué que si le texte contient le fragment qu'il
+recherche (« [ », « mod », « m2 », « m² »), et les espaces sont normalisés
+avec split/join. Les fonctions gardent exactement le comportement des
+versions historiques du script 2 (mêmes noms, mêmes résultats).
+
+nettoyer_resumes(textes) nettoie tous les résumés en une seule passe :
+les textes sont concaténés avec un séparateur qu'aucun motif ne peut
+traverser, chaque motif est appliqué une fois sur l'ensemble, puis on
+redécoupe.
+
+Normalisation des noms (partagée par generate_title_variants et la
+jointure) : minuscules, accents repliés, mots vides français retirés.
+nom_normalise et mots_significatifs gardent leurs résultats dans un cache
+LRU de taille bornée : un nom n'est normalisé qu'une fois par exécution.
+
+Utilisation dans QGIS (le dossier script/ doit être dans sys.path) :
+    from normalisation_texte import clean_text, nettoyer_resumes, mots_significatifs
+"""
+
+import re
+import unicodedata
+from functools import lru_cache
+
+
+# ---------------------------------------------------------
+#            MOTIFS PRÉCOMPILÉS
+
+# Appels de notes : [1], [réf. nécessaire], [ 12 ]…
+# (équivalent à r'\[\s*[\d\w\s\.-]+\s*\]', sans retour arrière coûteux)
+MOTIF_NOTES = re.compile(r'\[[\w\s.-]+\]')
+
+# r'\s' et str.split() reconnaissent exactement les mêmes espaces :
+# " ".join(txt.split()) == re.sub(r'\s+', ' ', txt).strip()
+MOTIF_ESPACES = re.compile(r'\s+')
+
+# Paragraphes à ignorer en tête d'article
+MOTIF_HOMONYMIE = re.compile(r"^(Pour les articles homonymes|Ne pas confondre)", re.IGNORECASE)
+
+# Résidus de l'infobox à supprimer des résumés (appliqués dans cet ordre),
+# chacun avec un fragment obligatoire cherché d'abord dans le texte en minuscules
+MOTIFS_RESIDUS = [
+    ("mod", re.compile(r"modifier\s*-\s*modifier le code\s*-\s*modifier wikidata", re.IGNORECASE)),
+    ("m2", re.compile(r"\d+\s*m2\s*d'expositions permanentes", re.IGNORECASE)),
+    ("m²", re.compile(r"\d+\s*m²\s*d'expositions permanentes", re.IGNORECASE)),
+]
+
+# Découpage en phrases pour le résumé
+MOTIF_PHRASES = re.compile(r'(?<=[.!?]) +')
+
+# Première lettre majuscule (y compris accents)
+MOTIF_MAJUSCULE = re.compile(r'[A-ZÀ-ÖÙ-Ý]')
+
+# Séparateur pour le traitement par lots : ce n'est ni un espace,
+# ni un caractère de mot, aucun motif ci-dessus ne peut le traverser
+SEPARATEUR_LOT = "\x00"
+
+
+# ---------------------------------------------------------
+#            FONCTIONS UNITAIRES
+
+def clean_text(txt):
+    """Supprime les appels de notes et normalise les espaces d'un paragraphe."""
+    if not txt:
+        return ""
+    if "[" in txt:
+        txt = MOTIF_NOTES.sub('', txt)
+    return " ".join(txt.split())
+
+
+def _supprimer_residus(txt):
+    """Applique MOTIFS_RESIDUS dans l'ordre, en sautant ceux qui ne peuvent pas matcher."""
+    minuscules = txt.lower()
+    for fragment, motif in MOTIFS_RESIDUS:
+        if fragment in minuscules:
+            txt = motif.sub('', txt)
+            minuscules = txt.lower()
+    return txt
+
+
+def clean_summary_global(txt):
+    """Supprime les résidus de l'infobox (liens « modifier », surfaces)."""
+    if not txt:
+        return txt
+    return " ".join(_supprimer_residus(txt).split())
+
+
+def summarize_text(text, max_words=150):
+    """Garde les premières phrases entières, dans la limite de max_words mots."""
+    if not text:
+        return None
+    sentences = MOTIF_PHRASES.split(text)
+    summary_words = []
+    word_count = 0
+    for s in sentences:
+        n = len(s.split())
+        if word_count + n > max_words and word_count > 0:
+            break
+        summary_words.append(s)
+        word_count += n
+    summary = " ".join(summary_words).strip()
+    if not summary.endswith("."):
+        summary += "."
+    return summary
+
+
+def keep_from_first_uppercase(text):
+    """Supprime ce qui précède la première majuscule (chiffres, ponctuation…)."""
+    if not text:
+        return text
+    match = MOTIF_MAJUSCULE.search(text)
+    if match:
+        return text[match.start():].strip()
+    return text
+
+
+# ---------------------------------------------------------
+#            TRAITEMENT PAR LOTS
+
+def nettoyer_resumes(textes, premiere_majuscule=True):
+    """
+    Nettoie une liste de résumés en une seule passe.
+
+    Donne le même résultat que, pour chaque texte :
+        keep_from_first_uppercase(clean_summary_global(texte))
+    (sans keep_from_first_uppercase si premiere_majuscule=False).
+    Les valeurs vides (None, "") sont renvoyées telles quelles.
+    """
+    textes = list(textes)
+    positions = [i for i, t in enumerate(textes) if t]
+    resultats = list(textes)
+    if not positions:
+        return resultats
+
+    # Cas (théorique) d'un texte contenant déjà le séparateur : traitement unitaire
+    if any(SEPARATEUR_LOT in textes[i] for i in positions):
+        for i in positions:
+            txt = clean_summary_global(textes[i])
+            resultats[i] = keep_from_first_uppercase(txt) if premiere_majuscule else txt
+        return resultats
+
+    bloc = SEPARATEUR_LOT.join(textes[i] for i in positions)
+    bloc = " ".join(_supprimer_residus(bloc).split())
+
+    for i, txt in zip(positions, bloc.split(SEPARATEUR_LOT)):
+        txt = txt.strip()
+        if premiere_majuscule:
+            txt = keep_from_first_uppercase(txt)
+        resultats[i] = txt
+    return resultats
+
+
+# ---------------------------------------------------------
+#            NORMALISATION DES NOMS (CACHE LRU)
+
+# Nombre de noms gardés en cache (musées, entrées Wikipédia, titres d'articles)
+TAILLE_CACHE_NOMS = 8192
+
+# Mots vides français, sous forme normalisée (sans accents) : ils ne
+# distinguent pas un musée d'un autre
+MOTS_VIDES = frozenset([
+    "musee", "musees", "de", "du", "des", "d", "la", "le", "les", "l",
+    "a", "au", "aux", "et", "en",
+])
+
+MOTIF_MOTS = re.compile(r'\w+')
+
+# Caractères sans décomposition Unicode
+LIGATURES = str.maketrans({"œ": "oe", "æ": "ae", "’": "'", "ß": "ss"})
+
+
+def replier_accents(texte):
+    """Minuscules, sans accents ni ligatures (« Musée d’Orsay » → « musee d'orsay »). Sans cache."""
+    if not texte:
+        return ""
+    texte = unicodedata.normalize("NFD", texte.lower().translate(LIGATURES))
+    return "".join(c for c in texte if not unicodedata.combining(c))
+
+
+@lru_cache(maxsize=TAILLE_CACHE_NOMS)
+def nom_normalise(nom):
+    """replier_accents avec cache, pour les noms (pas pour les paragraphes)."""
+    return replier_accents(nom)
+
+
+@lru_cache(maxsize=TAILLE_CACHE_NOMS)
+def mots_significatifs(nom):
+    """Mots normalisés d'un nom, sans les mots vides, dans l'ordre (tuple)."""
+    return tuple(m for m in MOTIF_MOTS.findall(nom_normalise(nom)) if m not in MOTS_VIDES)
@@ -0,0 +1,231 @@
+"""
+===========================================================
+MODULE — CACHE LOCAL DES IMAGES DISTANTES DE LA MISE EN PAGE
+===========================================================
+Les logos de la mise en page (label « Musée de France », CY Cergy Paris
+Université) sont hébergés sur Wikimedia : un QgsLayoutItemPicture dont le
+chemin est une URL les retélécharge à chaque mise en page, donc à chaque
+export PDF. CacheRessources :
+- télécharge chaque image une seule fois dans un dossier local, après
+  avoir vérifié que le contenu reçu est bien une image (PNG, JPEG, GIF ou
+  SVG lisible, pas une page d'erreur HTML) ;
+- note dans index.json l'URL, le fichier, la taille et l'empreinte
+  SHA-256 : aux exécutions suivantes le fichier est repris sans accès
+  réseau tant qu'il a la taille et l'empreinte attendues (vérifiées une
+  fois par exécution), sinon il est retéléchargé ;
+- décline l'image en PNG à la taille de son cadre et à la résolution de
+  l'export (rendu Qt : QSvgRenderer / QImage, disponibles dans QGIS),
+  pour que l'export n'ait plus à rendre le SVG ni à réduire un PNG de
+  plusieurs mégapixels.
+Sans réseau ni copie locale, l'URL d'origine est rendue (fonctionnement
+d'avant).
+localiser_images applique le même traitement aux images d'une mise en
+page déjà construite (modèle .qpt dont un logo a été saisi par URL).
+
+Utilisation :
+    from ressources_mise_en_page import CacheRessources
+    ressources = CacheRessources(os.path.join(monCheminDeBase, "icons", "cache"))
+    Logo.setPicturePath(ressources.image(URL_LOGO, 40, 15, 300))
+    ressources.localiser_images(modele, 300)
+"""
+
+import hashlib
+import json
+import os
+import re
+import time
+import xml.etree.ElementTree as ET
+from urllib.parse import unquote, urlparse
+
+import requests
+
+# Wikimedia refuse les requêtes sans User-Agent descriptif
+ENTETES_HTTP = {"User-Agent": "pyqgis_automatisation/1.0 (atlas des musees de Paris; python-requests)"}
+DELAI_TELECHARGEMENT = 30
+MM_PAR_POUCE = 25.4
+
+
+def format_image(contenu):
+    """"png", "jpeg", "gif" ou "svg" d'après les premiers octets, None si ce n'est pas une image."""
+    if contenu.startswith(b"\x89PNG\r\n\x1a\n"):
+        return "png"
+    if contenu.startswith(b"\xff\xd8\xff"):
+        return "jpeg"
+    if contenu[:6] in (b"GIF87a", b"GIF89a"):
+        return "gif"
+    try:
+        racine = ET.fromstring(contenu)
+    except ET.ParseError:
+        return None
+    return "svg" if racine.tag.rsplit("}", 1)[-1] == "svg" else None
+
+
+def taille_pixels(largeur_mm, hauteur_mm, dpi):
+    return max(1, round(largeur_mm / MM_PAR_POUCE * dpi)), max(1, round(hauteur_mm / MM_PAR_POUCE * dpi))
+
+
+class CacheRessources:
+    """Images distantes téléchargées et vérifiées une fois, puis servies depuis le dossier local."""
+
+    def __init__(self, dossier, session=None, delai=DELAI_TELECHARGEMENT):
+        os.makedirs(dossier, exist_ok=True)
+        self.dossier = dossier
+        self.delai = delai
+        self.session = session or requests.Session()
+        self.session.headers.update(ENTETES_HTTP)
+        self._chemin_index = os.path.join(dossier, "index.json")
+        self.index = {}
+        if os.path.exists(self._chemin_index):
+            try:
+                with open(self._chemin_index, encoding="utf-8") as f:
+                    self.index = json.load(f)
+            except (ValueError, OSError) as erreur:
+                print(f" Index du cache illisible ({erreur}) : images retéléchargées. {self._chemin_index}")
+            if not isinstance(self.index, dict):
+                print(f" Index du cache inattendu : images retéléchargées. {self._chemin_index}")
+                self.index = {}
+        # fichiers dont la taille et l'empreinte ont été vérifiées pendant cette exécution
+        self._verifies = set()
+        self.telechargements = 0
+        self.depuis_cache = 0
+
+    def _nom_fichier(self, url, format_contenu):
+        base = os.path.splitext(os.path.basename(unquote(urlparse(url).path)))[0]
+        base = re.sub(r"[^\w.-]+", "_", base)[:60] or "image"
+        return f"{base}_{hashlib.sha1(url.encode('utf-8')).hexdigest()[:8]}.{format_contenu}"
+
+    def _ecrire_index(self):
+        provisoire = self._chemin_index + ".tmp"
+        with open(provisoire, "w", encoding="utf-8") as f:
+            json.dump(self.index, f, ensure_ascii=False, indent=1)
+        os.replace(provisoire, self._chemin_index)
+
+    def _intact(self, chemin, entree):
+        """Vrai si le fichier a la taille et l'empreinte SHA-256 notées dans l'index."""
+        if chemin in self._verifies:
+            return True
+        if not os.path.exists(chemin) or os.path.getsize(chemin) != entree.get("taille"):
+            return False
+        empreinte = hashlib.sha256()
+        with open(chemin, "rb") as f:
+            for bloc in iter(lambda: f.read(1 << 16), b""):
+                empreinte.update(bloc)
+        if empreinte.hexdigest() != entree.get("sha256"):
+            return False
+        self._verifies.add(chemin)
+        return True
+
+    def local(self, url):
+        """Chemin du fichier local de l'URL, téléchargé et vérifié au premier appel ; None si impossible."""
+        entree = self.index.get(url)
+        if isinstance(entree, dict) and entree.get("fichier"):
+            chemin = os.path.join(self.dossier, entree["fichier"])
+            if self._intact(chemin, entree):
+                self.depuis_cache += 1
+                return chemin
+            print(f" Copie locale altérée ou absente, retéléchargée : {url}")
+
+        try:
+            reponse = self.session.get(url, timeout=self.delai)
+            reponse.raise_for_status()
+        except requests.RequestException as erreur:
+            print(f" Image distante indisponible ({erreur}) : {url}")
+            return None
+        contenu = reponse.content
+        format_contenu = format_image(contenu)
+        if format_contenu is None:
+            print(f" Le contenu reçu n'est pas une image ({reponse.headers.get('Content-Type')}) : {url}")
+            return None
+
+        fichier = self._nom_fichier(url, format_contenu)
+        chemin = os.path.join(self.dossier, fichier)
+        provisoire = chemin + ".tmp"
+        with open(provisoire, "wb") as f:
+            f.write(contenu)
+        os.replace(provisoire, chemin)
+        self.index[url] = {
+            "fichier": fichier,
+            "format": format_contenu,
+            "taille": len(contenu),
+            "sha256": hashlib.sha256(contenu).hexdigest(),
+            "telecharge_le": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        }
+        self._ecrire_index()
+        self._verifies.add(chemin)
+        self.telechargements += 1
+        return chemin
+
+    def variante_raster(self, chemin, largeur_mm, hauteur_mm, dpi):
+        """
+        PNG de l'image réduite à son cadre (largeur_mm × hauteur_mm à dpi,
+        proportions gardées), calculé une fois ; None sans Qt, si l'image est
+        illisible ou déjà plus petite que le cadre.
+        """
+        largeur_px, hauteur_px = taille_pixels(largeur_mm, hauteur_mm, dpi)
+        racine, _ = os.path.splitext(chemin)
+        variante = f"{racine}_{largeur_px}x{hauteur_px}.png"
+        if os.path.exists(variante) and os.path.getmtime(variante) >= os.path.getmtime(chemin):
+            return variante
+
+        try:
+            from PyQt5.QtCore import QSize, Qt
+            from PyQt5.QtGui import QImage, QPainter
+            from PyQt5.QtSvg import QSvgRenderer
+        except ImportError:
+            return None
+
+        cadre = QSize(largeur_px, hauteur_px)
+        if chemin.lower().endswith(".svg"):
+            rendu = QSvgRenderer(chemin)
+            if not rendu.isValid():
+                return None
+            taille = rendu.defaultSize()
+            taille.scale(cadre, Qt.KeepAspectRatio)
+            image = QImage(taille, QImage.Format_ARGB32_Premultiplied)
+            image.fill(Qt.transparent)
+            peintre = QPainter(image)
+            rendu.render(peintre)
+            peintre.end()
+        else:
+            image = QImage(chemin)
+            if image.isNull() or (image.width() <= largeur_px and image.height() <= hauteur_px):
+                return None
+            image = image.scaled(cadre, Qt.KeepAspectRatio, Qt.SmoothTransformation)
+
+        points_par_metre = round(dpi / MM_PAR_POUCE * 1000)
+        image.setDotsPerMeterX(points_par_metre)
+        image.setDotsPerMeterY(points_par_metre)
+        provisoire = variante + ".tmp"
+        if not image.save(provisoire, "PNG"):
+            return None
+        os.replace(provisoire, variante)
+        return variante
+
+    def image(self, url, largeur_mm, hauteur_mm, dpi):
+        """Chemin pour setPicturePath : PNG à la taille du cadre, sinon copie locale, sinon l'URL d'origine."""
+        chemin = self.local(url)
+        if chemin is None:
+            return url
+        return self.variante_raster(chemin, largeur_mm, hauteur_mm, dpi) or chemin
+
+    def localiser_images(self, layout, dpi):
+        """
+        Remplace, dans une mise en page QGIS (par exemple lue d'un modèle .qpt),
+        le chemin des images données par une URL par leur version locale.
+        Renvoie le nombre d'images remplacées.
+        """
+        from qgis.core import QgsLayoutItemPicture, QgsUnitTypes
+        convertisseur = layout.renderContext().measurementConverter()
+        remplacees = 0
+        for element in layout.items():
+            if not isinstance(element, QgsLayoutItemPicture):
+                continue
+            url = element.picturePath()
+            if not url.startswith(("http://", "https://")):
+                continue
+            taille = convertisseur.convert(element.sizeWithUnits(), QgsUnitTypes.LayoutMillimeters)
+            chemin = self.image(url, taille.width(), taille.height(), dpi)
+            if chemin != url:
+                element.setPicturePath(chemin)
+                remplacees += 1
+        return remplacees
@@ -0,0 +1,167 @@
+"""
+===========================================================
+MODULE — RÉSUMÉS WIKIPÉDIA PAR L'API MEDIAWIKI
+===========================================================
+Backend "api" du script 2 : les introductions des articles sont demandées
+à l'API MediaWiki (action=query, prop=extracts|pageprops) par lots de 50
+titres, au lieu d'une page HTML par musée. Les renvois (normalisation du
+titre, redirections) sont suivis ; une boucle de redirections (A → B → A)
+est arrêtée au premier titre déjà vu.
+
+Les réponses peuvent être enregistrées (dossier_enregistrement) puis
+rejouées sans réseau (dossier_rejeu) : un fichier JSON par requête, nommé
+par l'empreinte de ses paramètres (cle_requete). Une requête absente du
+dossier de rejeu lève ReponseNonEnregistree, qui donne la clé et les
+titres demandés. Jeu de réponses enregistrées et contrôle du rejeu :
+bench/donnees/mediawiki/ et bench/bench_scraper_mediawiki.py.
+
+Utilisation dans QGIS (le dossier script/ doit être dans sys.path) :
+    from scraper_mediawiki import ScraperMediaWiki
+    resumes = ScraperMediaWiki().resumes(urls)   # {url: résumé ou None}
+"""
+
+import hashlib
+import json
+import os
+from urllib.parse import parse_qs, unquote, urlsplit
+
+import requests
+
+from normalisation_texte import MOTIF_HOMONYMIE, clean_summary_global, clean_text, summarize_text
+
+
+class ReponseNonEnregistree(FileNotFoundError):
+    """Requête rejouée dont la réponse n'est pas dans le dossier de rejeu."""
+
+
+def cle_requete(params):
+    """Nom (sans .json) du fichier d'une requête enregistrée : empreinte SHA-1 des paramètres."""
+    return hashlib.sha1(json.dumps(params, sort_keys=True).encode("utf-8")).hexdigest()
+
+
+class ScraperMediaWiki:
+    """
+    Interroge l'API MediaWiki (action=query, prop=extracts|pageprops) avec
+    jusqu'à 50 titres par requête : quelques appels au lieu d'un par musée.
+
+    - api_url : endpoint de l'API (peut pointer vers un serveur local)
+    - dossier_enregistrement : si défini, chaque réponse y est enregistrée en JSON
+    - dossier_rejeu : si défini, les réponses sont relues depuis ce dossier
+      (aucun appel réseau), ce qui permet de tester avec des réponses enregistrées
+    """
+    TITRES_PAR_REQUETE = 50
+
+    def __init__(self, api_url="https://fr.wikipedia.org/w/api.php",
+                 dossier_enregistrement=None, dossier_rejeu=None):
+        self.api_url = api_url
+        self.dossier_enregistrement = dossier_enregistrement
+        self.dossier_rejeu = dossier_rejeu
+        self.session = requests.Session()
+        self.session.headers["User-Agent"] = "pyqgis_automatisation (atlas des musées de Paris)"
+        self.nb_requetes = 0
+
+    @staticmethod
+    def titre_depuis_url(url):
+        """https://fr.wikipedia.org/wiki/Mus%C3%A9e_Carnavalet -> 'Musée Carnavalet'"""
+        parts = urlsplit(url)
+        if "/wiki/" in parts.path:
+            titre = parts.path.split("/wiki/", 1)[1]
+        else:
+            titre = parse_qs(parts.query).get("title", [""])[0]
+        return unquote(titre).replace("_", " ").strip()
+
+    def _requete(self, params):
+        cle = cle_requete(params)
+
+        if self.dossier_rejeu:
+            chemin = os.path.join(self.dossier_rejeu, cle + ".json")
+            if not os.path.exists(chemin):
+                raise ReponseNonEnregistree(
+                    f"Réponse non enregistrée pour la clé {cle} (titres : {params.get('titles')!r},"
+                    f" suite : {params.get('excontinue') or params.get('continue') or '-'}) dans {self.dossier_rejeu}")
+            with open(chemin, encoding="utf-8") as f:
+                return json.load(f)
+
+        r = self.session.get(self.api_url, params=params, timeout=30)
+        r.raise_for_status()
+        self.nb_requetes += 1
+        data = r.json()
+
+        if self.dossier_enregistrement:
+            os.makedirs(self.dossier_enregistrement, exist_ok=True)
+            with open(os.path.join(self.dossier_enregistrement, cle + ".json"), "w", encoding="utf-8") as f:
+                json.dump(data, f, ensure_ascii=False)
+        return data
+
+    def _interroger_lot(self, titres):
+        """Renvoie ({titre demandé: titre final}, {titre final: page}) pour un lot."""
+        params = {
+            "action": "query",
+            "format": "json",
+            "formatversion": "2",
+            "prop": "extracts|pageprops",
+            "exintro": "1",
+            "explaintext": "1",
+            "exlimit": "max",
+            "redirects": "1",
+            "titles": "|".join(titres),
+        }
+        renvois = {}
+        pages = {}
+        suite = {}
+        while True:
+            data = self._requete({**params, **suite})
+            query = data.get("query", {})
+            for r in query.get("normalized", []) + query.get("redirects", []):
+                renvois[r["from"]] = r["to"]
+            for page in query.get("pages", []):
+                # Les extraits arrivent par paquets : on complète la page déjà vue
+                page_connue = pages.setdefault(page["title"], {})
+                page_connue.update({k: v for k, v in page.items() if v is not None})
+            if "continue" not in data:
+                break
+            suite = data["continue"]
+
+        correspondance = {}
+        for titre in titres:
+            final = titre
+            vus = {titre}
+            # une boucle de renvois (A → B → A) s'arrête au premier titre déjà vu
+            while final in renvois and renvois[final] not in vus:
+                final = renvois[final]
+                vus.add(final)
+            correspondance[titre] = final
+        return correspondance, pages
+
+    @staticmethod
+    def resume_depuis_extrait(page):
+        """Même nettoyage que le scraping HTML, appliqué au texte brut de l'intro."""
+        if not page or page.get("missing") or "disambiguation" in page.get("pageprops", {}):
+            return None
+        paragraphs = []
+        for ligne in page.get("extract", "").split("\n"):
+            txt = clean_text(ligne)
+            if MOTIF_HOMONYMIE.match(txt):
+                continue
+            if len(txt) > 30:
+                paragraphs.append(txt)
+        if not paragraphs:
+            return None
+        return clean_summary_global(summarize_text(" ".join(paragraphs)))
+
+    def resumes(self, urls):
+        titre_par_url = {url: self.titre_depuis_url(url) for url in dict.fromkeys(urls)}
+        titres = list(dict.fromkeys(t for t in titre_par_url.values() if t))
+
+        correspondance = {}
+        pages = {}
+        for i in range(0, len(titres), self.TITRES_PAR_REQUETE):
+            c, p = self._interroger_lot(titres[i:i + self.TITRES_PAR_REQUETE])
+            correspondance.update(c)
+            pages.update(p)
+
+        print(f" API MediaWiki : {self.nb_requetes} requêtes pour {len(titres)} articles.")
+        return {
+            url: self.resume_depuis_extrait(pages.get(correspondance.get(titre)))
+            for url, titre in titre_par_url.items()
+        }
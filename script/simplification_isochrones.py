@@ -0,0 +1,311 @@
+"""
+===========================================================
+MODULE — SIMPLIFICATION ET STOCKAGE COMPACT DES ISOCHRONES
+===========================================================
+Post-traitement des FeatureCollection d'isochrones (ORS ou moteur local)
+avant leur écriture sur disque :
+
+1. Simplification des anneaux (Douglas-Peucker, tolérance en mètres, dans
+   une projection locale autour du musée). La topologie est conservée :
+   si un anneau simplifié se recoupe, ou coupe un autre anneau du même
+   polygone (trou), la tolérance est divisée par deux pour ce polygone,
+   et l'original est gardé si cela ne suffit pas.
+2. Quantification des coordonnées à un nombre fixe de décimales
+   (5 décimales ≈ 1 m), sans sommets consécutifs en double.
+3. Optionnellement, encodage binaire compact (encoder_binaire /
+   decoder_binaire) : propriétés en JSON, coordonnées en entiers
+   (degrés × 10^décimales) codés en différences successives, sur un
+   nombre d'octets variable (varint zigzag, 2 à 4 octets par sommet au
+   lieu d'une vingtaine en GeoJSON).
+
+Moins de sommets, c'est aussi moins de travail pour le test
+intersects() des gares dans run_symbology_gares.
+
+Utilisation :
+    from simplification_isochrones import simplifier_isochrones
+    iso_data = simplifier_isochrones(iso_data, tolerance_m=5, decimales=5)
+"""
+
+import json
+import math
+import struct
+
+# Tolérance de simplification par défaut (mètres) : bien en dessous de la
+# précision d'un isochrone piéton, invisible à l'échelle des cartes (1:10 000)
+TOLERANCE_M = 5.0
+
+# Décimales gardées pour les coordonnées (5 ≈ 1 m, 6 ≈ 0,1 m comme ORS)
+DECIMALES = 5
+
+# Divisions de la tolérance tentées avant de garder un anneau tel quel
+ESSAIS_TOPOLOGIE = 3
+
+# Format binaire : signature, version
+SIGNATURE_BINAIRE = b"ISOB"
+VERSION_BINAIRE = 1
+
+METRES_PAR_DEGRE = 111320.0
+
+
+# ---------------------------------------------------------
+#            SIMPLIFICATION (DOUGLAS-PEUCKER)
+
+def _distance_segment(p, a, b):
+    """Distance (mètres) du point p au segment [a, b]."""
+    dx, dy = b[0] - a[0], b[1] - a[1]
+    longueur2 = dx * dx + dy * dy
+    if longueur2 == 0:
+        return math.hypot(p[0] - a[0], p[1] - a[1])
+    t = max(0.0, min(1.0, ((p[0] - a[0]) * dx + (p[1] - a[1]) * dy) / longueur2))
+    return math.hypot(p[0] - a[0] - t * dx, p[1] - a[1] - t * dy)
+
+
+def _douglas_peucker(points, debut, fin, tolerance, gardes):
+    """Marque dans `gardes` les sommets de points[debut..fin] à conserver (pile, sans récursion)."""
+    pile = [(debut, fin)]
+    while pile:
+        i, j = pile.pop()
+        distance_max, k_max = 0.0, None
+        for k in range(i + 1, j):
+            d = _distance_segment(points[k], points[i], points[j])
+            if d > distance_max:
+                distance_max, k_max = d, k
+        if k_max is not None and distance_max > tolerance:
+            gardes[k_max] = True
+            pile.append((i, k_max))
+            pile.append((k_max, j))
+
+
+def simplifier_anneau_xy(points, tolerance):
+    """
+    Anneau fermé [(x, y), ...] en mètres → anneau simplifié (fermé, au moins
+    4 points), ou l'anneau d'origine s'il deviendrait dégénéré.
+    """
+    n = len(points) - 1          # le dernier point répète le premier
+    if n < 4 or tolerance <= 0:
+        return points
+    # deux ancres : le premier sommet et le plus éloigné de lui
+    loin = max(range(n), key=lambda k: (points[k][0] - points[0][0]) ** 2 + (points[k][1] - points[0][1]) ** 2)
+    gardes = [False] * (n + 1)
+    gardes[0] = gardes[loin] = gardes[n] = True
+    _douglas_peucker(points, 0, loin, tolerance, gardes)
+    _douglas_peucker(points, loin, n, tolerance, gardes)
+    resultat = [p for p, garde in zip(points, gardes) if garde]
+    return resultat if len(resultat) >= 4 else points
+
+
+# ---------------------------------------------------------
+#            CONTRÔLE DE LA TOPOLOGIE
+
+def _orientation(a, b, c):
+    v = (b[0] - a[0]) * (c[1] - a[1]) - (b[1] - a[1]) * (c[0] - a[0])
+    return (v > 0) - (v < 0)
+
+
+def _segments_se_coupent(a, b, c, d):
+    """Vrai si [a, b] et [c, d] se coupent (contacts et chevauchements compris)."""
+    o1, o2, o3, o4 = _orientation(a, b, c), _orientation(a, b, d), _orientation(c, d, a), _orientation(c, d, b)
+    if o1 != o2 and o3 != o4:
+        return True
+
+    def sur_segment(p, q, r):
+        return min(p[0], r[0]) <= q[0] <= max(p[0], r[0]) and min(p[1], r[1]) <= q[1] <= max(p[1], r[1])
+
+    return ((o1 == 0 and sur_segment(a, c, b)) or (o2 == 0 and sur_segment(a, d, b))
+            or (o3 == 0 and sur_segment(c, a, d)) or (o4 == 0 and sur_segment(c, b, d)))
+
+
+def anneaux_valides(anneaux):
+    """
+    Vrai si aucun anneau ne se recoupe et si les anneaux ne se coupent pas
+    entre eux (segments voisins d'un même anneau exceptés).
+    """
+    segments = []
+    for numero, anneau in enumerate(anneaux):
+        n = len(anneau) - 1
+        for k in range(n):
+            a, b = anneau[k], anneau[k + 1]
+            segments.append((min(a[0], b[0]), max(a[0], b[0]), min(a[1], b[1]), max(a[1], b[1]), numero, k, n, a, b))
+    segments.sort()
+    for i, (x0, x1, y0, y1, numero, k, n, a, b) in enumerate(segments):
+        for autre in segments[i + 1:]:
+            if autre[0] > x1:
+                break                                   # triés par x min : plus de chevauchement possible
+            if autre[3] < y0 or autre[2] > y1:
+                continue
+            if autre[4] == numero and (abs(autre[5] - k) == 1 or abs(autre[5] - k) == n - 1):
+                continue                                # segments qui se suivent dans l'anneau
+            if _segments_se_coupent(a, b, autre[7], autre[8]):
+                return False
+    return True
+
+
+# ---------------------------------------------------------
+#            QUANTIFICATION
+
+def quantifier_anneau(anneau, decimales=DECIMALES):
+    """Arrondit les coordonnées [lon, lat] et retire les sommets consécutifs devenus identiques."""
+    resultat = []
+    for lon, lat in anneau:
+        p = [round(lon, decimales), round(lat, decimales)]
+        if not resultat or p != resultat[-1]:
+            resultat.append(p)
+    if resultat[0] != resultat[-1]:
+        resultat.append(list(resultat[0]))
+    return resultat if len(resultat) >= 4 else [list(p) for p in anneau]
+
+
+# ---------------------------------------------------------
+#            POLYGONES ET FEATURECOLLECTION
+
+def _polygones(geometrie):
+    """Liste des polygones (listes d'anneaux) d'une géométrie Polygon ou MultiPolygon."""
+    if geometrie["type"] == "Polygon":
+        return [geometrie["coordinates"]]
+    if geometrie["type"] == "MultiPolygon":
+        return geometrie["coordinates"]
+    return []
+
+
+def simplifier_polygone(anneaux, tolerance_m, decimales, lat_reference):
+    """Anneaux [lon, lat] d'un polygone → anneaux simplifiés puis quantifiés, topologie conservée."""
+    cos_lat = math.cos(math.radians(lat_reference))
+    anneaux_xy = [[(lon * METRES_PAR_DEGRE * cos_lat, lat * METRES_PAR_DEGRE) for lon, lat in a] for a in anneaux]
+
+    tolerance = tolerance_m
+    for _ in range(ESSAIS_TOPOLOGIE + 1):
+        simplifies = [simplifier_anneau_xy(a, tolerance) for a in anneaux_xy]
+        resultat = [quantifier_anneau([(x / (METRES_PAR_DEGRE * cos_lat), y / METRES_PAR_DEGRE) for x, y in a],
+                                      decimales) for a in simplifies]
+        if anneaux_valides(resultat):
+            return resultat
+        tolerance /= 2
+    return [[list(p) for p in a] for a in anneaux]
+
+
+def simplifier_isochrones(iso_data, tolerance_m=TOLERANCE_M, decimales=DECIMALES):
+    """
+    Renvoie une copie de la FeatureCollection avec des polygones simplifiés
+    et quantifiés (la bbox est recalculée, les propriétés sont inchangées).
+    """
+    features = []
+    for feature in iso_data.get("features", []):
+        geometrie = feature.get("geometry") or {}
+        polygones = _polygones(geometrie)
+        if not polygones:
+            features.append(feature)
+            continue
+        centre = feature.get("properties", {}).get("center")
+        lat_reference = centre[1] if centre else polygones[0][0][0][1]
+        nouveaux = [simplifier_polygone(p, tolerance_m, decimales, lat_reference) for p in polygones]
+        coordonnees = nouveaux[0] if geometrie["type"] == "Polygon" else nouveaux
+        features.append(dict(feature, geometry={"type": geometrie["type"], "coordinates": coordonnees}))
+
+    resultat = dict(iso_data, features=features)
+    sommets = [p for f in features for poly in _polygones(f.get("geometry") or {}) for a in poly for p in a]
+    if "bbox" in iso_data and sommets:
+        resultat["bbox"] = [min(p[0] for p in sommets), min(p[1] for p in sommets),
+                            max(p[0] for p in sommets), max(p[1] for p in sommets)]
+    return resultat
+
+
+def nombre_sommets(iso_data):
+    return sum(len(a) for f in iso_data.get("features", []) for p in _polygones(f.get("geometry") or {}) for a in p)
+
+
+# ---------------------------------------------------------
+#            FORMAT BINAIRE COMPACT
+# signature (4 o) | version (1 o) | décimales (1 o) | taille de l'en-tête (4 o)
+# | en-tête JSON (collection sans géométries, structure des anneaux)
+# | coordonnées : différences successives en varint zigzag
+
+def _ecrire_varint(valeur, sortie):
+    valeur = (valeur << 1) ^ (valeur >> 63)          # zigzag : petits négatifs → petits positifs
+    while valeur >= 0x80:
+        sortie.append((valeur & 0x7F) | 0x80)
+        valeur >>= 7
+    sortie.append(valeur)
+
+
+def _lire_varints(donnees, debut, nombre):
+    valeurs = []
+    position = debut
+    for _ in range(nombre):
+        valeur, decalage = 0, 0
+        while True:
+            octet = donnees[position]
+            position += 1
+            valeur |= (octet & 0x7F) << decalage
+            if octet < 0x80:
+                break
+            decalage += 7
+        valeurs.append((valeur >> 1) ^ -(valeur & 1))
+    return valeurs
+
+
+def encoder_binaire(iso_data, decimales=6):
+    """
+    FeatureCollection → octets. Les coordonnées sont arrondies à `decimales`
+    (6 par défaut : la précision des réponses ORS, donc sans perte).
+    """
+    facteur = 10 ** decimales
+    entete = {"collection": {k: v for k, v in iso_data.items() if k != "features"}, "features": []}
+    flux = bytearray()
+    precedent = [0, 0]
+    for feature in iso_data.get("features", []):
+        geometrie = feature.get("geometry") or {}
+        polygones = _polygones(geometrie)
+        entete["features"].append({
+            "feature": {k: v for k, v in feature.items() if k != "geometry"},
+            "type": geometrie.get("type"),
+            "anneaux": [[len(a) for a in poly] for poly in polygones],
+        })
+        for poly in polygones:
+            for anneau in poly:
+                for lon, lat in anneau:
+                    point = [round(lon * facteur), round(lat * facteur)]
+                    _ecrire_varint(point[0] - precedent[0], flux)
+                    _ecrire_varint(point[1] - precedent[1], flux)
+                    precedent = point
+    texte = json.dumps(entete, separators=(",", ":")).encode("utf-8")
+    return SIGNATURE_BINAIRE + struct.pack("<BBI", VERSION_BINAIRE, decimales, len(texte)) + texte + bytes(flux)
+
+
+def decoder_binaire(donnees):
+    """Octets produits par encoder_binaire → FeatureCollection."""
+    if donnees[:4] != SIGNATURE_BINAIRE:
+        raise ValueError("Format binaire d'isochrone inconnu")
+    version, decimales, taille = struct.unpack_from("<BBI", donnees, 4)
+    if version != VERSION_BINAIRE:
+        raise ValueError(f"Version {version} du format binaire non prise en charge")
+    debut = 4 + struct.calcsize("<BBI")
+    entete = json.loads(donnees[debut:debut + taille].decode("utf-8"))
+    nb_sommets = sum(n for f in entete["features"] for poly in f["anneaux"] for n in poly)
+    differences = _lire_varints(donnees, debut + taille, 2 * nb_sommets)
+
+    facteur = 10 ** decimales
+    lon = lat = 0
+    k = 0
+    features = []
+    for f in entete["features"]:
+        polygones = []
+        for poly in f["anneaux"]:
+            anneaux = []
+            for n in poly:
+                anneau = []
+                for _ in range(n):
+                    lon += differences[k]
+                    lat += differences[k + 1]
+                    k += 2
+                    anneau.append([lon / facteur, lat / facteur])
+                anneaux.append(anneau)
+            polygones.append(anneaux)
+        feature = dict(f["feature"])
+        if f["type"] == "Polygon":
+            feature["geometry"] = {"type": "Polygon", "coordinates": polygones[0]}
+        elif f["type"] == "MultiPolygon":
+            feature["geometry"] = {"type": "MultiPolygon", "coordinates": polygones}
+        else:
+            feature["geometry"] = None
+        features.append(feature)
+    return dict(entete["collection"], features=features)
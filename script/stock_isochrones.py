@@ -0,0 +1,284 @@
+"""
+===========================================================
+MODULE — STOCK DES ISOCHRONES DANS UN GEOPACKAGE
+===========================================================
+Tous les isochrones des musées dans une seule table GeoPackage, au lieu
+d'un fichier Isochrones_<identifiant>.geojson et d'une couche QGIS par
+musée :
+
+    isochrones(fid, geom MULTIPOLYGON EPSG:4326,
+               identifiant_museofile, profil, value, group_index, center_lon, center_lat)
+
+- index spatial R-tree (extension gpkg_rtree_index, mis à jour par les
+  déclencheurs standard : QGIS/GDAL s'en servent directement)
+- index attributaire sur identifiant_museofile : la couche QGIS est
+  chargée une fois, puis filtrée par musée avec setSubsetString
+- toutes les bandes de tous les musées restent interrogeables d'un coup
+  (dans_emprise, bandes, ou la couche sans filtre dans QGIS)
+
+Écrit avec sqlite3 (bibliothèque standard) : les fonctions ST_* appelées
+par les déclencheurs du R-tree sont fournies à la connexion en lisant
+l'emprise stockée dans l'en-tête de chaque géométrie.
+
+Utilisation :
+    from stock_isochrones import StockIsochrones
+    stock = StockIsochrones(os.path.join(monCheminDeBase, "isochrones", "isochrones_musees.gpkg"))
+    stock.enregistrer_tous({"M0363": iso_data, ...}, identifiants_actuels={"M0363", ...})
+    stock.fermer()
+"""
+
+import os
+import sqlite3
+import struct
+
+TABLE = "isochrones"
+COLONNE_GEOMETRIE = "geom"
+SRS_ID = 4326
+
+# En-tête GeoPackage : "GP", version 0, drapeaux (petit-boutiste, emprise xy)
+ENTETE_GPKG = b"GP\x00\x03"
+WKB_POLYGONE = 3
+WKB_MULTIPOLYGONE = 6
+
+RTREE = f"rtree_{TABLE}_{COLONNE_GEOMETRIE}"
+
+WKT_4326 = ('GEOGCS["WGS 84",DATUM["WGS_1984",SPHEROID["WGS 84",6378137,298.257223563,AUTHORITY["EPSG","7030"]],'
+            'AUTHORITY["EPSG","6326"]],PRIMEM["Greenwich",0,AUTHORITY["EPSG","8901"]],'
+            'UNIT["degree",0.0174532925199433,AUTHORITY["EPSG","9122"]],AUTHORITY["EPSG","4326"]]')
+
+SCHEMA = [
+    """CREATE TABLE IF NOT EXISTS gpkg_spatial_ref_sys (
+        srs_name TEXT NOT NULL, srs_id INTEGER NOT NULL PRIMARY KEY, organization TEXT NOT NULL,
+        organization_coordsys_id INTEGER NOT NULL, definition TEXT NOT NULL, description TEXT)""",
+    """CREATE TABLE IF NOT EXISTS gpkg_contents (
+        table_name TEXT NOT NULL PRIMARY KEY, data_type TEXT NOT NULL, identifier TEXT UNIQUE,
+        description TEXT DEFAULT '', last_change DATETIME NOT NULL DEFAULT (strftime('%Y-%m-%dT%H:%M:%fZ','now')),
+        min_x DOUBLE, min_y DOUBLE, max_x DOUBLE, max_y DOUBLE,
+        srs_id INTEGER, CONSTRAINT fk_gc_r_srs_id FOREIGN KEY (srs_id) REFERENCES gpkg_spatial_ref_sys(srs_id))""",
+    """CREATE TABLE IF NOT EXISTS gpkg_geometry_columns (
+        table_name TEXT NOT NULL, column_name TEXT NOT NULL, geometry_type_name TEXT NOT NULL,
+        srs_id INTEGER NOT NULL, z TINYINT NOT NULL, m TINYINT NOT NULL,
+        CONSTRAINT pk_geom_cols PRIMARY KEY (table_name, column_name))""",
+    """CREATE TABLE IF NOT EXISTS gpkg_extensions (
+        table_name TEXT, column_name TEXT, extension_name TEXT NOT NULL, definition TEXT NOT NULL,
+        scope TEXT NOT NULL, CONSTRAINT ge_tce UNIQUE (table_name, column_name, extension_name))""",
+    f"""INSERT OR IGNORE INTO gpkg_spatial_ref_sys VALUES
+        ('Undefined cartesian SRS', -1, 'NONE', -1, 'undefined', NULL),
+        ('Undefined geographic SRS', 0, 'NONE', 0, 'undefined', NULL),
+        ('WGS 84 geodetic', 4326, 'EPSG', 4326, '{WKT_4326}', NULL)""",
+    f"""CREATE TABLE IF NOT EXISTS {TABLE} (
+        fid INTEGER PRIMARY KEY AUTOINCREMENT NOT NULL, {COLONNE_GEOMETRIE} MULTIPOLYGON,
+        identifiant_museofile TEXT NOT NULL, profil TEXT NOT NULL DEFAULT 'foot-walking',
+        value REAL NOT NULL, group_index INTEGER, center_lon REAL, center_lat REAL)""",
+    f"""INSERT OR IGNORE INTO gpkg_contents (table_name, data_type, identifier, srs_id)
+        VALUES ('{TABLE}', 'features', '{TABLE}', {SRS_ID})""",
+    f"""INSERT OR IGNORE INTO gpkg_geometry_columns
+        VALUES ('{TABLE}', '{COLONNE_GEOMETRIE}', 'MULTIPOLYGON', {SRS_ID}, 0, 0)""",
+    f"""INSERT OR IGNORE INTO gpkg_extensions VALUES ('{TABLE}', '{COLONNE_GEOMETRIE}', 'gpkg_rtree_index',
+        'http://www.geopackage.org/spec120/#extension_rtree', 'write-only')""",
+    f"CREATE VIRTUAL TABLE IF NOT EXISTS {RTREE} USING rtree(id, minx, maxx, miny, maxy)",
+]
+
+INDEX_MUSEE = f"CREATE INDEX IF NOT EXISTS idx_{TABLE}_musee_profil ON {TABLE} (identifiant_museofile, profil, value)"
+
+# Profil des bandes sans propriété "profil" (réponses ORS d'avant les profils multiples)
+PROFIL_DEFAUT = "foot-walking"
+
+# Déclencheurs de l'extension gpkg_rtree_index (spécification GeoPackage 1.2)
+DECLENCHEURS = [
+    f"""CREATE TRIGGER IF NOT EXISTS {RTREE}_insert AFTER INSERT ON {TABLE}
+        WHEN (new.geom NOT NULL AND NOT ST_IsEmpty(NEW.geom))
+        BEGIN INSERT OR REPLACE INTO {RTREE} VALUES (NEW.fid,
+            ST_MinX(NEW.geom), ST_MaxX(NEW.geom), ST_MinY(NEW.geom), ST_MaxY(NEW.geom)); END""",
+    f"""CREATE TRIGGER IF NOT EXISTS {RTREE}_update1 AFTER UPDATE OF geom ON {TABLE}
+        WHEN OLD.fid = NEW.fid AND (NEW.geom NOTNULL AND NOT ST_IsEmpty(NEW.geom))
+        BEGIN INSERT OR REPLACE INTO {RTREE} VALUES (NEW.fid,
+            ST_MinX(NEW.geom), ST_MaxX(NEW.geom), ST_MinY(NEW.geom), ST_MaxY(NEW.geom)); END""",
+    f"""CREATE TRIGGER IF NOT EXISTS {RTREE}_update2 AFTER UPDATE OF geom ON {TABLE}
+        WHEN OLD.fid = NEW.fid AND (NEW.geom ISNULL OR ST_IsEmpty(NEW.geom))
+        BEGIN DELETE FROM {RTREE} WHERE id = OLD.fid; END""",
+    f"""CREATE TRIGGER IF NOT EXISTS {RTREE}_update3 AFTER UPDATE ON {TABLE}
+        WHEN OLD.fid != NEW.fid AND (NEW.geom NOTNULL AND NOT ST_IsEmpty(NEW.geom))
+        BEGIN DELETE FROM {RTREE} WHERE id = OLD.fid;
+        INSERT OR REPLACE INTO {RTREE} VALUES (NEW.fid,
+            ST_MinX(NEW.geom), ST_MaxX(NEW.geom), ST_MinY(NEW.geom), ST_MaxY(NEW.geom)); END""",
+    f"""CREATE TRIGGER IF NOT EXISTS {RTREE}_update4 AFTER UPDATE ON {TABLE}
+        WHEN OLD.fid != NEW.fid AND (NEW.geom ISNULL OR ST_IsEmpty(NEW.geom))
+        BEGIN DELETE FROM {RTREE} WHERE id IN (OLD.fid, NEW.fid); END""",
+    f"""CREATE TRIGGER IF NOT EXISTS {RTREE}_delete AFTER DELETE ON {TABLE}
+        WHEN old.geom NOT NULL
+        BEGIN DELETE FROM {RTREE} WHERE id = OLD.fid; END""",
+]
+
+
+# ---------------------------------------------------------
+#            GÉOMÉTRIES GEOPACKAGE (en-tête + WKB)
+
+def _polygones(geometrie):
+    if geometrie["type"] == "Polygon":
+        return [geometrie["coordinates"]]
+    if geometrie["type"] == "MultiPolygon":
+        return geometrie["coordinates"]
+    raise ValueError(f"Géométrie d'isochrone inattendue : {geometrie['type']}")
+
+
+def geometrie_gpkg(geometrie):
+    """Géométrie GeoJSON (Polygon / MultiPolygon) → blob GeoPackage MultiPolygon."""
+    polygones = _polygones(geometrie)
+    sommets = [p for poly in polygones for anneau in poly for p in anneau]
+    emprise = (min(p[0] for p in sommets), max(p[0] for p in sommets),
+               min(p[1] for p in sommets), max(p[1] for p in sommets))
+    wkb = [struct.pack("<BII", 1, WKB_MULTIPOLYGONE, len(polygones))]
+    for poly in polygones:
+        wkb.append(struct.pack("<BII", 1, WKB_POLYGONE, len(poly)))
+        for anneau in poly:
+            wkb.append(struct.pack("<I", len(anneau)))
+            wkb.append(struct.pack(f"<{2 * len(anneau)}d", *[c for p in anneau for c in p[:2]]))
+    return ENTETE_GPKG + struct.pack("<i4d", SRS_ID, *emprise) + b"".join(wkb)
+
+
+def _lire_wkb(wkb, position):
+    """Polygon / MultiPolygon WKB à partir de position → (liste de polygones GeoJSON, position suivante)."""
+    boutisme = "<" if wkb[position] == 1 else ">"
+    type_wkb, nombre = struct.unpack_from(boutisme + "II", wkb, position + 1)
+    position += 9
+    if type_wkb == WKB_MULTIPOLYGONE:
+        polygones = []
+        for _ in range(nombre):
+            polygone, position = _lire_wkb(wkb, position)
+            polygones.extend(polygone)
+        return polygones, position
+    if type_wkb != WKB_POLYGONE:
+        raise ValueError(f"Géométrie WKB inattendue : type {type_wkb}")
+    anneaux = []
+    for _ in range(nombre):
+        (nb_points,) = struct.unpack_from(boutisme + "I", wkb, position)
+        valeurs = struct.unpack_from(f"{boutisme}{2 * nb_points}d", wkb, position + 4)
+        anneaux.append([[valeurs[k], valeurs[k + 1]] for k in range(0, len(valeurs), 2)])
+        position += 4 + 16 * nb_points
+    return [anneaux], position
+
+
+def geometrie_geojson(blob):
+    """Blob GeoPackage (Polygon / MultiPolygon, en 2D) → géométrie GeoJSON MultiPolygon."""
+    # taille de l'emprise selon les bits 1 à 3 des drapeaux (0, xy, xyz, xym, xyzm)
+    taille_emprise = (0, 32, 48, 48, 64)[(blob[3] >> 1) & 0b111]
+    polygones, _ = _lire_wkb(blob, 8 + taille_emprise)
+    return {"type": "MultiPolygon", "coordinates": polygones}
+
+
+def _emprise(blob):
+    """(minx, maxx, miny, maxy) lus dans l'en-tête d'un blob écrit par geometrie_gpkg, None si vide."""
+    if blob is None or len(blob) < 40 or blob[:2] != b"GP":
+        return None
+    return struct.unpack_from("<4d", blob, 8)
+
+
+# ---------------------------------------------------------
+#            STOCK
+
+class StockIsochrones:
+    """Table GeoPackage des isochrones de tous les musées (créée au premier usage)."""
+
+    def __init__(self, chemin):
+        self.chemin = chemin
+        dossier = os.path.dirname(chemin)
+        if dossier:
+            os.makedirs(dossier, exist_ok=True)
+        self.connexion = sqlite3.connect(chemin)
+        # fonctions appelées par les déclencheurs du R-tree (fournies par GDAL dans QGIS)
+        self.connexion.create_function("ST_IsEmpty", 1, lambda g: int(_emprise(g) is None), deterministic=True)
+        for nom, position in (("ST_MinX", 0), ("ST_MaxX", 1), ("ST_MinY", 2), ("ST_MaxY", 3)):
+            self.connexion.create_function(
+                nom, 1, lambda g, k=position: (_emprise(g) or (None,) * 4)[k], deterministic=True)
+        with self.connexion:
+            self.connexion.execute("PRAGMA application_id = 1196444487")   # "GPKG"
+            self.connexion.execute("PRAGMA user_version = 10200")
+            for instruction in SCHEMA + DECLENCHEURS:
+                self.connexion.execute(instruction)
+            # stock créé avant la colonne profil : toutes ses bandes sont à pied
+            colonnes = [c[1] for c in self.connexion.execute(f"PRAGMA table_info({TABLE})")]
+            if "profil" not in colonnes:
+                self.connexion.execute(
+                    f"ALTER TABLE {TABLE} ADD COLUMN profil TEXT NOT NULL DEFAULT '{PROFIL_DEFAUT}'")
+                self.connexion.execute(f"DROP INDEX IF EXISTS idx_{TABLE}_musee")
+            self.connexion.execute(INDEX_MUSEE)
+
+    def _inserer(self, identifiant, iso_data):
+        self.connexion.execute(f"DELETE FROM {TABLE} WHERE identifiant_museofile = ?", (identifiant,))
+        lignes = []
+        for feature in iso_data.get("features", []):
+            proprietes = feature.get("properties", {})
+            centre = proprietes.get("center") or (None, None)
+            lignes.append((geometrie_gpkg(feature["geometry"]), identifiant, proprietes.get("profil", PROFIL_DEFAUT),
+                           proprietes["value"], proprietes.get("group_index", 0), centre[0], centre[1]))
+        self.connexion.executemany(
+            f"INSERT INTO {TABLE} ({COLONNE_GEOMETRIE}, identifiant_museofile, profil, value, group_index,"
+            f" center_lon, center_lat) VALUES (?, ?, ?, ?, ?, ?, ?)", lignes)
+
+    def _maj_emprise(self):
+        self.connexion.execute(
+            f"""UPDATE gpkg_contents SET
+                min_x = (SELECT MIN(minx) FROM {RTREE}), max_x = (SELECT MAX(maxx) FROM {RTREE}),
+                min_y = (SELECT MIN(miny) FROM {RTREE}), max_y = (SELECT MAX(maxy) FROM {RTREE}),
+                last_change = strftime('%Y-%m-%dT%H:%M:%fZ','now')
+                WHERE table_name = '{TABLE}'""")
+
+    def enregistrer(self, identifiant, iso_data):
+        """Remplace les bandes d'un musée par celles de la FeatureCollection."""
+        with self.connexion:
+            self._inserer(identifiant, iso_data)
+            self._maj_emprise()
+
+    def enregistrer_tous(self, isochrones, identifiants_actuels=None):
+        """
+        {identifiant: FeatureCollection} → une seule transaction pour tous les
+        musées. Les musées sans identifiant (None, "") sont ignorés ; avec
+        identifiants_actuels, les bandes des autres musées (retirés de la
+        couche) sont supprimées dans la même transaction.
+        Renvoie {"ignores": nombre, "retires": {identifiant}}.
+        """
+        bilan = {"ignores": 0, "retires": set()}
+        with self.connexion:
+            for identifiant, iso_data in isochrones.items():
+                if not identifiant:
+                    bilan["ignores"] += 1
+                    continue
+                self._inserer(identifiant, iso_data)
+            if identifiants_actuels is not None:
+                bilan["retires"] = self.identifiants() - set(identifiants_actuels)
+                self.connexion.executemany(f"DELETE FROM {TABLE} WHERE identifiant_museofile = ?",
+                                           [(identifiant,) for identifiant in bilan["retires"]])
+            self._maj_emprise()
+        return bilan
+
+    def identifiants(self):
+        return {i for (i,) in self.connexion.execute(f"SELECT DISTINCT identifiant_museofile FROM {TABLE}")}
+
+    def dans_emprise(self, min_x, min_y, max_x, max_y, value=None, profil=None):
+        """[(identifiant, profil, value)] des bandes dont l'emprise touche le rectangle (lon/lat), via le R-tree."""
+        requete = (f"SELECT t.identifiant_museofile, t.profil, t.value FROM {TABLE} t JOIN {RTREE} r ON r.id = t.fid"
+                   " WHERE r.maxx >= ? AND r.minx <= ? AND r.maxy >= ? AND r.miny <= ?")
+        parametres = [min_x, max_x, min_y, max_y]
+        if value is not None:
+            requete += " AND t.value = ?"
+            parametres.append(value)
+        if profil is not None:
+            requete += " AND t.profil = ?"
+            parametres.append(profil)
+        return self.connexion.execute(requete, parametres).fetchall()
+
+    def bandes(self, profil, value):
+        """{identifiant: (centre (lon, lat), géométrie GeoJSON)} de la bande (profil, value) de chaque musée."""
+        requete = (f"SELECT identifiant_museofile, center_lon, center_lat, {COLONNE_GEOMETRIE} FROM {TABLE}"
+                   f" WHERE profil = ? AND value = ? AND {COLONNE_GEOMETRIE} IS NOT NULL")
+        return {identifiant: ((lon, lat), geometrie_geojson(blob))
+                for identifiant, lon, lat, blob in self.connexion.execute(requete, (profil, value))}
+
+    def fermer(self):
+        self.connexion.close()
+
+
+def filtre_musee(identifiant):
+    """Expression de filtre (setSubsetString) des bandes d'un musée."""
+    return "\"identifiant_museofile\" = '{}'".format(str(identifiant).replace("'", "''"))
@@ -0,0 +1,175 @@
+"""
+===========================================================
+MODULE — TABLE DE PASSAGE MUSÉES ↔ WIKIPÉDIA
+===========================================================
+Conserve d'une exécution à l'autre le résultat de la jointure du script 2
+(scrap_nom / scrap_url), par identifiant_museofile, dans un fichier JSON :
+
+    {
+      "version_appariement": 2,
+      "version_source": "<empreinte de la liste scrapée>",
+      "entrees_source": [[url, nom], ...],
+      "musees": {
+        "<identifiant_museofile>": {
+          "nom_officiel": ..., "url_musee": ...,
+          "scrap_nom": ..., "scrap_url": ...,
+          "score": 0.67, "methode": "noms" | "url" | "aucune",
+          "version_source": "<empreinte de la liste utilisée>"
+        }
+      }
+    }
+
+Une entrée est reprise telle quelle si le musée n'a changé ni de nom ni
+d'URL, et :
+- si la liste scrapée est la même (même empreinte),
+- ou si la liste a changé depuis l'exécution précédente, mais que
+  l'entrée Wikipédia retenue existe toujours sous le même nom et qu'aucune
+  entrée ajoutée ou renommée dans la liste ne ferait au moins aussi bien
+  (même règle que la jointure : mots d'abord, puis URL).
+
+Seuls les musées nouveaux, renommés ou concernés par un ajout ou un
+renommage dans la liste sont donc recalculés : le coût suit les
+changements, pas la taille du jeu de données. Les musées qui ne sont plus
+dans la couche sont retirés de la table à l'enregistrement ; un fichier
+illisible est ignoré (table recalculée).
+
+Si la règle de jointure elle-même change (VERSION_APPARIEMENT), toute la
+table est recalculée.
+
+Seule différence possible avec une jointure complète : à score égal, une
+entrée reprise garde le nom Wikipédia déjà retenu, alors que la jointure
+complète prendrait le premier dans l'ordre de la liste (qui peut changer
+d'un scraping à l'autre).
+"""
+
+import hashlib
+import json
+import os
+
+from appariement_noms import meilleur_match_exhaustif, meilleur_match_url_exhaustif, tokens_nom
+
+# À incrémenter quand la règle de jointure change (2 : mots sans accents ni mots vides)
+VERSION_APPARIEMENT = 2
+
+
+def version_liste(scrap_data):
+    """Empreinte de la liste scrapée (noms et URL, dans l'ordre)."""
+    h = hashlib.sha1()
+    for s in scrap_data:
+        h.update(f"{s['nom']}\t{s['url_original']}\n".encode("utf-8"))
+    return h.hexdigest()
+
+
+class TablePassage:
+    """Table de passage identifiant_museofile → entrée Wikipédia, stockée en JSON."""
+
+    def __init__(self, chemin):
+        self.chemin = chemin
+        self.musees = {}
+        self.version_precedente = None
+        self.entrees_precedentes = set()
+        contenu = {}
+        if os.path.exists(chemin):
+            try:
+                with open(chemin, encoding="utf-8") as f:
+                    contenu = json.load(f)
+            except (ValueError, OSError) as erreur:
+                print(f" Table de passage illisible ({erreur}), recalculée : {chemin}")
+            if not isinstance(contenu, dict):
+                print(f" Table de passage inattendue ({type(contenu).__name__} au lieu d'un objet), recalculée : {chemin}")
+                contenu = {}
+        # table calculée avec une autre règle de jointure : tout est recalculé
+        if contenu.get("version_appariement", 1) == VERSION_APPARIEMENT:
+            self.musees = contenu.get("musees", {})
+            self.version_precedente = contenu.get("version_source")
+            # (url, nom) de la liste précédente ; une table sans les noms
+            # (urls_source) fait considérer toutes les entrées comme modifiées
+            self.entrees_precedentes = {tuple(e) for e in contenu.get("entrees_source", [])}
+        self.version = None
+        self.entrees = []
+        self._noms_actuels = {}
+        self.ajouts = []
+        self.nb_repris = 0
+        self.nb_calcules = 0
+
+    def preparer(self, scrap_data):
+        """
+        Calcule la version de la liste scrapée et les entrées ajoutées ou
+        renommées (couple URL, nom nouveau) depuis la dernière exécution.
+        """
+        self.version = version_liste(scrap_data)
+        self.entrees = [(s["url_original"], s["nom"]) for s in scrap_data]
+        if self.version != self.version_precedente:
+            self.ajouts = [s for s in scrap_data if (s["url_original"], s["nom"]) not in self.entrees_precedentes]
+        self._noms_actuels = dict(self.entrees)
+
+    def reutilisable(self, identifiant, nom_officiel, url_musee, seuil):
+        """
+        Renvoie l'entrée enregistrée du musée si elle est encore valable,
+        sinon None (le musée doit passer par la jointure).
+        """
+        entree = self.musees.get(str(identifiant)) if identifiant else None
+        if entree is None:
+            return None
+        if entree["nom_officiel"] != (nom_officiel or "") or entree["url_musee"] != (url_musee or ""):
+            return None
+
+        if entree["version_source"] != self.version:
+            # l'entrée doit dater de la liste précédente pour que les ajouts soient connus
+            if entree["version_source"] != self.version_precedente:
+                return None
+            # entrée retenue disparue ou renommée : nom et score ne sont plus valables
+            if entree["scrap_url"] and self._noms_actuels.get(entree["scrap_url"]) != entree["scrap_nom"]:
+                return None
+            if self._ajout_meilleur(entree, nom_officiel, url_musee, seuil):
+                return None
+            entree["version_source"] = self.version
+
+        self.nb_repris += 1
+        return entree
+
+    def _ajout_meilleur(self, entree, nom_officiel, url_musee, seuil):
+        """Vrai si un nom ajouté à la liste pourrait égaler ou battre l'appariement enregistré."""
+        if not self.ajouts:
+            return False
+        if nom_officiel:
+            _, score = meilleur_match_exhaustif(tokens_nom(nom_officiel), self.ajouts)
+            if score >= seuil and (entree["methode"] != "noms" or score >= entree["score"]):
+                return True
+        if entree["methode"] == "noms":
+            return False
+        url_clean = url_musee.lower().strip() if url_musee else ""
+        _, score = meilleur_match_url_exhaustif(url_clean, self.ajouts)
+        if entree["methode"] == "url":
+            return score >= entree["score"]
+        return score >= seuil
+
+    def enregistrer(self, identifiant, nom_officiel, url_musee, match, score, methode):
+        """Enregistre le résultat de la jointure pour un musée (match = None si aucun)."""
+        self.nb_calcules += 1
+        if not identifiant:
+            return
+        self.musees[str(identifiant)] = {
+            "nom_officiel": nom_officiel or "",
+            "url_musee": url_musee or "",
+            "scrap_nom": match["nom"] if match else None,
+            "scrap_url": match["url_original"] if match else None,
+            "score": score,
+            "methode": methode if match else "aucune",
+            "version_source": self.version,
+        }
+
+    def sauvegarder(self, identifiants_actuels=None):
+        """Écrit la table ; identifiants_actuels : musées de la couche, les autres sont retirés."""
+        if identifiants_actuels is not None:
+            garder = {str(identifiant) for identifiant in identifiants_actuels if identifiant}
+            self.musees = {identifiant: entree for identifiant, entree in self.musees.items() if identifiant in garder}
+        provisoire = self.chemin + ".tmp"
+        with open(provisoire, "w", encoding="utf-8") as f:
+            json.dump({
+                "version_appariement": VERSION_APPARIEMENT,
+                "version_source": self.version,
+                "entrees_source": [list(e) for e in self.entrees],
+                "musees": self.musees,
+            }, f, ensure_ascii=False, indent=1)
+        os.replace(provisoire, self.chemin)